@@ -0,0 +1,143 @@
+"""
+Benchmark do envio de emails (projeto B) contra um servidor SMTP local.
+
+Sobe um servidor ``aiosmtpd`` em memória e envia as mesmas mensagens de três
+formas, reportando mensagens/s e conexões abertas:
+
+- uma conexão nova por mensagem, em sequência (custo de conexão a cada envio);
+- `PoolSMTP` com uma conexão (reaproveitamento, sem paralelismo);
+- `PoolSMTP` com ``--conexoes`` conexões em paralelo.
+
+``--latencia-conexao`` e ``--latencia-mensagem`` simulam o custo de
+handshake/login e de processamento do servidor real; ``--falhar-a-cada N``
+responde 421 a cada N mensagens para exercitar a reconexão.
+
+Uso:
+    python bench_entrega.py --mensagens 200 --conexoes 4
+    python bench_entrega.py --mensagens 200 --latencia-conexao 0.2 --falhar-a-cada 25
+"""
+
+import argparse
+import asyncio
+import logging
+import smtplib
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+try:
+    from aiosmtpd.controller import Controller
+except ImportError:
+    Controller = None
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ / "projeto-B_email-relatorio"))
+from entrega import EntregadorEmails, PoolSMTP, montar_mensagem
+
+
+class ServidorTeste:
+    """Handler do aiosmtpd que conta as mensagens e simula latência e quedas."""
+
+    def __init__(self, latencia_conexao=0.0, latencia_mensagem=0.0, falhar_a_cada=0):
+        self.latencia_conexao = latencia_conexao
+        self.latencia_mensagem = latencia_mensagem
+        self.falhar_a_cada = falhar_a_cada
+        self.recebidas = 0
+        self.recusadas = 0
+        self.trava = threading.Lock()
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        await asyncio.sleep(self.latencia_conexao)
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        await asyncio.sleep(self.latencia_mensagem)
+        with self.trava:
+            tentativa = self.recebidas + self.recusadas + 1
+            if self.falhar_a_cada and tentativa % self.falhar_a_cada == 0:
+                self.recusadas += 1
+                return '421 Servico indisponivel, encerrando a conexao'
+            self.recebidas += 1
+        return '250 OK'
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def criar_mensagens(quantidade, tamanho_anexo):
+    anexo = [("grafico.png", bytes(tamanho_anexo), "image", "png")] if tamanho_anexo else []
+    html = "<html><body><h1>Relatório de Vendas</h1></body></html>"
+    return [montar_mensagem("relatorio@teste.local", f"destinatario{i}@teste.local",
+                            "Relatório de Vendas", html, anexo)
+            for i in range(quantidade)]
+
+
+def sem_pool(host, port, mensagens):
+    """Referência: abre e fecha uma conexão para cada mensagem."""
+    inicio = time.perf_counter()
+    enviados = 0
+    for mensagem in mensagens:
+        try:
+            with smtplib.SMTP(host, port, timeout=30) as smtp:
+                smtp.send_message(mensagem)
+            enviados += 1
+        except smtplib.SMTPException:
+            pass
+    tempo = time.perf_counter() - inicio
+    return {"enviados": enviados, "falhas": len(mensagens) - enviados, "tempo_s": round(tempo, 3),
+            "mensagens_por_s": round(enviados / tempo, 1), "conexoes": len(mensagens)}
+
+
+def com_pool(host, port, mensagens, conexoes):
+    entregador = EntregadorEmails(PoolSMTP(host, port, usar_ssl=False, tamanho=conexoes))
+    try:
+        entregador.enviar(mensagens)
+    finally:
+        entregador.fechar()
+    return entregador.resumo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do envio de emails com servidor SMTP local")
+    parser.add_argument('--mensagens', type=int, default=200)
+    parser.add_argument('--conexoes', type=int, default=4)
+    parser.add_argument('--tamanho-anexo', type=int, default=100_000, help="bytes por mensagem")
+    parser.add_argument('--latencia-conexao', type=float, default=0.05, help="segundos por EHLO")
+    parser.add_argument('--latencia-mensagem', type=float, default=0.01, help="segundos por DATA")
+    parser.add_argument('--falhar-a-cada', type=int, default=0, help="responde 421 a cada N mensagens")
+    args = parser.parse_args()
+
+    if Controller is None:
+        sys.exit("aiosmtpd não está instalado: pip install aiosmtpd")
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("mail.log").setLevel(logging.ERROR)
+
+    handler = ServidorTeste(args.latencia_conexao, args.latencia_mensagem, args.falhar_a_cada)
+    host, port = "127.0.0.1", porta_livre()
+    controller = Controller(handler, hostname=host, port=port)
+    controller.start()
+    try:
+        mensagens = criar_mensagens(args.mensagens, args.tamanho_anexo)
+        casos = [
+            ("conexão por mensagem", lambda: sem_pool(host, port, mensagens)),
+            ("pool, 1 conexão", lambda: com_pool(host, port, mensagens, 1)),
+            (f"pool, {args.conexoes} conexões", lambda: com_pool(host, port, mensagens, args.conexoes)),
+        ]
+        print(f"{'modo':<24}{'enviados':>10}{'falhas':>8}{'conexões':>10}{'tempo (s)':>11}{'msg/s':>9}")
+        for nome, executar in casos:
+            r = executar()
+            print(f"{nome:<24}{r['enviados']:>10}{r['falhas']:>8}{r['conexoes']:>10}"
+                  f"{r['tempo_s']:>11.2f}{r['mensagens_por_s']:>9.1f}")
+        print(f"Servidor: {handler.recebidas} recebidas, {handler.recusadas} respondidas com 421")
+    finally:
+        controller.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""
+Benchmark das estatísticas de vendas (`comum.estatisticas`).
+
+Compara, em uma coluna Vendas gerada em memória, o código em várias
+passadas usado antes pelos projetos com `calcular` (uma passada):
+
+- email (projeto B): soma, média, máximo, mínimo, cliente top e vendas
+  acima da média, uma chamada do pandas por métrica;
+- exportação do dashboard (projeto C): resumo + região com mais vendas;
+- por grupo: groupby do pandas (agg + idxmax + acima da média) contra
+  `calcular` com chaves.
+
+Os resultados das duas versões são conferidos antes de medir.
+
+Uso:
+    python bench_estatisticas.py --linhas 1e7 --repeticoes 5
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+from comum.estatisticas import calcular
+
+REGIOES = ['Norte', 'Sul', 'Leste', 'Oeste']
+
+
+def gerar(linhas, clientes, seed=42):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Cliente': pd.Categorical.from_codes(rng.integers(0, clientes, linhas),
+                                             [f"Cliente_{i}" for i in range(clientes)]),
+        'Vendas': np.round(rng.lognormal(mean=7.0, sigma=0.8, size=linhas), 2),
+        'Regiao': pd.Categorical.from_codes(rng.integers(0, len(REGIOES), linhas), REGIOES),
+    })
+
+
+def email_multipassada(df):
+    return {
+        'total_vendas': float(df['Vendas'].sum()),
+        'media_vendas': float(df['Vendas'].mean()),
+        'maior_venda': float(df['Vendas'].max()),
+        'menor_venda': float(df['Vendas'].min()),
+        'cliente_top': df.loc[df['Vendas'].idxmax(), 'Cliente'],
+        'vendas_acima_media': len(df[df['Vendas'] > df['Vendas'].mean()]),
+        'percentual_top_cliente': float((df['Vendas'].max() / df['Vendas'].sum()) * 100),
+    }
+
+
+def email_uma_passada(df):
+    r = calcular(df['Vendas'], acima_media=True)
+    return {
+        'total_vendas': r.soma, 'media_vendas': r.media, 'maior_venda': r.maximo,
+        'menor_venda': r.minimo, 'cliente_top': df['Cliente'].iloc[r.posicao_maximo],
+        'vendas_acima_media': r.acima_media, 'percentual_top_cliente': r.maximo / r.soma * 100,
+    }
+
+
+def exportacao_multipassada(df):
+    return (df['Vendas'].sum(), df['Vendas'].mean(), df['Vendas'].max(),
+            df.loc[df['Vendas'].idxmax(), 'Cliente'], df.groupby('Regiao', observed=True)['Vendas'].sum().idxmax())
+
+
+def exportacao_uma_passada(df):
+    r = calcular(df['Vendas'])
+    por_regiao = calcular(df['Vendas'], df['Regiao'])
+    return (r.soma, r.media, r.maximo, df['Cliente'].iloc[r.posicao_maximo],
+            max(por_regiao, key=lambda regiao: por_regiao[regiao].soma))
+
+
+def grupos_pandas(df):
+    grupos = df['Vendas'].groupby(df['Regiao'], observed=True)
+    agregado = grupos.agg(['sum', 'mean', 'max', 'min', 'count'])
+    agregado['posicao_maximo'] = grupos.idxmax()
+    agregado['acima_media'] = (df['Vendas'] > grupos.transform('mean')).groupby(df['Regiao'], observed=True).sum()
+    return agregado
+
+
+def grupos_uma_passada(df):
+    return calcular(df['Vendas'], df['Regiao'], acima_media=True)
+
+
+def conferir(df):
+    """Garante que as duas versões calculam o mesmo resultado."""
+    antes, depois = email_multipassada(df), email_uma_passada(df)
+    for chave, valor in antes.items():
+        assert valor == depois[chave] or np.isclose(valor, depois[chave]), chave
+    antes, depois = exportacao_multipassada(df), exportacao_uma_passada(df)
+    assert all(a == d or np.isclose(a, d) for a, d in zip(antes, depois))
+    agregado, grupos = grupos_pandas(df), grupos_uma_passada(df)
+    for regiao, r in grupos.items():
+        linha = agregado.loc[regiao]
+        assert np.isclose(linha['sum'], r.soma) and linha['max'] == r.maximo and linha['min'] == r.minimo
+        assert linha['posicao_maximo'] == r.posicao_maximo and linha['acima_media'] == r.acima_media
+
+
+def medir(funcao, df, repeticoes):
+    """Melhor de `repeticoes` execuções, em ms."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(df)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das estatísticas em uma passada")
+    parser.add_argument('--linhas', type=float, default=1e7)
+    parser.add_argument('--clientes', type=int, default=50000)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    linhas = int(args.linhas)
+    df = gerar(linhas, args.clientes)
+    conferir(df)
+    print(f"{linhas:,} linhas, {args.clientes:,} clientes, {len(REGIOES)} regiões (melhor de {args.repeticoes})")
+    print(f"{'caso':<24}{'várias passadas':>18}{'uma passada':>14}{'ganho':>8}")
+
+    casos = [
+        ("email (B)", email_multipassada, email_uma_passada),
+        ("exportação (C)", exportacao_multipassada, exportacao_uma_passada),
+        ("por região", grupos_pandas, grupos_uma_passada),
+    ]
+    for nome, antes, depois in casos:
+        t_antes, t_depois = medir(antes, df, args.repeticoes), medir(depois, df, args.repeticoes)
+        print(f"{nome:<24}{t_antes:>15.1f} ms{t_depois:>11.1f} ms{t_antes / t_depois:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
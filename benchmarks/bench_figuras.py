@@ -0,0 +1,92 @@
+"""
+Benchmark da figura Performance vs Meta do dashboard (projeto C).
+
+Compara a dispersão com um marcador por linha (como o dashboard fazia)
+com a montada por `ConstrutorFiguras` (orçamento de pontos, agregação por
+densidade e limite de tamanho do JSON): tempo para montar e serializar a
+figura, número de pontos e tamanho do JSON enviado ao navegador. Antes de
+medir, confere que os pontos agregados representam todas as linhas e
+preservam o total de vendas.
+
+Uso:
+    python bench_figuras.py --linhas 1e4,1e5,1e6 --repeticoes 3
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ / "projeto-C_dashboard"))
+from figuras import ConstrutorFiguras, agregar_dispersao
+
+STATUS = ['🟢 Acima da Meta', '🟡 Próximo da Meta', '🔴 Abaixo da Meta']
+
+
+def gerar(linhas, seed=42):
+    rng = np.random.default_rng(seed)
+    vendas = np.round(rng.lognormal(mean=7.0, sigma=0.8, size=linhas), 2)
+    df = pd.DataFrame({
+        'Cliente': [f"Cliente {i}" for i in range(linhas)],
+        'Vendas': vendas,
+        'Meta': vendas * rng.uniform(0.8, 1.3, linhas),
+    })
+    df['Performance'] = df['Vendas'] / df['Meta'] * 100
+    df['Status'] = pd.Categorical.from_codes(
+        np.select([df['Performance'] >= 100, df['Performance'] >= 80], [0, 1], 2), STATUS)
+    return df
+
+
+def dispersao(dados, render_mode='auto'):
+    return px.scatter(dados, x='Meta', y='Vendas', color='Status', size='Performance',
+                      hover_data=['Cliente', 'Performance'], render_mode=render_mode)
+
+
+def medir(funcao, repeticoes):
+    """Melhor de `repeticoes` execuções, em ms, e o resultado da última."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos) * 1e3, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das figuras do dashboard")
+    parser.add_argument('--linhas', default='1e4,1e5,1e6')
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    construtor = ConstrutorFiguras()
+    print(f"orçamento de {construtor.orcamento_pontos} pontos, limite de "
+          f"{construtor.limite_bytes // 1024} KB (melhor de {args.repeticoes})")
+    print(f"{'linhas':>10}{'por linha':>12}{'JSON':>10}{'pontos':>10}{'construtor':>12}{'JSON':>10}{'ganho':>8}")
+    for linhas in (int(float(n)) for n in args.linhas.split(',')):
+        df = gerar(linhas)
+        pontos = agregar_dispersao(df, 'Meta', 'Vendas', 'Status', construtor.orcamento_pontos,
+                                   medias=['Performance'], rotulo='Cliente')
+        assert len(pontos) <= construtor.orcamento_pontos
+        assert pontos['Pontos'].sum() == linhas
+        assert np.isclose((pontos['Vendas'] * pontos['Pontos']).sum(), df['Vendas'].sum())
+
+        def montar(orcamento):
+            dados = agregar_dispersao(df, 'Meta', 'Vendas', 'Status', orcamento,
+                                      medias=['Performance'], rotulo='Cliente')
+            return dispersao(dados, construtor.modo(len(dados)))
+
+        t_linhas, json_linhas = medir(lambda: dispersao(df).to_json(), args.repeticoes)
+        t_construtor, json_construtor = medir(lambda: construtor.limitar(montar).to_json(),
+                                              args.repeticoes)
+        print(f"{linhas:>10,}{t_linhas:>9.0f} ms{len(json_linhas) / 1024:>7.0f} KB"
+              f"{len(pontos):>10,}{t_construtor:>9.0f} ms{len(json_construtor) / 1024:>7.0f} KB"
+              f"{t_linhas / t_construtor:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark dos filtros da sidebar do dashboard (projeto C).
+
+Compara a avaliação dos filtros (regiões, categorias e valor mínimo) como
+o dashboard fazia, com ``isin`` sobre colunas de texto, com o mesmo
+``isin`` sobre colunas categóricas e com `IndiceFiltros` (bitmaps por
+valor + permutação ordenada de Vendas). O tempo de construção do índice
+(uma vez por carregamento dos dados) é reportado à parte. As máscaras das
+três versões são conferidas antes de medir.
+
+Uso:
+    python bench_filtros.py --linhas 1e7 --repeticoes 5
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ / "projeto-C_dashboard"))
+from indices import IndiceFiltros, filtrar_linhas
+
+REGIOES = ['Norte', 'Sul', 'Leste', 'Oeste']
+CATEGORIAS = ['Premium', 'Standard', 'Basic']
+CASOS = [
+    ("padrão (tudo, mínimo 0)", {'Regiao': REGIOES, 'Categoria': CATEGORIAS}, 0),
+    ("2 regiões, 2 categorias, 1500", {'Regiao': ['Norte', 'Sul'], 'Categoria': ['Premium', 'Basic']}, 1500),
+    ("1 região, 1 categoria", {'Regiao': ['Leste'], 'Categoria': ['Standard']}, 0),
+    ("tudo, mínimo 10000", {'Regiao': REGIOES, 'Categoria': CATEGORIAS}, 10000),
+]
+
+
+def gerar(linhas, seed=42):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Vendas': np.round(rng.lognormal(mean=7.0, sigma=0.8, size=linhas), 2),
+        'Regiao': np.array(REGIOES, dtype=object)[rng.integers(0, len(REGIOES), linhas)],
+        'Categoria': np.array(CATEGORIAS, dtype=object)[rng.integers(0, len(CATEGORIAS), linhas)],
+    })
+
+
+def medir(funcao, repeticoes):
+    """Melhor de `repeticoes` execuções, em ms."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos filtros do dashboard")
+    parser.add_argument('--linhas', type=float, default=1e7)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    linhas = int(args.linhas)
+    texto = gerar(linhas)
+    categorico = texto.astype({'Regiao': 'category', 'Categoria': 'category'})
+    inicio = time.perf_counter()
+    indice = IndiceFiltros(categorico)
+    construcao = time.perf_counter() - inicio
+
+    print(f"{linhas:,} linhas; índice construído em {construcao:.2f}s "
+          f"({indice.nbytes / 1024 / 1024:.0f} MB; melhor de {args.repeticoes})")
+    print(f"{'filtro':<32}{'linhas':>12}{'isin texto':>13}{'isin categ.':>13}{'índice':>10}{'ganho':>8}")
+    for nome, escolhas, minimo in CASOS:
+        mascara = indice.filtrar(escolhas, minimo)
+        assert (mascara == filtrar_linhas(texto, escolhas, minimo)).all(), nome
+        assert (mascara == filtrar_linhas(categorico, escolhas, minimo)).all(), nome
+
+        t_texto = medir(lambda: filtrar_linhas(texto, escolhas, minimo), args.repeticoes)
+        t_categorico = medir(lambda: filtrar_linhas(categorico, escolhas, minimo), args.repeticoes)
+        t_indice = medir(lambda: indice.filtrar(escolhas, minimo), args.repeticoes)
+        print(f"{nome:<32}{int(mascara.sum()):>12,}{t_texto:>10.1f} ms{t_categorico:>10.1f} ms"
+              f"{t_indice:>7.1f} ms{t_texto / t_indice:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+"""
+Benchmark das etapas do Relatório de Vendas (projeto A).
+
+Para cada tamanho pedido gera (uma vez) um vendas.csv sintético e executa,
+em um processo separado, as etapas de RelatorioVendas medindo tempo de
+parede, tempo de CPU, pico de memória (RSS e, opcionalmente, tracemalloc)
+e linhas/s. Os resultados são gravados em JSON para comparação entre versões.
+
+Uso:
+    python bench_relatorio.py --linhas 1e4 1e5 1e6
+    python bench_relatorio.py --linhas 1e7 --chunk-size 1000000
+    python bench_relatorio.py --linhas 1e5 --comparar resultados/relatorio_anterior.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+PROJETO_A = RAIZ / "projeto-A_relatorio-vendas"
+PASTA_DADOS = Path(__file__).resolve().parent / "dados"
+PASTA_RESULTADOS = Path(__file__).resolve().parent / "resultados"
+
+
+def rss_pico_mb():
+    """Pico de memória residente do processo em MB (ru_maxrss: KiB no Linux, bytes no macOS)."""
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+@contextmanager
+def medir(etapas, nome, linhas, usar_tracemalloc):
+    """Mede uma etapa e grava o resultado em `etapas[nome]`."""
+    if usar_tracemalloc:
+        tracemalloc.reset_peak()
+    inicio, inicio_cpu = time.perf_counter(), time.process_time()
+    yield
+    tempo = time.perf_counter() - inicio
+    etapas[nome] = {
+        "tempo_s": round(tempo, 6),
+        "cpu_s": round(time.process_time() - inicio_cpu, 6),
+        "linhas_por_s": round(linhas / tempo) if tempo > 0 else None,
+        "rss_pico_mb": round(rss_pico_mb(), 1),
+    }
+    if usar_tracemalloc:
+        etapas[nome]["tracemalloc_pico_mb"] = round(tracemalloc.get_traced_memory()[1] / 1e6, 1)
+
+
+def executar_etapas(arquivo, linhas, chunk_size, cache, usar_tracemalloc):
+    """Executa as etapas do relatório (chamado no processo filho)."""
+    logging.basicConfig(level=logging.WARNING)
+    sys.path.insert(0, str(PROJETO_A))
+    from agregados import REGRA_PADRAO
+    from relatorio_vendas_pro import RelatorioVendas
+
+    with open(PROJETO_A / "config.json", 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    config.update({
+        "arquivo_entrada": str(arquivo),
+        "arquivo_saida": "vendas_filtradas.csv",
+        "chunk_size": chunk_size,
+        "cache_colunar": cache,
+        "incremental": False,
+        "regras": [],
+    })
+
+    if usar_tracemalloc:
+        tracemalloc.start()
+    etapas = {}
+    os.chdir(tempfile.mkdtemp(prefix="bench_relatorio_"))
+    relatorio = RelatorioVendas(config=config)
+
+    if chunk_size:
+        with medir(etapas, "process_streaming", linhas, usar_tracemalloc):
+            resultado = relatorio.process_streaming(chunk_size)
+        with medir(etapas, "save_results", linhas, usar_tracemalloc):
+            relatorio.save_statistics(relatorio.build_statistics(resultado))
+    else:
+        with medir(etapas, "load_data", linhas, usar_tracemalloc):
+            df = relatorio.load_data(validar=False)
+        with medir(etapas, "validate_data", linhas, usar_tracemalloc):
+            relatorio.validate_data(df)
+        with medir(etapas, "filter_sales", linhas, usar_tracemalloc):
+            partes = relatorio.apply_rules(df)
+        with medir(etapas, "generate_statistics", linhas, usar_tracemalloc):
+            stats = relatorio.generate_statistics(df, partes[REGRA_PADRAO], partes)
+        with medir(etapas, "save_results", linhas, usar_tracemalloc):
+            relatorio.save_outputs(partes[REGRA_PADRAO], partes)
+            relatorio.save_statistics(stats)
+
+    total = sum(e["tempo_s"] for e in etapas.values())
+    return {
+        "etapas": etapas,
+        "total_s": round(total, 6),
+        "linhas_por_s": round(linhas / total) if total > 0 else None,
+        "rss_pico_mb": round(rss_pico_mb(), 1),
+    }
+
+
+def arquivo_dados(linhas, clientes, colunas_extras, seed):
+    """Caminho do CSV sintético (gerado apenas na primeira vez)."""
+    from gerar_vendas import gerar_vendas
+
+    caminho = PASTA_DADOS / f"vendas_{linhas}_{clientes}_{colunas_extras}_{seed}.csv"
+    if not caminho.exists():
+        print(f"Gerando {caminho.name}...", flush=True)
+        gerar_vendas(caminho, linhas, clientes, colunas_extras, seed)
+    return caminho
+
+
+def metadados():
+    """Versões e ambiente, para tornar os resultados comparáveis."""
+    import numpy
+    import pandas
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "pandas": pandas.__version__,
+        "numpy": numpy.__version__,
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def comparar(atual, base):
+    """Imprime a razão de tempo (atual/base) por etapa para os casos em comum."""
+    def chave(r):
+        return (r["linhas"], r["modo"])
+
+    casos_base = {chave(r): r for r in base["resultados"]}
+    print(f"\nComparação com {base['meta'].get('commit')} ({base['meta'].get('data')}):")
+    for r in atual["resultados"]:
+        anterior = casos_base.get(chave(r))
+        if not anterior:
+            continue
+        print(f"  {r['linhas']:>12,} linhas [{r['modo']}] total: "
+              f"{r['total_s'] / anterior['total_s']:.2f}x")
+        for etapa, medida in r["etapas"].items():
+            if etapa in anterior["etapas"] and anterior["etapas"][etapa]["tempo_s"] > 0:
+                razao = medida["tempo_s"] / anterior["etapas"][etapa]["tempo_s"]
+                print(f"      {etapa:<22} {razao:.2f}x")
+
+
+def imprimir(resultado):
+    print(f"\n{resultado['linhas']:,} linhas [{resultado['modo']}] "
+          f"({resultado['arquivo_mb']:,.1f} MB) - total {resultado['total_s']:.3f}s, "
+          f"{resultado['linhas_por_s'] or 0:,} linhas/s, RSS pico {resultado['rss_pico_mb']:,.1f} MB")
+    for etapa, medida in resultado["etapas"].items():
+        print(f"  {etapa:<22} {medida['tempo_s']:>9.3f}s  cpu {medida['cpu_s']:>8.3f}s  "
+              f"{medida['linhas_por_s'] or 0:>14,} linhas/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das etapas do relatório de vendas")
+    parser.add_argument('--linhas', type=float, nargs='+', default=[1e4, 1e5, 1e6])
+    parser.add_argument('--clientes', type=int, default=1000)
+    parser.add_argument('--colunas-extras', type=int, default=0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-size', type=int, default=None, help="mede o modo streaming")
+    parser.add_argument('--cache', action='store_true', help="usa o cache colunar (leitura quente)")
+    parser.add_argument('--tracemalloc', action='store_true', help="pico de alocações por etapa")
+    parser.add_argument('--saida', default=None, help="arquivo JSON de resultados")
+    parser.add_argument('--comparar', default=None, help="JSON de uma execução anterior")
+    parser.add_argument('--executar', default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.executar:
+        # Processo filho: mede um único arquivo e devolve JSON no stdout
+        resultado = executar_etapas(args.executar, int(args.linhas[0]), args.chunk_size,
+                                    args.cache, args.tracemalloc)
+        print(json.dumps(resultado))
+        return
+
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    modo = f"streaming_{args.chunk_size}" if args.chunk_size else "memoria"
+    relatorio = {"meta": metadados(), "resultados": []}
+    for linhas in (int(n) for n in args.linhas):
+        arquivo = arquivo_dados(linhas, args.clientes, args.colunas_extras, args.seed)
+        comando = [sys.executable, __file__, "--executar", str(arquivo), "--linhas", str(linhas)]
+        if args.chunk_size:
+            comando += ["--chunk-size", str(args.chunk_size)]
+        if args.cache:
+            comando.append("--cache")
+            # Aquece o cache antes da medição
+            subprocess.run(comando, check=True, capture_output=True)
+        if args.tracemalloc:
+            comando.append("--tracemalloc")
+
+        saida = subprocess.run(comando, check=True, capture_output=True, text=True).stdout
+        resultado = json.loads(saida.strip().splitlines()[-1])
+        resultado.update({
+            "linhas": linhas,
+            "modo": modo + ("_cache" if args.cache else ""),
+            "clientes": args.clientes,
+            "colunas_extras": args.colunas_extras,
+            "arquivo_mb": round(arquivo.stat().st_size / 1e6, 1),
+        })
+        relatorio["resultados"].append(resultado)
+        imprimir(resultado)
+
+    PASTA_RESULTADOS.mkdir(parents=True, exist_ok=True)
+    destino = Path(args.saida) if args.saida else \
+        PASTA_RESULTADOS / f"relatorio_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(destino, 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, indent=2, ensure_ascii=False)
+    print(f"\nResultados salvos em: {destino}")
+
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as f:
+            comparar(relatorio, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
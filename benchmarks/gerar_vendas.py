@@ -0,0 +1,70 @@
+"""
+Gerador determinístico de vendas.csv sintético para benchmarks.
+
+Gera arquivos no mesmo formato dos projetos (Cliente, Vendas) com número
+configurável de linhas, clientes e colunas extras. O arquivo é escrito em
+blocos, então 1e8 linhas não exigem memória proporcional ao tamanho.
+A mesma combinação de parâmetros sempre produz o mesmo arquivo.
+
+Uso:
+    python gerar_vendas.py --linhas 1e6 --clientes 50000 --saida dados/vendas_1e6.csv
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+TAMANHO_BLOCO = 1_000_000
+REGIOES = np.array(['Norte', 'Sul', 'Leste', 'Oeste'])
+CATEGORIAS = np.array(['Premium', 'Standard', 'Basic'])
+
+
+def gerar_bloco(inicio, n, clientes, colunas_extras, seed):
+    """Gera `n` linhas a partir da linha `inicio` (determinístico por bloco)."""
+    rng = np.random.default_rng([seed, inicio])
+    ids = rng.integers(0, clientes, n)
+    dados = {
+        'Cliente': np.char.add('Cliente_', ids.astype(str)),
+        'Vendas': np.round(rng.lognormal(mean=7.0, sigma=0.8, size=n), 2),
+    }
+    if colunas_extras >= 1:
+        dados['Regiao'] = REGIOES[ids % len(REGIOES)]
+    if colunas_extras >= 2:
+        dados['Categoria'] = CATEGORIAS[rng.integers(0, len(CATEGORIAS), n)]
+    for i in range(3, colunas_extras + 1):
+        dados[f'Extra_{i}'] = rng.integers(0, 1000, n)
+    return pd.DataFrame(dados)
+
+
+def gerar_vendas(saida, linhas, clientes=1000, colunas_extras=0, seed=42):
+    """Escreve o CSV sintético em `saida` e retorna o caminho."""
+    saida = Path(saida)
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    temp = saida.with_suffix(saida.suffix + '.tmp')
+    with open(temp, 'w', encoding='utf-8', newline='') as f:
+        for inicio in range(0, linhas, TAMANHO_BLOCO):
+            n = min(TAMANHO_BLOCO, linhas - inicio)
+            bloco = gerar_bloco(inicio, n, clientes, colunas_extras, seed)
+            bloco.to_csv(f, header=(inicio == 0), index=False)
+    temp.replace(saida)
+    return saida
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera vendas.csv sintético")
+    parser.add_argument('--linhas', type=float, default=1e4, help="número de linhas (ex.: 1e6)")
+    parser.add_argument('--clientes', type=int, default=1000, help="clientes distintos")
+    parser.add_argument('--colunas-extras', type=int, default=0,
+                        help="colunas além de Cliente/Vendas (Regiao, Categoria, Extra_N...)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--saida', default='vendas.csv')
+    args = parser.parse_args()
+
+    caminho = gerar_vendas(args.saida, int(args.linhas), args.clientes, args.colunas_extras, args.seed)
+    print(f"Arquivo gerado: {caminho} ({caminho.stat().st_size / 1e6:,.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+"""
+Utilitários compartilhados pelos projetos do portfólio.
+
+Cada projeto adiciona a raiz do repositório ao sys.path para importar
+este pacote (ex.: ``from comum.cache_colunar import ler_csv``).
+"""
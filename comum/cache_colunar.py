@@ -0,0 +1,158 @@
+"""
+Cache colunar em disco para CSVs de vendas.
+
+Na primeira leitura o CSV é convertido em um diretório com uma coluna por
+arquivo ``.npy``; colunas de texto são gravadas como categóricas (códigos +
+categorias). Nas leituras seguintes as colunas são abertas com memory-map,
+evitando o parsing do texto.
+
+A chave do cache combina caminho absoluto, tamanho, mtime e um hash do
+conteúdo. Tamanho e mtime iguais bastam para reutilizar o cache; se apenas
+o mtime mudou, o hash é recalculado e o cache só é reconstruído se o
+conteúdo realmente mudou.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+VERSAO_CACHE = 1
+PASTA_CACHE = ".cache_colunar"
+
+
+def hash_arquivo(caminho, tamanho_bloco=1 << 20):
+    """Calcula o hash (BLAKE2b) do conteúdo de um arquivo."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def _pasta_entrada(caminho, opcoes, diretorio_cache):
+    """Diretório do cache para um par (arquivo, opções de leitura)."""
+    base = Path(diretorio_cache) if diretorio_cache else caminho.parent / PASTA_CACHE
+    chave = json.dumps([str(caminho), opcoes], sort_keys=True, default=str)
+    return base / hashlib.sha1(chave.encode('utf-8')).hexdigest()[:20]
+
+
+def _ler_meta(pasta):
+    try:
+        with open(pasta / "meta.json", 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _gravar_meta(pasta, meta):
+    temp = pasta / "meta.json.tmp"
+    with open(temp, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(temp, pasta / "meta.json")
+
+
+def _cacheavel(df):
+    """Só colunas numéricas/booleanas ou de texto puro podem ir para o cache."""
+    for coluna in df.columns:
+        serie = df[coluna]
+        if serie.dtype.kind in 'biuf':
+            continue
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            serie = serie.cat.categories
+        if pd.api.types.infer_dtype(serie, skipna=True) not in ('string', 'empty'):
+            return False
+    return True
+
+
+def _gravar(df, pasta, meta):
+    """Grava as colunas do DataFrame em um diretório temporário e o publica."""
+    pasta.parent.mkdir(parents=True, exist_ok=True)
+    temp = Path(tempfile.mkdtemp(dir=pasta.parent, prefix=".tmp_"))
+    try:
+        colunas = []
+        for i, coluna in enumerate(df.columns):
+            serie = df[coluna]
+            if serie.dtype.kind in 'biuf':
+                np.save(temp / f"{i}.npy", serie.to_numpy())
+                colunas.append({"nome": coluna, "tipo": "numerica"})
+            else:
+                categorica = pd.Categorical(serie)
+                np.save(temp / f"{i}.npy", categorica.codes)
+                categorias = np.asarray(categorica.categories.astype(str), dtype=str)
+                np.save(temp / f"{i}_categorias.npy", categorias)
+                colunas.append({"nome": coluna, "tipo": "categorica"})
+        meta = dict(meta, colunas=colunas, linhas=len(df))
+        _gravar_meta(temp, meta)
+        shutil.rmtree(pasta, ignore_errors=True)
+        os.replace(temp, pasta)
+    except Exception:
+        shutil.rmtree(temp, ignore_errors=True)
+        raise
+
+
+def _carregar(pasta, meta):
+    """Abre as colunas do cache com memory-map (cópia apenas se houver escrita)."""
+    dados = {}
+    for i, coluna in enumerate(meta["colunas"]):
+        valores = np.load(pasta / f"{i}.npy", mmap_mode='c')
+        if coluna["tipo"] == "categorica":
+            categorias = np.load(pasta / f"{i}_categorias.npy")
+            valores = pd.Categorical.from_codes(valores, categories=categorias)
+        dados[coluna["nome"]] = valores
+    return pd.DataFrame(dados, index=pd.RangeIndex(meta["linhas"]), copy=False)
+
+
+def ler_csv(caminho, cache=True, diretorio_cache=None, **opcoes):
+    """Lê um CSV usando o cache colunar quando possível.
+
+    `opcoes` são repassadas ao ``pd.read_csv`` e fazem parte da chave do cache.
+    Colunas de texto retornam como ``category``.
+    """
+    if not cache:
+        return pd.read_csv(caminho, **opcoes)
+
+    caminho = Path(caminho).resolve()
+    info = caminho.stat()
+    pasta = _pasta_entrada(caminho, opcoes, diretorio_cache)
+    meta = _ler_meta(pasta)
+
+    if meta and meta.get("versao") == VERSAO_CACHE and meta["tamanho"] == info.st_size:
+        try:
+            if meta["mtime_ns"] != info.st_mtime_ns:
+                if meta["hash"] != hash_arquivo(caminho):
+                    raise LookupError("conteúdo alterado")
+                meta["mtime_ns"] = info.st_mtime_ns
+                _gravar_meta(pasta, meta)
+            df = _carregar(pasta, meta)
+            logger.debug(f"Cache colunar reutilizado para {caminho}")
+            return df
+        except (LookupError, OSError, ValueError, KeyError):
+            pass
+
+    df = pd.read_csv(caminho, **opcoes)
+    if not _cacheavel(df) or not isinstance(df.index, pd.RangeIndex):
+        return df
+
+    meta = {
+        "versao": VERSAO_CACHE,
+        "arquivo": str(caminho),
+        "tamanho": info.st_size,
+        "mtime_ns": info.st_mtime_ns,
+        "hash": hash_arquivo(caminho)
+    }
+    try:
+        _gravar(df, pasta, meta)
+        logger.debug(f"Cache colunar criado para {caminho}")
+        return _carregar(pasta, _ler_meta(pasta))
+    except OSError as e:
+        logger.warning(f"Não foi possível gravar o cache colunar: {e}")
+        return df
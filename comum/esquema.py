@@ -0,0 +1,156 @@
+"""
+Esquema de colunas declarado no config.json.
+
+Formato (todas as chaves são opcionais):
+
+    "schema": {
+        "dtypes": {"Cliente": "category", "Vendas": "numeric"},
+        "usecols": ["Cliente", "Vendas"],
+        "downcast_inteiros": true
+    }
+
+- ``dtypes``: tipos aplicados pelo ``read_csv`` no momento do parsing. O valor
+  especial ``"numeric"`` não fixa o tipo, apenas exige que a coluna seja numérica.
+- ``usecols``: projeção de colunas (as demais nem chegam a ser materializadas).
+- ``downcast_inteiros``: reduz colunas inteiras ao menor tipo que comporta os valores.
+
+As colunas declaradas em ``dtypes`` são obrigatórias na validação.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+NUMERICO = "numeric"
+# Linhas lidas com os tipos inferidos para medir a memória sem o esquema
+AMOSTRA_MEMORIA = 100_000
+
+
+def carregar_esquema(config_file="config.json"):
+    """Retorna a seção "schema" de um config.json, ou None se não houver."""
+    if not Path(config_file).exists():
+        return None
+    with open(config_file, 'r', encoding='utf-8') as f:
+        return json.load(f).get("schema")
+
+
+def opcoes_leitura(esquema):
+    """Converte o esquema em argumentos para ``pd.read_csv``."""
+    if not esquema:
+        return {}
+    opcoes = {}
+    dtypes = {c: t for c, t in esquema.get("dtypes", {}).items() if t != NUMERICO}
+    if dtypes:
+        opcoes["dtype"] = dtypes
+    if esquema.get("usecols"):
+        opcoes["usecols"] = list(esquema["usecols"])
+    return opcoes
+
+
+def aplicar_esquema(df, esquema):
+    """Aplica as reduções feitas após o parsing (downcast de inteiros)."""
+    if not esquema or not esquema.get("downcast_inteiros"):
+        return df
+    fixos = {c for c, t in esquema.get("dtypes", {}).items() if t != NUMERICO}
+    for coluna in df.columns:
+        if coluna not in fixos and df[coluna].dtype.kind in 'iu':
+            df[coluna] = pd.to_numeric(df[coluna], downcast='integer')
+    return df
+
+
+def validar_esquema(df, esquema, obrigatorias=()):
+    """Lista os erros de estrutura do DataFrame em relação ao esquema."""
+    errors = []
+    dtypes = (esquema or {}).get("dtypes", {})
+    esperadas = list(obrigatorias) + [c for c in dtypes if c not in obrigatorias]
+
+    missing_cols = [c for c in esperadas if c not in df.columns]
+    if missing_cols:
+        errors.append(f"Colunas ausentes: {set(missing_cols)}")
+
+    for coluna, tipo in dtypes.items():
+        if coluna not in df.columns:
+            continue
+        atual = df[coluna].dtype
+        if tipo == NUMERICO:
+            if not pd.api.types.is_numeric_dtype(atual):
+                errors.append(f"Coluna {coluna} deveria ser numérica (encontrado {atual})")
+        elif tipo == "category":
+            if not isinstance(atual, pd.CategoricalDtype):
+                errors.append(f"Coluna {coluna} deveria ser categórica (encontrado {atual})")
+        elif atual != pd.api.types.pandas_dtype(tipo):
+            errors.append(f"Coluna {coluna} deveria ser {tipo} (encontrado {atual})")
+    return errors
+
+
+def memoria(df):
+    """Memória ocupada pelo DataFrame (``memory_usage(deep=True)``), em bytes."""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def medir_memoria_inferida(df, arquivo, amostra=AMOSTRA_MEMORIA):
+    """Memória medida das colunas de `df` lidas de `arquivo` com os tipos inferidos pelo read_csv.
+
+    Lê até `amostra` linhas sem esquema, mede com ``memory_usage(deep=True)``
+    e escala para o número de linhas de `df` (exato se o arquivo cabe na
+    amostra). Colunas que não vêm do arquivo entram com a memória atual.
+    Retorna ``(bytes, linhas lidas)``.
+    """
+    cabecalho = set(pd.read_csv(arquivo, nrows=0).columns)
+    colunas = [c for c in df.columns if c in cabecalho]
+    bruto = pd.read_csv(arquivo, usecols=colunas, nrows=amostra)
+    escala = len(df) / len(bruto) if len(bruto) else 0
+    total = int(bruto.memory_usage(deep=True).sum() * escala)
+    total += sum(int(df[c].memory_usage(deep=True, index=False)) for c in df.columns if c not in cabecalho)
+    return total, len(bruto)
+
+
+def estimar_memoria_inferida(df):
+    """Estima a memória que o DataFrame ocuparia com os tipos inferidos pelo read_csv.
+
+    Inteiros e floats voltam a 8 bytes por valor e categóricas voltam a
+    strings Python (ponteiro + objeto str por linha).
+    """
+    total = int(df.index.memory_usage(deep=True))
+    for coluna in df.columns:
+        serie = df[coluna]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            tamanhos = np.array([sys.getsizeof(c) for c in serie.cat.categories] or [0])
+            codigos = serie.cat.codes.to_numpy()
+            total += 8 * len(serie) + int(tamanhos[codigos[codigos >= 0]].sum())
+        elif serie.dtype.kind in 'iuf':
+            total += 8 * len(serie)
+        else:
+            total += int(serie.memory_usage(deep=True, index=False))
+    return total
+
+
+def formatar_bytes(n):
+    """Formata um tamanho em bytes (B, KB, MB, GB)."""
+    for unidade in ("B", "KB", "MB"):
+        if abs(n) < 1024:
+            return f"{n:,.1f} {unidade}"
+        n /= 1024
+    return f"{n:,.2f} GB"
+
+
+def resumo_memoria(df, arquivo=None, amostra=AMOSTRA_MEMORIA):
+    """Texto com a memória atual e a memória sem o esquema.
+
+    Com `arquivo`, a memória sem esquema é medida (`medir_memoria_inferida`);
+    sem ele, é uma estimativa por tipo (`estimar_memoria_inferida`), e o
+    texto diz qual das duas foi usada.
+    """
+    atual = memoria(df)
+    if arquivo is not None:
+        inferida, lidas = medir_memoria_inferida(df, arquivo, amostra)
+        origem = "medida" if lidas >= len(df) else f"medida em {lidas:,} linhas e escalada"
+    else:
+        inferida, origem = estimar_memoria_inferida(df), "estimada"
+    variacao = (atual / inferida - 1) * 100 if inferida else 0
+    return (f"{formatar_bytes(atual)} (sem esquema, {origem}: ~{formatar_bytes(inferida)}, "
+            f"{variacao:+.0f}%)")
@@ -0,0 +1,164 @@
+"""
+Estatísticas de uma coluna numérica em uma única passada.
+
+Os projetos calculavam soma, média, máximo, mínimo e o registro do maior
+valor com uma chamada do pandas cada (uma leitura completa da coluna por
+métrica, algumas repetidas). `calcular` percorre os valores em blocos que
+cabem no cache do processador e, para cada bloco, obtém todas as métricas
+de uma vez: a coluna é lida da memória uma única vez.
+
+Com `chaves` (região, categoria, segmento...), as mesmas métricas saem por
+grupo, também em uma passada (``np.bincount`` e ``ufunc.at`` por bloco).
+`acima_media` (quantos valores superam a média) depende da média final e
+custa uma segunda passada, feita só quando pedida.
+
+Valores nulos (NaN) são ignorados, como no pandas; `posicao_maximo` é a
+posição (``iloc``) do primeiro registro com o maior valor.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+# 64 Ki valores float64 = 512 KiB por bloco (cabe no cache L2)
+TAMANHO_BLOCO = 1 << 16
+
+
+class Estatisticas:
+    """Resultado de `calcular` para um conjunto (ou grupo) de valores."""
+
+    def __init__(self, contagem=0, soma=0.0, minimo=None, maximo=None, posicao_maximo=None,
+                 acima_media=None):
+        self.contagem = contagem
+        self.soma = soma
+        self.media = soma / contagem if contagem else 0.0
+        self.minimo = minimo
+        self.maximo = maximo
+        self.posicao_maximo = posicao_maximo
+        self.acima_media = acima_media
+
+    def __repr__(self):
+        return (f"Estatisticas(contagem={self.contagem}, soma={self.soma!r}, media={self.media!r}, "
+                f"minimo={self.minimo!r}, maximo={self.maximo!r}, posicao_maximo={self.posicao_maximo})")
+
+    def to_dict(self):
+        return {
+            "contagem": self.contagem,
+            "soma": self.soma,
+            "media": self.media,
+            "minimo": self.minimo,
+            "maximo": self.maximo,
+            "posicao_maximo": self.posicao_maximo,
+            "acima_media": self.acima_media
+        }
+
+
+def _bloco_sem_nulos(bloco):
+    """(soma, máscara dos válidos) de um bloco; máscara None se o bloco não tem NaN (caso comum).
+
+    A soma usada para detectar NaN é devolvida para não somar o bloco de novo
+    (None em blocos inteiros, que não têm nulos, e em blocos com NaN).
+    """
+    if bloco.dtype.kind != 'f':
+        return None, None
+    soma = bloco.sum()
+    if not np.isnan(soma):
+        return soma, None
+    return None, ~np.isnan(bloco)
+
+
+def _calcular_total(valores, acima_media):
+    contagem, somas = 0, []
+    minimo, maximo, posicao = math.inf, -math.inf, None
+    for inicio in range(0, len(valores), TAMANHO_BLOCO):
+        bloco = valores[inicio:inicio + TAMANHO_BLOCO]
+        soma, validos = _bloco_sem_nulos(bloco)
+        if validos is None:
+            n = len(bloco)
+            if soma is None:
+                soma = bloco.sum()
+            i, menor = int(bloco.argmax()), bloco.min()
+        else:
+            n = int(validos.sum())
+            if not n:
+                continue
+            soma, i, menor = np.nansum(bloco), int(np.nanargmax(bloco)), np.nanmin(bloco)
+        contagem += n
+        somas.append(float(soma))
+        minimo = min(minimo, float(menor))
+        if bloco[i] > maximo:
+            maximo, posicao = float(bloco[i]), inicio + i
+
+    if not contagem:
+        return Estatisticas()
+    resultado = Estatisticas(contagem, math.fsum(somas), minimo, maximo, posicao)
+    if acima_media:
+        # NaN > média é falso: nulos não contam
+        resultado.acima_media = int(np.count_nonzero(valores > resultado.media))
+    return resultado
+
+
+def _codificar(chaves):
+    """Códigos inteiros (-1 = chave nula) e rótulos dos grupos."""
+    if isinstance(chaves, pd.Series) and isinstance(chaves.dtype, pd.CategoricalDtype):
+        # Colunas categóricas (ver comum.esquema) já estão codificadas
+        return chaves.cat.codes.to_numpy(dtype=np.intp), list(chaves.cat.categories)
+    codigos, rotulos = pd.factorize(chaves, sort=False)
+    return np.asarray(codigos, dtype=np.intp), list(rotulos)
+
+
+def _calcular_grupos(valores, chaves, acima_media):
+    codigos, rotulos = _codificar(chaves)
+    k = len(rotulos)
+    contagem = np.zeros(k, dtype=np.int64)
+    soma = np.zeros(k)
+    minimo = np.full(k, np.inf)
+    maximo = np.full(k, -np.inf)
+    for inicio in range(0, len(valores), TAMANHO_BLOCO):
+        bloco = valores[inicio:inicio + TAMANHO_BLOCO]
+        grupo = codigos[inicio:inicio + TAMANHO_BLOCO]
+        _, validos = _bloco_sem_nulos(bloco)
+        if validos is not None or grupo.min(initial=0) < 0:
+            validos = (grupo >= 0) if validos is None else validos & (grupo >= 0)
+            bloco, grupo = bloco[validos], grupo[validos]
+        contagem += np.bincount(grupo, minlength=k)
+        soma += np.bincount(grupo, weights=bloco, minlength=k)
+        np.minimum.at(minimo, grupo, bloco)
+        np.maximum.at(maximo, grupo, bloco)
+
+    # Posição do primeiro máximo e, se pedido, valores acima da média do grupo
+    media = np.divide(soma, contagem, out=np.zeros(k), where=contagem > 0)
+    posicao = np.full(k, len(valores), dtype=np.int64)
+    acima = np.zeros(k, dtype=np.int64) if acima_media else None
+    for inicio in range(0, len(valores), TAMANHO_BLOCO):
+        bloco = valores[inicio:inicio + TAMANHO_BLOCO]
+        grupo = codigos[inicio:inicio + TAMANHO_BLOCO]
+        # Com código -1 o índice pega o último grupo; a comparação com o grupo >= 0 descarta
+        indices = np.flatnonzero((bloco == maximo[grupo]) & (grupo >= 0))
+        np.minimum.at(posicao, grupo[indices], indices + inicio)
+        if acima_media:
+            acima += np.bincount(grupo[(bloco > media[grupo]) & (grupo >= 0)], minlength=k)
+
+    return {
+        rotulo: Estatisticas(int(contagem[g]), float(soma[g]), float(minimo[g]), float(maximo[g]),
+                             int(posicao[g]), int(acima[g]) if acima_media else None)
+        for g, rotulo in enumerate(rotulos) if contagem[g]
+    }
+
+
+def calcular(valores, chaves=None, acima_media=False):
+    """Estatísticas de `valores` (Series ou array) em uma passada.
+
+    Sem `chaves`, retorna um `Estatisticas`; com `chaves` (mesmo tamanho),
+    retorna ``{grupo: Estatisticas}`` sem grupos vazios ou chaves nulas,
+    na ordem das categorias (colunas categóricas) ou de aparição.
+    """
+    valores = np.asarray(valores)
+    if valores.dtype.kind not in 'iufb':
+        valores = valores.astype(np.float64)
+    if chaves is None:
+        return _calcular_total(valores, acima_media)
+    if len(chaves) != len(valores):
+        raise ValueError(f"chaves ({len(chaves)}) e valores ({len(valores)}) com tamanhos diferentes")
+    return _calcular_grupos(valores, chaves, acima_media)
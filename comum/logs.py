@@ -0,0 +1,150 @@
+"""
+Logging não bloqueante compartilhado pelos projetos.
+
+`configurar_logging` instala no logger raiz um ``QueueHandler``: o código
+de processamento apenas enfileira o registro e uma thread em segundo plano
+(``QueueListener``) grava no arquivo e no console. Um disco lento deixa de
+atrasar a leitura de dados ou o envio de emails.
+
+Também oferece:
+- limite de mensagens repetitivas: mensagens iguais (desconsiderando
+  números) acima de `limite_repeticoes` por `intervalo_repeticoes` segundos
+  são descartadas e a quantidade suprimida é informada na próxima mensagem
+  que passar. Erros nunca são suprimidos;
+- arquivo de log em JSON Lines (um objeto por linha), para ingestão por
+  ferramentas de observabilidade.
+
+Variáveis de ambiente (sobrepõem os parâmetros): ``LOG_JSON=1``,
+``LOG_LIMITE_REPETICOES`` (0 desativa) e ``LOG_INTERVALO_REPETICOES``.
+"""
+
+import atexit
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+FORMATO = '%(asctime)s - %(levelname)s - %(message)s'
+LIMITE_REPETICOES = 5
+INTERVALO_REPETICOES = 60.0
+
+_listener = None
+_pid = None
+_trava = threading.Lock()
+
+
+class FiltroRepeticoes(logging.Filter):
+    """Limita mensagens repetitivas por janela de tempo (números são ignorados)."""
+
+    NUMEROS = re.compile(r'\d+(?:[.,]\d+)*')
+
+    def __init__(self, limite=LIMITE_REPETICOES, intervalo=INTERVALO_REPETICOES):
+        super().__init__()
+        self.limite = limite
+        self.intervalo = intervalo
+        self.janelas = {}
+        self.trava = threading.Lock()
+
+    def filter(self, record):
+        # O mesmo registro passa por todos os handlers: decide uma única vez
+        decisao = getattr(record, '_repeticao_aceita', None)
+        if decisao is not None:
+            return decisao
+        record._repeticao_aceita = self._decidir(record)
+        return record._repeticao_aceita
+
+    def _decidir(self, record):
+        if record.levelno >= logging.ERROR:
+            return True
+        chave = (record.name, record.levelno, self.NUMEROS.sub('#', record.getMessage()))
+        agora = time.monotonic()
+        with self.trava:
+            inicio, emitidas, suprimidas = self.janelas.get(chave, (agora, 0, 0))
+            if agora - inicio >= self.intervalo:
+                inicio, emitidas = agora, 0
+            if emitidas >= self.limite:
+                self.janelas[chave] = (inicio, emitidas, suprimidas + 1)
+                return False
+            self.janelas[chave] = (inicio, emitidas + 1, 0)
+        if suprimidas:
+            record.msg = f"{record.getMessage()} ({suprimidas} mensagens semelhantes suprimidas)"
+            record.args = None
+        return True
+
+
+class FormatadorJson(logging.Formatter):
+    """Formata cada registro como um objeto JSON em uma linha."""
+
+    def format(self, record):
+        dados = {
+            "timestamp": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensagem": record.getMessage(),
+            "processo": record.process,
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            dados["excecao"] = self.formatException(record.exc_info)
+        return json.dumps(dados, ensure_ascii=False)
+
+
+def _parar():
+    """Esvazia a fila e encerra a thread de escrita (chamado no atexit)."""
+    global _listener
+    if _listener is not None and _pid == os.getpid():
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+    _listener = None
+
+
+def configurar_logging(arquivo_log, nivel=logging.INFO, console=True, json_linhas=False,
+                       limite_repeticoes=LIMITE_REPETICOES, intervalo_repeticoes=INTERVALO_REPETICOES):
+    """Configura o logger raiz com fila e thread de escrita; retorna o logger raiz.
+
+    Chamadas repetidas no mesmo processo reaproveitam a configuração. Em
+    processos filhos (ex.: ProcessPoolExecutor) os handlers são síncronos,
+    pois esses processos terminam sem executar o atexit que esvazia a fila.
+    """
+    global _listener, _pid
+    json_linhas = os.getenv('LOG_JSON', '1' if json_linhas else '0') == '1'
+    limite_repeticoes = int(os.getenv('LOG_LIMITE_REPETICOES', limite_repeticoes))
+    intervalo_repeticoes = float(os.getenv('LOG_INTERVALO_REPETICOES', intervalo_repeticoes))
+
+    raiz = logging.getLogger()
+    with _trava:
+        if _pid == os.getpid():
+            return raiz
+
+        handlers = [logging.FileHandler(arquivo_log, encoding='utf-8')]
+        handlers[0].setFormatter(FormatadorJson() if json_linhas else logging.Formatter(FORMATO))
+        if console:
+            handlers.append(logging.StreamHandler(sys.stdout))
+            handlers[-1].setFormatter(logging.Formatter(FORMATO))
+
+        for antigo in raiz.handlers[:]:
+            raiz.removeHandler(antigo)
+        raiz.setLevel(nivel)
+
+        if multiprocessing.parent_process() is None:
+            fila = queue.SimpleQueue()
+            _listener = QueueListener(fila, *handlers, respect_handler_level=True)
+            _listener.start()
+            handlers = [QueueHandler(fila)]
+            atexit.register(_parar)
+
+        filtro = FiltroRepeticoes(limite_repeticoes, intervalo_repeticoes)
+        for handler in handlers:
+            if limite_repeticoes > 0:
+                handler.addFilter(filtro)
+            raiz.addHandler(handler)
+        _pid = os.getpid()
+    return raiz
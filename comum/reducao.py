@@ -0,0 +1,88 @@
+"""
+Redução de dados para gráficos.
+
+Gráficos com uma barra, fatia ou rótulo por linha ficam ilegíveis e lentos
+com dezenas de milhares de clientes. Estas funções reduzem os dados à
+resolução do gráfico antes de desenhar:
+
+- `top_n`: mantém as N categorias de maior valor e agrega o restante em
+  "Outros" (barras e pizzas). Com até N categorias nada é agrupado e a
+  ordem original é preservada.
+- `lttb`: Largest-Triangle-Three-Buckets, que escolhe `alvo` pontos de uma
+  série preservando picos e vales (linhas/séries temporais).
+
+O custo de desenhar passa a depender de N/`alvo`, não do número de linhas.
+"""
+
+import numpy as np
+import pandas as pd
+
+ROTULO_OUTROS = "Outros"
+TOP_N = 15
+PONTOS_SERIE = 500
+
+
+def top_n(df, categoria, valor, n=TOP_N, subgrupo=None, rotulo_outros=ROTULO_OUTROS):
+    """Soma `valor` por `categoria` (e `subgrupo`), mantendo as N maiores + "Outros".
+
+    Retorna um DataFrame com as colunas de agrupamento e `valor`; as
+    categorias mantidas vêm em ordem decrescente de total e "Outros" por último.
+    """
+    chaves = [categoria] + ([subgrupo] if subgrupo else [])
+    grupos = df.groupby(chaves, observed=True, sort=False)[valor].sum().reset_index()
+    grupos[categoria] = grupos[categoria].astype(object)
+    totais = grupos.groupby(categoria, sort=False)[valor].sum()
+    if len(totais) <= n:
+        return grupos
+
+    manter = totais.nlargest(n)
+    grupos.loc[~grupos[categoria].isin(manter.index), categoria] = rotulo_outros
+    grupos = grupos.groupby(chaves, observed=True, sort=False)[valor].sum().reset_index()
+    ordem = {nome: i for i, nome in enumerate(manter.index)}
+    posicao = grupos[categoria].map(ordem).fillna(len(ordem))
+    return grupos.iloc[np.argsort(posicao.to_numpy(), kind='stable')].reset_index(drop=True)
+
+
+def _numerico(valores):
+    """Converte datas para inteiros (ns) e o restante para float."""
+    valores = pd.Series(valores)
+    if pd.api.types.is_datetime64_any_dtype(valores):
+        return valores.astype('int64').to_numpy(dtype=np.float64)
+    return valores.to_numpy(dtype=np.float64)
+
+
+def lttb(x, y, alvo=PONTOS_SERIE):
+    """Índices dos `alvo` pontos escolhidos pelo LTTB (x crescente, sem nulos)."""
+    n = len(y)
+    if alvo >= n or alvo < 3:
+        return np.arange(n)
+    x, y = _numerico(x), _numerico(y)
+
+    # Primeiro e último pontos fixos; o miolo é dividido em alvo - 2 baldes
+    limites = (np.floor(np.arange(alvo - 1) * (n - 2) / (alvo - 2)) + 1).astype(np.int64)
+    limites[-1] = n - 1
+    somas_x = np.add.reduceat(x[:-1], limites[:-1])
+    somas_y = np.add.reduceat(y[:-1], limites[:-1])
+    tamanhos = np.diff(limites)
+
+    indices = np.empty(alvo, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    anterior = 0
+    for i in range(alvo - 2):
+        inicio, fim = limites[i], limites[i + 1]
+        if i + 1 < alvo - 2:
+            media_x = somas_x[i + 1] / tamanhos[i + 1]
+            media_y = somas_y[i + 1] / tamanhos[i + 1]
+        else:
+            media_x, media_y = x[-1], y[-1]
+        ax, ay = x[anterior], y[anterior]
+        areas = np.abs((ax - media_x) * (y[inicio:fim] - ay) - (ax - x[inicio:fim]) * (media_y - ay))
+        anterior = inicio + int(np.argmax(areas))
+        indices[i + 1] = anterior
+    return indices
+
+
+def reduzir_serie(df, x, y, alvo=PONTOS_SERIE):
+    """Linhas de `df` escolhidas pelo LTTB sobre as colunas `x` (ordenada) e `y`."""
+    df = df.dropna(subset=[x, y])
+    return df.iloc[lttb(df[x], df[y], alvo)]
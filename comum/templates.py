@@ -0,0 +1,79 @@
+"""
+Templates HTML pré-compilados e em cache.
+
+Sintaxe dos arquivos de template:
+
+- ``{{ campo }}``: valor do contexto; strings são escapadas para HTML;
+- ``{{ campo:formato }}``: com especificação de formato (``{{ total:,.2f }}``);
+- ``{{ campo|raw }}``: sem escape, para fragmentos HTML já montados.
+
+Cada arquivo é lido e compilado uma única vez por processo (e novamente
+só se o mtime mudar). A compilação transforma o template em uma string de
+formato em que o texto estático (cabeçalho, CSS) já está pronto e os campos
+são posições; renderizar é uma única chamada a ``str.format`` com os
+valores do contexto. `Template.renderizar_lote` renderiza N contextos de
+uma vez (um email por destinatário/segmento).
+"""
+
+import html
+import os
+import re
+from functools import lru_cache
+from operator import itemgetter
+from pathlib import Path
+
+CAMPO = re.compile(r"\{\{\s*(\w+)\s*(?::([^|}]*?))?\s*(\|\s*raw)?\s*\}\}")
+
+
+class Template:
+    """Template compilado para uma string de formato posicional."""
+
+    def __init__(self, texto, nome="<texto>"):
+        self.nome = nome
+        partes, campos, posicao = [], [], 0
+        for campo in CAMPO.finditer(texto):
+            partes.append(texto[posicao:campo.start()].replace("{", "{{").replace("}", "}}"))
+            formato = campo.group(2)
+            partes.append(f"{{{len(campos)}{':' + formato if formato else ''}}}")
+            campos.append((campo.group(1), bool(campo.group(3))))
+            posicao = campo.end()
+        partes.append(texto[posicao:].replace("{", "{{").replace("}", "}}"))
+
+        self.formato = "".join(partes)
+        self.campos = [nome for nome, _ in campos]
+        self.escapar = [not raw for _, raw in campos]
+        # Template sem campos: o texto é o próprio resultado
+        self.estatico = texto if not campos else None
+        self._valores = itemgetter(*self.campos) if len(self.campos) > 1 else None
+
+    def _valores_de(self, contexto):
+        try:
+            valores = self._valores(contexto) if self._valores else (contexto[self.campos[0]],)
+        except KeyError as e:
+            raise KeyError(f"Campo {e} ausente no contexto do template {self.nome}") from None
+        return [html.escape(v) if escapar and isinstance(v, str) else v
+                for v, escapar in zip(valores, self.escapar)]
+
+    def renderizar(self, contexto=None):
+        """Renderiza um contexto (mapeamento campo → valor)."""
+        if self.estatico is not None:
+            return self.estatico
+        return self.formato.format(*self._valores_de(contexto))
+
+    def renderizar_lote(self, contextos):
+        """Renderiza vários contextos; resultados na ordem de entrada."""
+        if self.estatico is not None:
+            return [self.estatico] * len(contextos)
+        formato = self.formato.format
+        return [formato(*self._valores_de(contexto)) for contexto in contextos]
+
+
+@lru_cache(maxsize=64)
+def _compilar(caminho, mtime_ns):
+    return Template(Path(caminho).read_text(encoding="utf-8"), Path(caminho).name)
+
+
+def carregar_template(caminho):
+    """Template do arquivo, compilado uma vez (recompilado se o arquivo mudar)."""
+    caminho = os.fspath(caminho)
+    return _compilar(caminho, os.stat(caminho).st_mtime_ns)
@@ -0,0 +1,276 @@
+"""
+Agregados incrementais para o Relatório de Vendas.
+
+Permite calcular total, média, máximo e mínimo de uma coluna numérica
+bloco a bloco (leitura em chunks), sem manter o dataset inteiro em memória.
+A soma é mantida de forma exata, então o resultado não depende do tamanho
+dos blocos e coincide com o processamento em memória. Quantis e clientes
+distintos vêm de esboços combináveis (ver `esbocos`), com erro limitado.
+A soma exata de cada bloco é vetorizada (`_soma_exata`); `math.fsum` fica
+só para os poucos termos parciais acumulados.
+"""
+
+import math
+from fractions import Fraction
+
+import numpy as np
+
+from esbocos import QUANTIS_RELATORIO, EsbocoDistintos, EsbocoQuantis
+
+REGRA_PADRAO = "filtrado"
+# Valores por np.bincount em _soma_exata: mantém cada soma de metades de
+# mantissa (< 2^27) abaixo de 2^53, onde o float64 ainda é exato
+BLOCO_SOMA = 1 << 24
+
+
+def _decompor_soma(valores):
+    """Retorna floats não sobrepostos cuja soma exata é a soma exata de `valores`."""
+    valores = list(valores)
+    termos = []
+    while True:
+        residuo = math.fsum(valores + [-t for t in termos])
+        if residuo == 0 or not math.isfinite(residuo):
+            if residuo != 0:
+                termos.append(residuo)
+            return termos
+        termos.append(residuo)
+
+
+def _soma_exata(valores):
+    """Como `_decompor_soma`, para um array de floats finitos, sem laço por valor.
+
+    Cada valor é mantissa inteira (53 bits) × 2^expoente (`np.frexp`); as
+    mantissas, em duas metades, são somadas por expoente com `np.bincount`
+    e combinadas em um inteiro Python, que é convertido de volta em floats.
+    """
+    mantissas, expoentes = np.frexp(valores)
+    inteiros = np.ldexp(mantissas, 53).astype(np.int64)
+    menor = int(expoentes.min())
+    # Índices intp e pesos float64 evitam conversões dentro de cada np.bincount
+    deslocamentos = (expoentes - menor).astype(np.intp)
+    metades = (((inteiros >> 26).astype(np.float64), 26),
+               ((inteiros & ((1 << 26) - 1)).astype(np.float64), 0))
+
+    total = 0
+    for inicio in range(0, len(valores), BLOCO_SOMA):
+        bloco = slice(inicio, inicio + BLOCO_SOMA)
+        for metade, escala in metades:
+            somas = np.bincount(deslocamentos[bloco], weights=metade[bloco])
+            for deslocamento in np.flatnonzero(somas):
+                total += int(somas[deslocamento]) << (int(deslocamento) + escala)
+
+    exato = Fraction(total) * Fraction(2) ** (menor - 53)
+    termos = []
+    while exato:
+        termo = float(exato)
+        termos.append(termo)
+        exato -= Fraction(termo)
+    return termos
+
+
+class AcumuladorVendas:
+    """Mantém contagem, soma exata, mínimo, máximo e quantis de uma série numérica."""
+
+    LIMITE_PARCIAIS = 64
+
+    def __init__(self):
+        self.contagem = 0
+        self.soma_inteira = 0
+        self.parciais = []
+        self.minimo = None
+        self.maximo = None
+        self.quantis = EsbocoQuantis()
+
+    def add(self, serie):
+        """Acumula os valores não nulos de uma Series (ou array) numérica."""
+        valores = np.asarray(serie)
+        if valores.dtype.kind not in 'iufb':
+            valores = valores.astype(np.float64)
+        if valores.dtype.kind == 'f':
+            validos = ~np.isnan(valores)
+            if not validos.all():
+                valores = valores[validos]
+        if not valores.size:
+            return self
+        menor, maior = float(valores.min()), float(valores.max())
+
+        if valores.dtype.kind in 'iub':
+            self.soma_inteira += int(valores.sum(dtype=np.int64))
+        else:
+            finitos = math.isfinite(menor) and math.isfinite(maior)
+            self.parciais.extend(_soma_exata(valores) if finitos else _decompor_soma(valores.tolist()))
+            self._compactar()
+
+        self.contagem += valores.size
+        self.quantis.add(valores)
+        self.minimo = menor if self.minimo is None else min(self.minimo, menor)
+        self.maximo = maior if self.maximo is None else max(self.maximo, maior)
+        return self
+
+    def merge(self, outro):
+        """Incorpora os agregados de outro acumulador (resultado exato)."""
+        self.contagem += outro.contagem
+        self.soma_inteira += outro.soma_inteira
+        self.parciais.extend(outro.parciais)
+        self._compactar()
+        self.quantis.merge(outro.quantis)
+        for atributo, escolher in (('minimo', min), ('maximo', max)):
+            valor = getattr(outro, atributo)
+            if valor is not None:
+                atual = getattr(self, atributo)
+                setattr(self, atributo, valor if atual is None else escolher(atual, valor))
+        return self
+
+    def _compactar(self):
+        """Evita que a lista de parciais cresça indefinidamente."""
+        if len(self.parciais) > self.LIMITE_PARCIAIS:
+            self.parciais = _decompor_soma(self.parciais)
+
+    @property
+    def total(self):
+        alto = float(self.soma_inteira)
+        baixo = float(self.soma_inteira - int(alto)) if math.isfinite(alto) else 0.0
+        return math.fsum(self.parciais + [alto, baixo])
+
+    @property
+    def media(self):
+        return self.total / self.contagem if self.contagem else 0
+
+    def to_state(self):
+        """Estado serializável em JSON (soma exata preservada)."""
+        return {
+            "contagem": self.contagem,
+            "soma_inteira": str(self.soma_inteira),
+            "parciais": [float.hex(p) for p in self.parciais],
+            "minimo": self.minimo,
+            "maximo": self.maximo,
+            "quantis": self.quantis.to_state()
+        }
+
+    @classmethod
+    def from_state(cls, estado):
+        """Recria o acumulador a partir de `to_state`."""
+        acumulador = cls()
+        acumulador.contagem = estado["contagem"]
+        acumulador.soma_inteira = int(estado["soma_inteira"])
+        acumulador.parciais = [float.fromhex(p) for p in estado["parciais"]]
+        acumulador.minimo = estado["minimo"]
+        acumulador.maximo = estado["maximo"]
+        acumulador.quantis = EsbocoQuantis.from_state(estado["quantis"])
+        return acumulador
+
+    def to_dict(self):
+        """Resumo no formato usado em relatorio_estatisticas.json."""
+        quantis = dict(zip(QUANTIS_RELATORIO, self.quantis.quantis(QUANTIS_RELATORIO.values())))
+        if not self.contagem:
+            return {"total": 0, "media": 0, "maximo": 0, "minimo": 0, "quantis": quantis}
+        return {
+            "total": float(self.total),
+            "media": float(self.media),
+            "maximo": float(self.maximo),
+            "minimo": float(self.minimo),
+            "quantis": quantis
+        }
+
+
+def _add_distintos(esboco, df, coluna):
+    """Acumula a coluna de clientes, se ela existir no DataFrame."""
+    if coluna in df.columns:
+        esboco.add(df[coluna])
+
+
+class ResultadoRegra:
+    """Registros, agregados de Vendas e clientes distintos de uma partição (regra)."""
+
+    def __init__(self, n=0, vendas=None, clientes=None):
+        self.n = n
+        self.vendas = vendas or AcumuladorVendas()
+        self.clientes = clientes or EsbocoDistintos()
+
+    def add(self, df, coluna="Vendas", coluna_clientes="Cliente"):
+        self.n += len(df)
+        self.vendas.add(df[coluna])
+        _add_distintos(self.clientes, df, coluna_clientes)
+        return self
+
+    def merge(self, outro):
+        self.n += outro.n
+        self.vendas.merge(outro.vendas)
+        self.clientes.merge(outro.clientes)
+        return self
+
+    def to_state(self):
+        return {"n": self.n, "vendas": self.vendas.to_state(), "clientes": self.clientes.to_state()}
+
+    @classmethod
+    def from_state(cls, estado):
+        return cls(estado["n"], AcumuladorVendas.from_state(estado["vendas"]),
+                   EsbocoDistintos.from_state(estado["clientes"]))
+
+
+class ResultadoParcial:
+    """Estatísticas parciais de um arquivo (ou bloco), combináveis com `merge`.
+
+    Guarda os agregados do conjunto original e de cada regra de filtragem;
+    a regra padrão (Vendas > valor_minimo) fica em `REGRA_PADRAO`.
+    """
+
+    def __init__(self, n_original=0, original=None, regras=None, clientes=None):
+        self.n_original = n_original
+        self.original = original or AcumuladorVendas()
+        self.regras = regras or {}
+        self.clientes = clientes or EsbocoDistintos()
+
+    @property
+    def n_filtrado(self):
+        return self.regra(REGRA_PADRAO).n
+
+    @property
+    def filtrado(self):
+        return self.regra(REGRA_PADRAO).vendas
+
+    def regra(self, nome):
+        """Resultado de uma regra (criado vazio se ainda não existir)."""
+        return self.regras.setdefault(nome, ResultadoRegra())
+
+    @classmethod
+    def from_frames(cls, df_original, df_filtrado, coluna="Vendas"):
+        """Cria o resultado a partir dos DataFrames original e filtrado."""
+        return cls().add(df_original, {REGRA_PADRAO: df_filtrado}, coluna)
+
+    def add(self, df_original, partes, coluna="Vendas", coluna_clientes="Cliente"):
+        """Acumula mais um bloco e suas partições {nome da regra: DataFrame}."""
+        self.n_original += len(df_original)
+        self.original.add(df_original[coluna])
+        _add_distintos(self.clientes, df_original, coluna_clientes)
+        for nome, df in partes.items():
+            self.regra(nome).add(df, coluna, coluna_clientes)
+        return self
+
+    def to_state(self):
+        """Estado serializável em JSON."""
+        return {
+            "n_original": self.n_original,
+            "original": self.original.to_state(),
+            "regras": {nome: r.to_state() for nome, r in self.regras.items()},
+            "clientes": self.clientes.to_state()
+        }
+
+    @classmethod
+    def from_state(cls, estado):
+        """Recria o resultado a partir de `to_state`."""
+        return cls(
+            estado["n_original"],
+            AcumuladorVendas.from_state(estado["original"]),
+            {nome: ResultadoRegra.from_state(r) for nome, r in estado["regras"].items()},
+            EsbocoDistintos.from_state(estado["clientes"])
+        )
+
+    def merge(self, outro):
+        """Combina com o resultado parcial de outro arquivo."""
+        self.n_original += outro.n_original
+        self.original.merge(outro.original)
+        self.clientes.merge(outro.clientes)
+        for nome, r in outro.regras.items():
+            self.regra(nome).merge(r)
+        return self
@@ -0,0 +1,121 @@
+"""
+Instrumentação por etapa do Relatório de Vendas.
+
+Cada etapa de `RelatorioVendas.run()` é medida com tempo de parede, tempo
+de CPU, linhas de entrada/saída, bytes lidos/escritos, pico de RSS e,
+opcionalmente, o pico de alocações do tracemalloc. Quando desativado, o
+coletor devolve sempre o mesmo objeto nulo, sem medir nada.
+"""
+
+import json
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def rss_pico_mb():
+    """Pico de memória residente do processo em MB (None se indisponível)."""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em KiB no Linux e em bytes no macOS
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+class _EtapaNula:
+    """Etapa usada com a coleta desativada: todas as operações são no-op."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def registrar(self, **valores):
+        pass
+
+
+ETAPA_NULA = _EtapaNula()
+
+
+class Etapa:
+    """Medição de uma etapa; campos extras são informados via `registrar`."""
+
+    def __init__(self, coletor, nome, linhas_entrada):
+        self.coletor = coletor
+        self.dados = {"etapa": nome, "linhas_entrada": linhas_entrada}
+
+    def registrar(self, **valores):
+        """Registra linhas_saida, bytes_lidos, bytes_escritos etc. (bytes são somados)."""
+        for chave, valor in valores.items():
+            if chave.startswith("bytes_"):
+                valor += self.dados.get(chave, 0)
+            self.dados[chave] = valor
+
+    def __enter__(self):
+        self.coletor.atual = self
+        self.rss_inicio = rss_pico_mb()
+        if self.coletor.usar_tracemalloc:
+            tracemalloc.reset_peak()
+            self.memoria_inicio = tracemalloc.get_traced_memory()[0]
+        self.inicio_cpu = time.process_time()
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        tempo = time.perf_counter() - self.inicio
+        self.dados["tempo_s"] = round(tempo, 6)
+        self.dados["cpu_s"] = round(time.process_time() - self.inicio_cpu, 6)
+        rss = rss_pico_mb()
+        if rss is not None:
+            self.dados["rss_pico_mb"] = round(rss, 1)
+            self.dados["rss_pico_delta_mb"] = round(rss - self.rss_inicio, 1)
+        if self.coletor.usar_tracemalloc:
+            pico = tracemalloc.get_traced_memory()[1]
+            self.dados["tracemalloc_pico_delta_mb"] = round((pico - self.memoria_inicio) / 1e6, 3)
+        self.coletor.etapas.append(self.dados)
+        self.coletor.atual = ETAPA_NULA
+        return False
+
+
+class ColetorMetricas:
+    """Coleta as medições das etapas de uma execução."""
+
+    def __init__(self, ativo=True, usar_tracemalloc=False):
+        self.ativo = ativo
+        self.usar_tracemalloc = ativo and usar_tracemalloc
+        self.etapas = []
+        self.atual = ETAPA_NULA
+        if self.usar_tracemalloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def etapa(self, nome, linhas_entrada=None):
+        """Context manager que mede uma etapa (ETAPA_NULA se desativado)."""
+        if not self.ativo:
+            return ETAPA_NULA
+        return Etapa(self, nome, linhas_entrada)
+
+    def registrar(self, **valores):
+        """Registra valores na etapa em andamento (no-op fora de uma etapa)."""
+        self.atual.registrar(**valores)
+
+    def to_dict(self):
+        """Seção "performance" do relatorio_estatisticas.json."""
+        return {
+            "etapas": self.etapas,
+            "tempo_total_s": round(sum(e["tempo_s"] for e in self.etapas), 6),
+            "cpu_total_s": round(sum(e["cpu_s"] for e in self.etapas), 6),
+            "rss_pico_mb": round(rss_pico_mb(), 1) if resource else None,
+        }
+
+    def salvar(self, arquivo):
+        """Anexa as métricas desta execução a um arquivo JSON Lines."""
+        registro = dict(self.to_dict(), timestamp=datetime.now().isoformat(timespec="seconds"))
+        with open(arquivo, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
@@ -0,0 +1,111 @@
+"""
+Regras de filtragem nomeadas para o Relatório de Vendas.
+
+Cada regra do config.json tem um nome, um arquivo de saída e um filtro:
+
+    {"nome": "premium", "arquivo_saida": "vendas_premium.csv",
+     "filtro": {"coluna": "Vendas", "op": ">=", "valor": 5000}}
+
+Filtros simples usam ``coluna``/``op``/``valor`` com os operadores
+``>``, ``>=``, ``<``, ``<=``, ``==``, ``!=``, ``entre`` ([min, max], inclusivo),
+``em`` e ``fora`` (listas de valores). Filtros podem ser combinados com
+``{"todas": [...]}`` (E), ``{"alguma": [...]}`` (OU) e ``{"nao": {...}}``.
+
+Todas as regras são avaliadas como máscaras vetorizadas sobre o mesmo
+DataFrame (ou bloco); filtros simples repetidos entre regras são
+calculados uma única vez.
+"""
+
+import json
+
+import numpy as np
+
+from agregados import REGRA_PADRAO
+
+OPERADORES = {
+    ">": lambda s, v: s > v,
+    ">=": lambda s, v: s >= v,
+    "<": lambda s, v: s < v,
+    "<=": lambda s, v: s <= v,
+    "==": lambda s, v: s == v,
+    "!=": lambda s, v: s != v,
+    "entre": lambda s, v: s.between(v[0], v[1]),
+    "em": lambda s, v: s.isin(v),
+    "fora": lambda s, v: ~s.isin(v),
+}
+
+
+def validar_filtro(filtro, nome):
+    """Verifica a estrutura de um filtro, levantando ValueError se inválido."""
+    if not isinstance(filtro, dict):
+        raise ValueError(f"Regra {nome}: filtro deve ser um objeto JSON")
+    if "todas" in filtro or "alguma" in filtro:
+        filhos = filtro.get("todas", filtro.get("alguma"))
+        if not isinstance(filhos, list) or not filhos:
+            raise ValueError(f"Regra {nome}: 'todas'/'alguma' exige uma lista não vazia")
+        for filho in filhos:
+            validar_filtro(filho, nome)
+    elif "nao" in filtro:
+        validar_filtro(filtro["nao"], nome)
+    else:
+        if "coluna" not in filtro or "valor" not in filtro:
+            raise ValueError(f"Regra {nome}: filtro precisa de 'coluna' e 'valor'")
+        if filtro.get("op") not in OPERADORES:
+            raise ValueError(f"Regra {nome}: operador inválido {filtro.get('op')!r}")
+        if filtro["op"] == "entre" and len(filtro["valor"]) != 2:
+            raise ValueError(f"Regra {nome}: 'entre' exige [mínimo, máximo]")
+
+
+def _avaliar(filtro, df, memo):
+    """Avalia um filtro sobre o DataFrame, reaproveitando folhas já calculadas."""
+    if "todas" in filtro:
+        return np.logical_and.reduce([_avaliar(f, df, memo) for f in filtro["todas"]])
+    if "alguma" in filtro:
+        return np.logical_or.reduce([_avaliar(f, df, memo) for f in filtro["alguma"]])
+    if "nao" in filtro:
+        return ~_avaliar(filtro["nao"], df, memo)
+
+    chave = json.dumps(filtro, sort_keys=True, default=str)
+    if chave not in memo:
+        coluna = filtro["coluna"]
+        if coluna not in df.columns:
+            raise ValueError(f"Coluna {coluna} usada em regra não existe nos dados")
+        mascara = OPERADORES[filtro["op"]](df[coluna], filtro["valor"])
+        memo[chave] = mascara.to_numpy(dtype=bool, na_value=False)
+    return memo[chave]
+
+
+class Regra:
+    """Filtro nomeado com seu próprio arquivo de saída."""
+
+    def __init__(self, nome, filtro, arquivo_saida):
+        validar_filtro(filtro, nome)
+        self.nome = nome
+        self.filtro = filtro
+        self.arquivo_saida = arquivo_saida
+
+    def to_dict(self):
+        return {"nome": self.nome, "filtro": self.filtro, "arquivo_saida": self.arquivo_saida}
+
+
+def carregar_regras(config):
+    """Cria a regra padrão (Vendas > valor_minimo) seguida das regras do config."""
+    regras = [Regra(
+        REGRA_PADRAO,
+        {"coluna": "Vendas", "op": ">", "valor": config["valor_minimo"]},
+        config["arquivo_saida"]
+    )]
+    for spec in config.get("regras", []):
+        nome = spec.get("nome")
+        if not nome or nome in {r.nome for r in regras}:
+            raise ValueError(f"Regra sem nome ou com nome repetido: {nome!r}")
+        if "arquivo_saida" not in spec:
+            raise ValueError(f"Regra {nome}: 'arquivo_saida' é obrigatório")
+        regras.append(Regra(nome, spec.get("filtro"), spec["arquivo_saida"]))
+    return regras
+
+
+def avaliar_regras(regras, df):
+    """Retorna {nome: máscara booleana} para todas as regras em uma passada."""
+    memo = {}
+    return {regra.nome: _avaliar(regra.filtro, df, memo) for regra in regras}
@@ -9,31 +9,81 @@ Funcionalidades:
 - Geração de relatórios detalhados
 - Logging completo de operações
 - Tratamento robusto de erros
+- Modo streaming (chunk_size) com memória limitada
+- Processamento paralelo de múltiplos arquivos (glob ou lista)
+- Modo incremental para arquivos append-only (watermark persistido)
+- Regras nomeadas de filtragem, cada uma com sua saída e estatísticas
+- Métricas de desempenho por etapa (seção "performance" das estatísticas)
 """
 
 import pandas as pd
+import hashlib
+import io
 import json
 import logging
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from glob import glob
 from pathlib import Path
 import sys
 
+# Raiz do repositório no path para os módulos compartilhados (comum/); os módulos
+# do projeto importados abaixo dependem disso e não repetem a configuração
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from agregados import REGRA_PADRAO, ResultadoParcial
+from metricas import ColetorMetricas
+from regras import avaliar_regras, carregar_regras
+
+from comum.cache_colunar import ler_csv
+from comum.esquema import aplicar_esquema, opcoes_leitura, resumo_memoria, validar_esquema
+from comum.logs import configurar_logging
+
+
+def _processar_arquivo(config, arquivo, saidas):
+    """Processa um arquivo em um processo do pool e retorna o resultado parcial."""
+    relatorio = RelatorioVendas(config=config)
+    return relatorio.process_file(arquivo, saidas)
+
+
+class _LeitorTrecho(io.RawIOBase):
+    """Expõe apenas `restante` bytes de um arquivo já posicionado (para o read_csv)."""
+    
+    def __init__(self, arquivo, restante):
+        self.arquivo = arquivo
+        self.restante = restante
+        
+    def readable(self):
+        return True
+        
+    def readinto(self, buffer):
+        n = min(len(buffer), self.restante)
+        dados = self.arquivo.read(n)
+        buffer[:len(dados)] = dados
+        self.restante -= len(dados)
+        return len(dados)
+
+
 class RelatorioVendas:
-    def __init__(self, config_file="config.json"):
+    ARQUIVO_ESTADO = "relatorio_estado.json"
+    VERSAO_ESTADO = 3
+    TAMANHO_HASH = 65536
+    
+    def __init__(self, config_file="config.json", config=None):
         """Inicializa o gerador de relatórios com configurações."""
         self.setup_logging()
-        self.config = self.load_config(config_file)
+        self.config = config if config is not None else self.load_config(config_file)
+        self.esquema = self.config.get("schema")
+        self.regras = carregar_regras(self.config)
+        # Coleta desativada fora de run() (ex.: processos do pool)
+        self.metricas = ColetorMetricas(ativo=False)
         
     def setup_logging(self):
-        """Configura sistema de logging."""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler('relatorio_vendas.log'),
-                logging.StreamHandler(sys.stdout)
-            ]
-        )
+        """Configura sistema de logging (fila com thread de escrita, ver comum.logs)."""
+        configurar_logging('relatorio_vendas.log')
         self.logger = logging.getLogger(__name__)
         
     def load_config(self, config_file):
@@ -51,7 +101,19 @@ class RelatorioVendas:
                     "arquivo_saida": "vendas_filtradas.csv",
                     "valor_minimo": 1000,
                     "colunas_obrigatorias": ["Cliente", "Vendas"],
-                    "formato_data": "%Y-%m-%d %H:%M:%S"
+                    "formato_data": "%Y-%m-%d %H:%M:%S",
+                    "chunk_size": None,
+                    "saida_por_arquivo": False,
+                    "workers": None,
+                    "cache_colunar": True,
+                    "incremental": False,
+                    "schema": {
+                        "dtypes": {"Cliente": "category", "Vendas": "numeric"},
+                        "usecols": None,
+                        "downcast_inteiros": True
+                    },
+                    "regras": [],
+                    "metricas": {"ativo": True, "tracemalloc": False, "arquivo": None}
                 }
                 self.save_config(default_config, config_file)
                 self.logger.info(f"Arquivo de configuração criado: {config_file}")
@@ -65,14 +127,10 @@ class RelatorioVendas:
         with open(config_file, 'w', encoding='utf-8') as f:
             json.dump(config, f, indent=4, ensure_ascii=False)
             
-    def validate_data(self, df):
-        """Valida estrutura e qualidade dos dados."""
-        errors = []
-        
-        # Verifica colunas obrigatórias
-        missing_cols = set(self.config["colunas_obrigatorias"]) - set(df.columns)
-        if missing_cols:
-            errors.append(f"Colunas ausentes: {missing_cols}")
+    def check_data(self, df):
+        """Retorna (erros, duplicatas) encontrados em um DataFrame ou bloco."""
+        # Verifica colunas obrigatórias e tipos declarados no esquema
+        errors = validar_esquema(df, self.esquema, self.config["colunas_obrigatorias"])
             
         # Verifica dados vazios
         if df.empty:
@@ -83,7 +141,12 @@ class RelatorioVendas:
             errors.append("Encontrados valores negativos na coluna Vendas")
             
         # Verifica duplicatas
-        duplicates = df.duplicated().sum()
+        duplicates = int(df.duplicated().sum())
+        return errors, duplicates
+        
+    def validate_data(self, df):
+        """Valida estrutura e qualidade dos dados."""
+        errors, duplicates = self.check_data(df)
         if duplicates > 0:
             self.logger.warning(f"Encontradas {duplicates} linhas duplicadas")
             
@@ -93,73 +156,436 @@ class RelatorioVendas:
         self.logger.info("Validação de dados concluída com sucesso")
         return True
         
-    def load_data(self):
+    def load_data(self, arquivo=None, validar=True):
         """Carrega dados do arquivo CSV com validação."""
         try:
-            arquivo = self.config["arquivo_entrada"]
+            arquivo = arquivo or self.config["arquivo_entrada"]
             if not Path(arquivo).exists():
                 raise FileNotFoundError(f"Arquivo não encontrado: {arquivo}")
                 
-            df = pd.read_csv(arquivo)
+            df = ler_csv(arquivo, cache=self.config.get("cache_colunar", True),
+                         **opcoes_leitura(self.esquema))
+            df = aplicar_esquema(df, self.esquema)
+            self.metricas.registrar(linhas_saida=len(df), bytes_lidos=os.path.getsize(arquivo))
             self.logger.info(f"Dados carregados: {len(df)} registros de {arquivo}")
+            self.logger.info(f"Memória dos dados: {resumo_memoria(df, arquivo)}")
             
-            self.validate_data(df)
+            if validar:
+                self.validate_data(df)
             return df
             
         except Exception as e:
             self.logger.error(f"Erro ao carregar dados: {e}")
             raise
             
-    def filter_sales(self, df):
-        """Filtra vendas baseado no valor mínimo configurado."""
-        valor_minimo = self.config["valor_minimo"]
+    def apply_rules(self, df):
+        """Avalia todas as regras (inclusive a padrão) e retorna {nome: partição}."""
+        partes = {nome: df[mascara] for nome, mascara in avaliar_regras(self.regras, df).items()}
         
-        df_original_count = len(df)
-        df_filtrado = df[df["Vendas"] > valor_minimo].copy()
-        df_filtrado_count = len(df_filtrado)
+        self.log_rules()
+        for nome, parte in partes.items():
+            self.logger.info(f"Registros filtrados ({nome}): {len(parte)}/{len(df)}")
+        return partes
         
-        self.logger.info(f"Filtro aplicado: vendas > {valor_minimo}")
-        self.logger.info(f"Registros filtrados: {df_filtrado_count}/{df_original_count}")
+    def log_rules(self):
+        """Registra no log o nome e o filtro de cada regra ativa."""
+        for regra in self.regras:
+            self.logger.info(f"Regra aplicada ({regra.nome}): {json.dumps(regra.filtro, ensure_ascii=False)}")
         
-        return df_filtrado
+    def output_paths(self):
+        """Arquivo de saída de cada regra: {nome: caminho}."""
+        return {regra.nome: regra.arquivo_saida for regra in self.regras}
         
-    def generate_statistics(self, df_original, df_filtrado):
+    def generate_statistics(self, df_original, df_filtrado, partes=None):
         """Gera estatísticas detalhadas dos dados."""
+        partes = dict(partes or {}, **{REGRA_PADRAO: df_filtrado})
+        return self.build_statistics(ResultadoParcial().add(df_original, partes))
+        
+    def build_statistics(self, resultado):
+        """Monta o dicionário de estatísticas a partir de um ResultadoParcial."""
         stats = {
             "timestamp": datetime.now().strftime(self.config["formato_data"]),
-            "total_registros_original": len(df_original),
-            "total_registros_filtrados": len(df_filtrado),
+            "total_registros_original": resultado.n_original,
+            "total_registros_filtrados": resultado.n_filtrado,
             "valor_minimo_filtro": self.config["valor_minimo"],
-            "vendas_originais": {
-                "total": float(df_original["Vendas"].sum()),
-                "media": float(df_original["Vendas"].mean()),
-                "maximo": float(df_original["Vendas"].max()),
-                "minimo": float(df_original["Vendas"].min())
-            },
-            "vendas_filtradas": {
-                "total": float(df_filtrado["Vendas"].sum()) if not df_filtrado.empty else 0,
-                "media": float(df_filtrado["Vendas"].mean()) if not df_filtrado.empty else 0,
-                "maximo": float(df_filtrado["Vendas"].max()) if not df_filtrado.empty else 0,
-                "minimo": float(df_filtrado["Vendas"].min()) if not df_filtrado.empty else 0
-            }
+            "vendas_originais": resultado.original.to_dict(),
+            "vendas_filtradas": resultado.filtrado.to_dict(),
+            "clientes_distintos_originais": resultado.clientes.estimativa(),
+            "clientes_distintos_filtrados": resultado.regra(REGRA_PADRAO).clientes.estimativa()
         }
         
+        # Uma seção por regra adicional configurada
+        if len(self.regras) > 1:
+            stats["regras"] = {
+                regra.nome: {
+                    "arquivo_saida": regra.arquivo_saida,
+                    "filtro": regra.filtro,
+                    "total_registros": resultado.regra(regra.nome).n,
+                    "vendas": resultado.regra(regra.nome).vendas.to_dict(),
+                    "clientes_distintos": resultado.regra(regra.nome).clientes.estimativa()
+                }
+                for regra in self.regras[1:]
+            }
+        
         return stats
         
-    def save_results(self, df_filtrado, stats):
-        """Salva resultados filtrados e estatísticas."""
+    def save_outputs(self, df_filtrado, partes=None):
+        """Salva o CSV filtrado e a saída de cada regra adicional."""
         # Salva CSV filtrado
         arquivo_saida = self.config["arquivo_saida"]
         df_filtrado.to_csv(arquivo_saida, index=False)
+        self.metricas.registrar(bytes_escritos=os.path.getsize(arquivo_saida))
         self.logger.info(f"Dados filtrados salvos em: {arquivo_saida}")
         
-        # Salva estatísticas
+        # Salva a saída de cada regra adicional
+        for regra in self.regras[1:]:
+            if partes and regra.nome in partes:
+                partes[regra.nome].to_csv(regra.arquivo_saida, index=False)
+                self.metricas.registrar(bytes_escritos=os.path.getsize(regra.arquivo_saida))
+                self.logger.info(f"Regra {regra.nome} salva em: {regra.arquivo_saida}")
+        
+        return arquivo_saida
+        
+    def save_statistics(self, stats):
+        """Salva o relatório de estatísticas em JSON."""
         stats_file = "relatorio_estatisticas.json"
         with open(stats_file, 'w', encoding='utf-8') as f:
             json.dump(stats, f, indent=4, ensure_ascii=False)
         self.logger.info(f"Estatísticas salvas em: {stats_file}")
         
-        return arquivo_saida, stats_file
+        return stats_file
+        
+    def align_dtypes(self, chunk, tipos):
+        """Mantém os tipos numéricos estáveis entre blocos.
+        
+        Um bloco só com valores inteiros em uma coluna já lida como float é
+        convertido para float, para que o CSV de saída tenha a mesma
+        formatação do processamento em memória. `tipos` é atualizado in-place.
+        """
+        for coluna in chunk.columns:
+            tipo = chunk[coluna].dtype.kind
+            if tipos.get(coluna) == 'f' and tipo in 'iu':
+                chunk[coluna] = chunk[coluna].astype('float64')
+            elif tipo == 'f' or coluna not in tipos:
+                tipos[coluna] = tipo
+        return chunk
+        
+    def write_partitions(self, chunk, destinos, cabecalho):
+        """Avalia as regras sobre um bloco e anexa cada partição ao seu destino."""
+        mascaras = avaliar_regras(self.regras, chunk)
+        partes = {nome: chunk[mascara] for nome, mascara in mascaras.items()}
+        for nome, parte in partes.items():
+            parte.to_csv(destinos[nome], header=cabecalho, index=False)
+        return partes
+        
+    def open_outputs(self, saidas, modo='w'):
+        """Abre os arquivos de saída das regras ({nome: caminho} -> {nome: arquivo})."""
+        return {nome: open(caminho, modo, encoding='utf-8', newline='')
+                for nome, caminho in saidas.items()}
+        
+    def process_streaming(self, chunk_size, arquivo=None, saidas=None):
+        """Processa o arquivo em blocos, gravando as saídas de forma incremental.
+        
+        Apenas um bloco fica em memória por vez; as estatísticas são mantidas
+        em acumuladores e ficam idênticas às do processamento em memória.
+        Todas as regras são avaliadas na mesma passada.
+        """
+        arquivo = arquivo or self.config["arquivo_entrada"]
+        saidas = saidas or self.output_paths()
+        if not Path(arquivo).exists():
+            raise FileNotFoundError(f"Arquivo não encontrado: {arquivo}")
+            
+        resultado = ResultadoParcial()
+        duplicates = 0
+        tipos = {}
+        
+        destinos = self.open_outputs(saidas)
+        try:
+            leitor = pd.read_csv(arquivo, chunksize=chunk_size, **opcoes_leitura(self.esquema))
+            for i, chunk in enumerate(leitor):
+                chunk = aplicar_esquema(chunk, self.esquema)
+                errors, dup_chunk = self.check_data(chunk)
+                if errors:
+                    raise ValueError(f"Erros de validação no bloco {i + 1}: {'; '.join(errors)}")
+                duplicates += dup_chunk
+                
+                chunk = self.align_dtypes(chunk, tipos)
+                resultado.add(chunk, self.write_partitions(chunk, destinos, i == 0))
+        finally:
+            for destino in destinos.values():
+                destino.close()
+                
+        n_original, n_filtrado = resultado.n_original, resultado.n_filtrado
+        if n_original == 0:
+            raise ValueError("Erros de validação: Dataset está vazio")
+        self.metricas.registrar(
+            linhas_entrada=n_original, linhas_saida=n_filtrado,
+            bytes_lidos=os.path.getsize(arquivo),
+            bytes_escritos=sum(os.path.getsize(c) for c in saidas.values())
+        )
+        if duplicates > 0:
+            self.logger.warning(f"Encontradas {duplicates} linhas duplicadas (dentro dos blocos)")
+            
+        self.logger.info(f"Dados processados em blocos de {chunk_size}: {n_original} registros de {arquivo}")
+        self.log_rules()
+        self.logger.info(f"Registros filtrados: {n_filtrado}/{n_original}")
+        self.logger.info(f"Dados filtrados salvos em: {', '.join(saidas.values())}")
+        
+        return resultado
+        
+    def process_file(self, arquivo, saidas):
+        """Processa um único arquivo (em memória ou em blocos) e grava suas saídas."""
+        chunk_size = self.config.get("chunk_size")
+        if chunk_size:
+            return self.process_streaming(chunk_size, arquivo, saidas)
+            
+        df_original = self.load_data(arquivo)
+        partes = self.apply_rules(df_original)
+        for nome, parte in partes.items():
+            parte.to_csv(saidas[nome], index=False)
+        self.logger.info(f"Dados filtrados salvos em: {', '.join(saidas.values())}")
+        return ResultadoParcial().add(df_original, partes)
+        
+    def resolve_input_files(self):
+        """Expande `arquivo_entrada` (caminho, padrão glob ou lista) em arquivos."""
+        entrada = self.config["arquivo_entrada"]
+        padroes = [entrada] if isinstance(entrada, str) else list(entrada)
+        arquivos = []
+        for padrao in padroes:
+            encontrados = sorted(glob(padrao)) if self.is_glob(padrao) else [padrao]
+            arquivos.extend(a for a in encontrados if a not in arquivos)
+        if not arquivos:
+            raise FileNotFoundError(f"Nenhum arquivo encontrado para: {entrada}")
+        return arquivos
+        
+    @staticmethod
+    def is_glob(padrao):
+        """Indica se o caminho contém curingas de glob."""
+        return any(c in padrao for c in "*?[")
+        
+    def is_multi_input(self):
+        """Indica se a entrada deve ser tratada como um conjunto de arquivos."""
+        entrada = self.config["arquivo_entrada"]
+        return not isinstance(entrada, str) or self.is_glob(entrada)
+        
+    def output_path_for(self, arquivo, arquivo_saida):
+        """Nome da saída individual de um arquivo (modo saida_por_arquivo)."""
+        saida = Path(arquivo_saida)
+        return str(saida.with_name(f"{saida.stem}_{Path(arquivo).stem}{saida.suffix}"))
+        
+    def process_multiple(self, arquivos):
+        """Processa vários arquivos em paralelo e combina as estatísticas.
+        
+        Cada processo do pool devolve um ResultadoParcial; a combinação é
+        exata (soma, contagem, mínimo e máximo), com a média derivada no final.
+        """
+        saidas_finais = self.output_paths()
+        por_arquivo = self.config.get("saida_por_arquivo", False)
+        workers = self.config.get("workers") or os.cpu_count()
+        if self.config.get("incremental"):
+            self.logger.warning("Modo incremental não se aplica a múltiplos arquivos; processando tudo")
+        self.logger.info(f"Processando {len(arquivos)} arquivo(s) com {workers} processo(s)")
+        
+        pasta_temp = None
+        if por_arquivo:
+            saidas = [{nome: self.output_path_for(a, caminho) for nome, caminho in saidas_finais.items()}
+                      for a in arquivos]
+        else:
+            pasta_temp = tempfile.mkdtemp(dir=Path(self.config["arquivo_saida"]).resolve().parent)
+            saidas = [{nome: os.path.join(pasta_temp, f"{j}_parte_{i:05d}.csv")
+                       for j, nome in enumerate(saidas_finais)}
+                      for i in range(len(arquivos))]
+            
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futuros = [executor.submit(_processar_arquivo, self.config, a, s)
+                           for a, s in zip(arquivos, saidas)]
+                resultado = ResultadoParcial()
+                for futuro in futuros:
+                    resultado.merge(futuro.result())
+                    
+            if not por_arquivo:
+                for nome, arquivo_saida in saidas_finais.items():
+                    self.concat_outputs([s[nome] for s in saidas], arquivo_saida)
+                saidas = [saidas_finais]
+            self.metricas.registrar(
+                linhas_entrada=resultado.n_original, linhas_saida=resultado.n_filtrado,
+                bytes_lidos=sum(os.path.getsize(a) for a in arquivos),
+                bytes_escritos=sum(os.path.getsize(c) for s in saidas for c in s.values())
+            )
+        finally:
+            if pasta_temp:
+                shutil.rmtree(pasta_temp, ignore_errors=True)
+                
+        self.logger.info(f"Registros filtrados: {resultado.n_filtrado}/{resultado.n_original}")
+        return resultado
+        
+    def concat_outputs(self, partes, arquivo_saida):
+        """Junta as saídas parciais em um único CSV, mantendo só o primeiro cabeçalho."""
+        with open(arquivo_saida, 'wb') as destino:
+            for i, parte in enumerate(partes):
+                with open(parte, 'rb') as origem:
+                    cabecalho = origem.readline()
+                    if i == 0:
+                        destino.write(cabecalho)
+                    shutil.copyfileobj(origem, destino)
+        self.logger.info(f"Dados filtrados combinados em: {arquivo_saida}")
+        
+    def _hash_trecho(self, f, inicio, fim):
+        """Hash de um trecho de bytes do arquivo (limitado a TAMANHO_HASH)."""
+        inicio = max(inicio, fim - self.TAMANHO_HASH)
+        f.seek(inicio)
+        return hashlib.blake2b(f.read(fim - inicio), digest_size=16).hexdigest()
+        
+    def _fim_ultima_linha(self, f, tamanho):
+        """Posição logo após a última quebra de linha (ignora linha em escrita)."""
+        posicao = tamanho
+        while posicao > 0:
+            inicio = max(0, posicao - self.TAMANHO_HASH)
+            f.seek(inicio)
+            bloco = f.read(posicao - inicio)
+            quebra = bloco.rfind(b'\n')
+            if quebra >= 0:
+                return inicio + quebra + 1
+            posicao = inicio
+        return 0
+        
+    def load_state(self, arquivo, f, tamanho):
+        """Carrega o watermark persistido se ele ainda vale para o arquivo.
+        
+        Retorna None (reconstrução completa) quando não há estado, quando as
+        regras ou saídas mudaram, ou quando o arquivo foi truncado/reescrito.
+        """
+        if not Path(self.ARQUIVO_ESTADO).exists():
+            return None
+        with open(self.ARQUIVO_ESTADO, 'r', encoding='utf-8') as fe:
+            estado = json.load(fe)
+            
+        offset = estado.get("offset", 0)
+        tamanhos = estado.get("tamanho_saida", {})
+        saidas_ok = all(
+            Path(caminho).exists() and Path(caminho).stat().st_size >= tamanhos.get(nome, 0)
+            for nome, caminho in self.output_paths().items()
+        )
+        if (estado.get("versao") != self.VERSAO_ESTADO
+                or estado.get("arquivo") != str(Path(arquivo).resolve())
+                or estado.get("regras") != self.rules_signature()
+                or not saidas_ok):
+            self.logger.info("Estado incremental não corresponde à configuração; reconstruindo")
+            return None
+        if tamanho < offset:
+            self.logger.warning("Arquivo de entrada foi truncado; reconstruindo")
+            return None
+        if (self._hash_trecho(f, 0, min(offset, self.TAMANHO_HASH)) != estado["hash_inicio"]
+                or self._hash_trecho(f, 0, offset) != estado["hash_fim"]):
+            self.logger.warning("Arquivo de entrada foi reescrito; reconstruindo")
+            return None
+        return estado
+        
+    def rules_signature(self):
+        """Regras com caminhos absolutos, para detectar mudanças entre execuções."""
+        return [dict(regra.to_dict(), arquivo_saida=str(Path(regra.arquivo_saida).resolve()))
+                for regra in self.regras]
+        
+    def save_state(self, estado):
+        """Grava o watermark de forma atômica."""
+        temp = self.ARQUIVO_ESTADO + ".tmp"
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(estado, f, indent=4, ensure_ascii=False)
+        os.replace(temp, self.ARQUIVO_ESTADO)
+        
+    def process_incremental(self):
+        """Processa apenas as linhas adicionadas desde a última execução.
+        
+        O estado (offset em bytes, cabeçalho e agregados) fica em
+        ARQUIVO_ESTADO; as novas linhas de cada regra são anexadas à sua saída.
+        """
+        arquivo = self.config["arquivo_entrada"]
+        saidas = self.output_paths()
+        chunk_size = self.config.get("chunk_size") or 1_000_000
+        if not Path(arquivo).exists():
+            raise FileNotFoundError(f"Arquivo não encontrado: {arquivo}")
+            
+        with open(arquivo, 'rb') as f:
+            tamanho = os.fstat(f.fileno()).st_size
+            estado = self.load_state(arquivo, f, tamanho)
+            fim = self._fim_ultima_linha(f, tamanho)
+            
+            if estado:
+                offset = estado["offset"]
+                resultado = ResultadoParcial.from_state(estado["resultado"])
+                cabecalho = estado["cabecalho"]
+                opcoes = {"header": None, "names": cabecalho}
+                # Descarta o que foi gravado após o último estado salvo
+                for nome, caminho in saidas.items():
+                    with open(caminho, 'r+b') as saida:
+                        saida.truncate(estado["tamanho_saida"][nome])
+                modo = 'a'
+            else:
+                offset = 0
+                resultado = ResultadoParcial()
+                cabecalho = list(pd.read_csv(arquivo, nrows=0).columns)
+                opcoes = {}
+                modo = 'w'
+                
+            self.logger.info(f"Processamento incremental: bytes {offset}-{fim} de {arquivo}")
+            opcoes.update(opcoes_leitura(self.esquema))
+            tipos = estado["tipos"] if estado else {}
+            n_anterior, n_filtrado_anterior = resultado.n_original, resultado.n_filtrado
+            
+            destinos = self.open_outputs(saidas, modo)
+            try:
+                if fim > offset:
+                    f.seek(offset)
+                    trecho = io.BufferedReader(_LeitorTrecho(f, fim - offset))
+                    for i, chunk in enumerate(pd.read_csv(trecho, chunksize=chunk_size, **opcoes)):
+                        chunk = aplicar_esquema(chunk, self.esquema)
+                        errors, _ = self.check_data(chunk)
+                        if errors:
+                            raise ValueError(f"Erros de validação: {'; '.join(errors)}")
+                        chunk = self.align_dtypes(chunk, tipos)
+                        partes = self.write_partitions(chunk, destinos, modo == 'w' and i == 0)
+                        resultado.add(chunk, partes)
+            finally:
+                for destino in destinos.values():
+                    destino.close()
+                    
+            if resultado.n_original == 0:
+                raise ValueError("Erros de validação: Dataset está vazio")
+                
+            tamanho_saida = {nome: Path(c).stat().st_size for nome, c in saidas.items()}
+            self.metricas.registrar(
+                linhas_entrada=resultado.n_original - n_anterior,
+                linhas_saida=resultado.n_filtrado - n_filtrado_anterior,
+                bytes_lidos=fim - offset,
+                bytes_escritos=sum(tamanho_saida.values()) - sum((estado or {}).get("tamanho_saida", {}).values())
+            )
+            self.save_state({
+                "versao": self.VERSAO_ESTADO,
+                "arquivo": str(Path(arquivo).resolve()),
+                "regras": self.rules_signature(),
+                "offset": fim,
+                "cabecalho": cabecalho,
+                "tipos": tipos,
+                "hash_inicio": self._hash_trecho(f, 0, min(fim, self.TAMANHO_HASH)),
+                "hash_fim": self._hash_trecho(f, 0, fim),
+                "tamanho_saida": tamanho_saida,
+                "resultado": resultado.to_state()
+            })
+            
+        self.logger.info(f"Novos registros: {resultado.n_original - n_anterior}")
+        self.logger.info(f"Registros filtrados: {resultado.n_filtrado}/{resultado.n_original}")
+        return resultado
+        
+    def save_metrics(self, stats):
+        """Inclui as métricas das etapas em `stats` e, se configurado, no arquivo de métricas."""
+        if not self.metricas.ativo:
+            return
+        stats["performance"] = self.metricas.to_dict()
+        arquivo = self.config.get("metricas", {}).get("arquivo")
+        if arquivo:
+            self.metricas.salvar(arquivo)
+            self.logger.info(f"Métricas de desempenho anexadas a: {arquivo}")
         
     def print_summary(self, stats):
         """Imprime resumo formatado dos resultados."""
@@ -174,6 +600,9 @@ class RelatorioVendas:
         print(f"\nVENDAS TOTAIS:")
         print(f"   Total Geral: R$ {stats['vendas_originais']['total']:,.2f}")
         print(f"   Media Geral: R$ {stats['vendas_originais']['media']:,.2f}")
+        quantis = stats['vendas_originais']['quantis']
+        print(f"   p50 / p90 / p99: R$ {quantis['p50']:,.2f} / R$ {quantis['p90']:,.2f} / R$ {quantis['p99']:,.2f}")
+        print(f"   Clientes distintos: {stats['clientes_distintos_originais']:,}")
         
         if stats['total_registros_filtrados'] > 0:
             print(f"\nVENDAS QUALIFICADAS:")
@@ -183,6 +612,9 @@ class RelatorioVendas:
         else:
             print(f"\nNenhuma venda atende ao criterio minimo de R$ {stats['valor_minimo_filtro']:,.2f}")
             
+        if "performance" in stats:
+            print(f"\nTempo de processamento: {stats['performance']['tempo_total_s']:.3f}s")
+            
         print("="*60)
         
     def run(self):
@@ -190,17 +622,54 @@ class RelatorioVendas:
         try:
             self.logger.info("Iniciando geração de relatório de vendas")
             
-            # Carrega dados
-            df_original = self.load_data()
-            
-            # Aplica filtros
-            df_filtrado = self.filter_sales(df_original)
+            config_metricas = self.config.get("metricas", {})
+            self.metricas = ColetorMetricas(
+                ativo=config_metricas.get("ativo", True),
+                usar_tracemalloc=config_metricas.get("tracemalloc", False)
+            )
+            etapa = self.metricas.etapa
             
-            # Gera estatísticas
-            stats = self.generate_statistics(df_original, df_filtrado)
-            
-            # Salva resultados
-            arquivo_csv, arquivo_stats = self.save_results(df_filtrado, stats)
+            chunk_size = self.config.get("chunk_size")
+            if self.config.get("incremental") and not self.is_multi_input():
+                # Modo incremental: processa apenas o trecho novo do arquivo
+                with etapa("process_incremental"):
+                    resultado = self.process_incremental()
+                stats = self.build_statistics(resultado)
+            elif self.is_multi_input():
+                # Vários arquivos: processados em paralelo e combinados
+                arquivos = self.resolve_input_files()
+                with etapa("process_multiple"):
+                    resultado = self.process_multiple(arquivos)
+                stats = self.build_statistics(resultado)
+                stats["total_arquivos"] = len(arquivos)
+            elif chunk_size:
+                # Modo streaming: memória limitada ao tamanho do bloco
+                with etapa("process_streaming"):
+                    resultado = self.process_streaming(chunk_size)
+                stats = self.build_statistics(resultado)
+            else:
+                # Carrega e valida dados
+                with etapa("load_data"):
+                    df_original = self.load_data(validar=False)
+                with etapa("validate_data", len(df_original)):
+                    self.validate_data(df_original)
+                
+                # Aplica filtros (todas as regras sobre a mesma carga)
+                with etapa("filter_sales", len(df_original)) as medida:
+                    partes = self.apply_rules(df_original)
+                    df_filtrado = partes[REGRA_PADRAO]
+                    medida.registrar(linhas_saida=len(df_filtrado))
+                
+                # Gera estatísticas
+                with etapa("generate_statistics", len(df_original)):
+                    stats = self.generate_statistics(df_original, df_filtrado, partes)
+                
+                # Salva resultados
+                with etapa("save_results", len(df_filtrado)):
+                    self.save_outputs(df_filtrado, partes)
+                    
+            self.save_metrics(stats)
+            self.save_statistics(stats)
             
             # Exibe resumo
             self.print_summary(stats)
@@ -0,0 +1,235 @@
+"""
+Agendador de tarefas por expressões cron, orientado a eventos.
+
+Em vez de verificar a agenda a cada minuto, o `Agendador` mantém um heap
+com o próximo horário de cada tarefa e dorme até o primeiro vencimento.
+As tarefas rodam em um pool limitado de threads, então um relatório lento
+não atrasa as demais, e uma tarefa nunca roda em paralelo com ela mesma
+(a ocorrência que vence durante a execução anterior é pulada).
+
+O próximo horário de cada tarefa é gravado em disco (JSON). Ao reiniciar,
+tarefas com `recuperar=True` cujo horário passou enquanto o processo
+estava parado rodam uma vez (as ocorrências perdidas são agrupadas).
+
+Expressões cron com 5 campos: minuto, hora, dia do mês, mês e dia da
+semana (0 ou 7 = domingo), com ``*``, listas (``1,15``), intervalos
+(``1-5``) e passos (``*/15``, ``8-18/2``). Horários locais.
+
+`RelogioTeste` substitui o relógio do sistema: dormir apenas avança o
+horário simulado, permitindo verificar dias de agenda sem esperar:
+
+    relogio = RelogioTeste(datetime(2025, 1, 6, 8, 0))
+    agendador = Agendador("estado.json", relogio=relogio)
+    agendador.adicionar("semanal", "0 9 * * 1", enviar)
+    agendador.executar(ate=datetime(2025, 1, 6, 10, 0))
+"""
+
+import heapq
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+LIMITES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+# Sono máximo: acompanha ajustes do relógio do sistema (NTP, horário de verão)
+SONO_MAXIMO_S = 300
+
+
+def _campo(texto, minimo, maximo):
+    """Valores permitidos por um campo cron."""
+    valores = set()
+    for parte in texto.split(','):
+        intervalo, _, passo = parte.partition('/')
+        if intervalo == '*':
+            inicio, fim = minimo, maximo
+        elif '-' in intervalo:
+            inicio, fim = map(int, intervalo.split('-'))
+        else:
+            inicio = fim = int(intervalo)
+            if passo:
+                fim = maximo
+        passo = int(passo) if passo else 1
+        if not (minimo <= inicio <= fim <= maximo) or passo < 1:
+            raise ValueError(f"Campo cron fora do intervalo {minimo}-{maximo}: {parte!r}")
+        valores.update(range(inicio, fim + 1, passo))
+    return valores
+
+
+class ExpressaoCron:
+    """Expressão cron de 5 campos; `proxima` calcula o próximo horário."""
+
+    def __init__(self, texto):
+        campos = texto.split()
+        if len(campos) != 5:
+            raise ValueError(f"Expressão cron deve ter 5 campos: {texto!r}")
+        self.texto = texto
+        self.minutos, self.horas, self.dias, self.meses, dias_semana = (
+            _campo(campo, *limites) for campo, limites in zip(campos, LIMITES))
+        # 0 e 7 são domingo; em Python segunda = 0, então converte para isoweekday % 7
+        self.dias_semana = {d % 7 for d in dias_semana}
+        # Como no cron: com dia do mês e dia da semana restritos, basta um coincidir
+        self.dia_livre = campos[2] == '*'
+        self.semana_livre = campos[4] == '*'
+
+    def _dia_valido(self, data):
+        dia_mes = data.day in self.dias
+        dia_semana = data.isoweekday() % 7 in self.dias_semana
+        if self.dia_livre or self.semana_livre:
+            return dia_mes and dia_semana
+        return dia_mes or dia_semana
+
+    def proxima(self, depois):
+        """Primeiro horário estritamente depois de `depois`."""
+        t = depois.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limite = t + timedelta(days=366 * 5)
+        while t < limite:
+            if t.month not in self.meses:
+                t = (t.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._dia_valido(t):
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+            elif t.hour not in self.horas:
+                t = t.replace(minute=0) + timedelta(hours=1)
+            elif t.minute not in self.minutos:
+                t += timedelta(minutes=1)
+            else:
+                return t
+        raise ValueError(f"Expressão cron sem horários válidos: {self.texto!r}")
+
+
+class RelogioSistema:
+    """Relógio real; `dormir` pode ser interrompido pelo evento de parada."""
+
+    def agora(self):
+        return datetime.now()
+
+    def dormir(self, segundos, parar):
+        parar.wait(segundos)
+
+
+class RelogioTeste:
+    """Relógio simulado: `dormir` avança o horário sem esperar."""
+
+    def __init__(self, inicio):
+        self.atual = inicio
+        self.trava = threading.Lock()
+
+    def agora(self):
+        with self.trava:
+            return self.atual
+
+    def avancar(self, segundos):
+        with self.trava:
+            self.atual += timedelta(seconds=segundos)
+
+    def dormir(self, segundos, parar):
+        self.avancar(segundos)
+
+
+class Agendador:
+    """Executa tarefas cron em um pool limitado, sem sobreposição e com recuperação."""
+
+    def __init__(self, arquivo_estado, workers=2, relogio=None):
+        self.arquivo_estado = Path(arquivo_estado)
+        self.relogio = relogio or RelogioSistema()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="agendador")
+        self.tarefas = {}
+        self.heap = []
+        self.em_execucao = set()
+        self.trava = threading.Lock()
+        self.trava_arquivo = threading.Lock()
+        self.parar_evento = threading.Event()
+        self.estado = self.carregar_estado()
+
+    def carregar_estado(self):
+        try:
+            with open(self.arquivo_estado, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Estado do agendador ignorado ({e})")
+            return {}
+
+    def salvar_estado(self):
+        """Grava o estado de forma atômica (arquivo temporário + rename)."""
+        with self.trava_arquivo:
+            with self.trava:
+                conteudo = json.dumps(self.estado, indent=2, ensure_ascii=False)
+            temp = self.arquivo_estado.with_name(f".{self.arquivo_estado.name}.tmp")
+            temp.write_text(conteudo, encoding='utf-8')
+            os.replace(temp, self.arquivo_estado)
+
+    def adicionar(self, nome, cron, funcao, recuperar=True):
+        """Registra uma tarefa; com `recuperar`, um horário perdido roda ao iniciar."""
+        expressao = ExpressaoCron(cron)
+        agora = self.relogio.agora()
+        self.tarefas[nome] = (expressao, funcao)
+
+        estado = self.estado.setdefault(nome, {})
+        salva = estado.get("proxima")
+        proxima = expressao.proxima(agora)
+        if estado.get("cron") == cron and salva and datetime.fromisoformat(salva) <= agora:
+            if recuperar:
+                logger.info(f"Tarefa {nome}: execução de {salva} perdida; recuperando agora")
+                proxima = agora
+            else:
+                logger.info(f"Tarefa {nome}: execução de {salva} perdida (sem recuperação)")
+        estado.update(cron=cron, proxima=proxima.isoformat())
+        heapq.heappush(self.heap, (proxima, nome))
+        self.salvar_estado()
+
+    def _executar_tarefa(self, nome, horario):
+        _, funcao = self.tarefas[nome]
+        inicio = self.relogio.agora()
+        try:
+            resultado = funcao()
+            sucesso = resultado is not False
+        except Exception as e:
+            logger.error(f"Tarefa {nome} falhou: {e}")
+            sucesso = False
+        with self.trava:
+            self.em_execucao.discard(nome)
+            self.estado[nome].update(ultima_execucao=horario.isoformat(), sucesso=sucesso,
+                                     duracao_s=(self.relogio.agora() - inicio).total_seconds())
+        self.salvar_estado()
+
+    def _disparar(self, horario, nome):
+        """Envia a tarefa vencida ao pool (ou pula, se ainda estiver rodando) e reagenda."""
+        expressao, _ = self.tarefas[nome]
+        with self.trava:
+            rodando = nome in self.em_execucao
+            if not rodando:
+                self.em_execucao.add(nome)
+        if rodando:
+            logger.warning(f"Tarefa {nome} ainda em execução; ocorrência de {horario:%d/%m %H:%M} pulada")
+        else:
+            self.executor.submit(self._executar_tarefa, nome, horario)
+
+        proxima = expressao.proxima(max(horario, self.relogio.agora()))
+        with self.trava:
+            self.estado[nome]["proxima"] = proxima.isoformat()
+        heapq.heappush(self.heap, (proxima, nome))
+        self.salvar_estado()
+
+    def executar(self, ate=None):
+        """Dorme até o próximo vencimento e dispara as tarefas, até `parar` (ou `ate`)."""
+        while self.heap and not self.parar_evento.is_set():
+            horario, nome = self.heap[0]
+            if ate is not None and horario > ate:
+                break
+            espera = (horario - self.relogio.agora()).total_seconds()
+            if espera > 0:
+                self.relogio.dormir(min(espera, SONO_MAXIMO_S), self.parar_evento)
+                continue
+            heapq.heappop(self.heap)
+            self._disparar(horario, nome)
+
+    def parar(self, aguardar=True):
+        """Interrompe o laço e encerra o pool (aguardando as tarefas em andamento)."""
+        self.parar_evento.set()
+        self.executor.shutdown(wait=aguardar)
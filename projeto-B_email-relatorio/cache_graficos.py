@@ -0,0 +1,110 @@
+"""
+Cache de gráficos endereçado por conteúdo.
+
+A chave de cada imagem é o hash de: dados usados no gráfico, especificação
+(tipo, tamanho, dpi, títulos...), estilo/paleta, código da função que
+desenha o tipo e versões das bibliotecas. Se nada disso mudou desde o
+último envio, a imagem em cache é copiada para o arquivo de saída e o
+gráfico não é redesenhado.
+
+As imagens ficam em ``.cache_graficos/`` e o tamanho total é limitado:
+ao passar de ``tamanho_maximo`` bytes, as entradas usadas há mais tempo
+(mtime, atualizado a cada acerto) são removidas (LRU). O limite é aplicado
+uma vez por lote (`limitar`, chamado ao fim de `renderizar_lote`), não a
+cada imagem gravada, para não listar o diretório inteiro a cada inserção.
+"""
+
+import hashlib
+import inspect
+import json
+import logging
+import os
+import shutil
+from importlib import metadata
+from pathlib import Path
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+VERSAO_CACHE = 1
+PASTA_CACHE = ".cache_graficos"
+TAMANHO_MAXIMO = 100 * 1024 * 1024
+
+
+def hash_dados(df):
+    """Hash do conteúdo do DataFrame (valores, índice, colunas e tipos)."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(json.dumps([list(map(str, df.columns)), list(map(str, df.dtypes))]).encode('utf-8'))
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _versoes():
+    # Lidas dos metadados para não importar o seaborn no processo principal
+    return {nome: metadata.version(nome) for nome in ("matplotlib", "seaborn", "pandas", "numpy")}
+
+
+def _codigo(funcao):
+    """Fonte da função que desenha o tipo (mudanças no código invalidam o cache)."""
+    try:
+        return inspect.getsource(funcao)
+    except (OSError, TypeError):
+        return f"{funcao.__module__}.{funcao.__qualname__}"
+
+
+class CacheGraficos:
+    """Imagens renderizadas indexadas pelo hash de dados + especificação + ambiente."""
+
+    def __init__(self, diretorio=PASTA_CACHE, tamanho_maximo=TAMANHO_MAXIMO, contexto=None):
+        self.diretorio = Path(diretorio)
+        self.tamanho_maximo = tamanho_maximo
+        self.contexto = dict(contexto or {}, versao_cache=VERSAO_CACHE, versoes=_versoes())
+
+    def chave(self, dados, spec, funcao):
+        """Chave de uma imagem; `dados` é o hash do DataFrame (ver `hash_dados`)."""
+        parametros = {k: v for k, v in spec.items() if k != "arquivo"}
+        conteudo = json.dumps([dados, parametros, _codigo(funcao), self.contexto],
+                              sort_keys=True, default=str)
+        sufixo = Path(spec["arquivo"]).suffix or ".png"
+        return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()[:32] + sufixo
+
+    def obter(self, chave, destino):
+        """Copia a imagem em cache para `destino`; retorna False se não houver."""
+        entrada = self.diretorio / chave
+        try:
+            shutil.copyfile(entrada, destino)
+            os.utime(entrada)
+        except OSError:
+            return False
+        return True
+
+    def guardar(self, chave, origem):
+        """Adiciona a imagem recém-gerada ao cache (o limite fica para `limitar`)."""
+        try:
+            self.diretorio.mkdir(parents=True, exist_ok=True)
+            temp = self.diretorio / f".{chave}.{os.getpid()}.tmp"
+            shutil.copyfile(origem, temp)
+            os.replace(temp, self.diretorio / chave)
+        except OSError as e:
+            # Falha no cache não impede o relatório
+            logger.warning(f"Não foi possível gravar {origem} no cache de gráficos: {e}")
+
+    def limitar(self):
+        """Remove as entradas menos usadas até o total caber em `tamanho_maximo`."""
+        entradas = []
+        try:
+            for entrada in self.diretorio.iterdir():
+                if entrada.name.startswith('.'):
+                    continue
+                info = entrada.stat()
+                entradas.append((info.st_mtime, info.st_size, entrada))
+        except OSError as e:
+            logger.warning(f"Não foi possível aplicar o limite do cache de gráficos: {e}")
+            return
+        total = sum(tamanho for _, tamanho, _ in entradas)
+        for _, tamanho, entrada in sorted(entradas):
+            if total <= self.tamanho_maximo:
+                break
+            entrada.unlink(missing_ok=True)
+            total -= tamanho
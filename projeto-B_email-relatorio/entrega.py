@@ -0,0 +1,215 @@
+"""
+Entrega de emails com conexões SMTP reaproveitadas.
+
+- `PoolSMTP` mantém até `tamanho` conexões autenticadas abertas; o custo de
+  conexão, TLS e login é pago uma vez por conexão, não por mensagem.
+  Conexões que caem (desconexão, 421, erro de socket) são descartadas e a
+  mensagem é reenviada em uma conexão nova.
+- `EntregadorEmails` envia mensagens em paralelo (uma thread por conexão)
+  respeitando um limite opcional de mensagens por segundo e registra a
+  taxa obtida.
+
+Configuração por variáveis de ambiente (ver `de_ambiente`): ``SMTP_HOST``,
+``SMTP_PORT``, ``SMTP_SSL``, ``SMTP_STARTTLS``, ``SMTP_CONEXOES`` e
+``SMTP_TAXA`` (mensagens/s, 0 = sem limite). Para testes locais basta
+apontar para um servidor como o ``aiosmtpd`` (``SMTP_SSL=0``).
+"""
+
+import logging
+import os
+import queue
+import smtplib
+import ssl
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from email.message import EmailMessage
+
+logger = logging.getLogger(__name__)
+
+def conexao_perdida(erro):
+    """Indica se o erro invalida a conexão (e a mensagem pode ser reenviada)."""
+    if isinstance(erro, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    if isinstance(erro, smtplib.SMTPResponseException):
+        return erro.smtp_code == 421
+    # Erros de socket (smtplib.SMTPException também deriva de OSError)
+    return isinstance(erro, OSError) and not isinstance(erro, smtplib.SMTPException)
+
+
+class PoolSMTP:
+    """Conjunto limitado de conexões SMTP autenticadas, reutilizadas entre envios."""
+
+    def __init__(self, host, port, usuario=None, senha=None, usar_ssl=True, starttls=False,
+                 tamanho=4, timeout=30):
+        self.host = host
+        self.port = port
+        self.usuario = usuario
+        self.senha = senha
+        self.usar_ssl = usar_ssl
+        self.starttls = starttls
+        self.tamanho = tamanho
+        self.timeout = timeout
+        self.livres = queue.LifoQueue()
+        self.vagas = threading.BoundedSemaphore(tamanho)
+        self.trava = threading.Lock()
+        self.conexoes_criadas = 0
+
+    def conectar(self):
+        """Abre uma conexão nova (TLS e login conforme a configuração)."""
+        contexto = ssl.create_default_context()
+        if self.usar_ssl:
+            smtp = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout, context=contexto)
+        else:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.starttls:
+                smtp.starttls(context=contexto)
+        smtp.ehlo_or_helo_if_needed()
+        # Servidores locais de teste (ex.: aiosmtpd) não oferecem AUTH
+        if self.usuario and self.senha and smtp.has_extn('auth'):
+            smtp.login(self.usuario, self.senha)
+        with self.trava:
+            self.conexoes_criadas += 1
+        return smtp
+
+    @staticmethod
+    def descartar(smtp):
+        try:
+            smtp.close()
+        except Exception:
+            pass
+
+    @contextmanager
+    def conexao(self):
+        """Empresta uma conexão; se ela cair durante o uso, é descartada."""
+        with self.vagas:
+            try:
+                smtp = self.livres.get_nowait()
+            except queue.Empty:
+                smtp = self.conectar()
+            try:
+                yield smtp
+            except Exception as e:
+                if conexao_perdida(e):
+                    self.descartar(smtp)
+                else:
+                    self.livres.put(smtp)
+                raise
+            else:
+                self.livres.put(smtp)
+
+    def fechar(self):
+        """Encerra todas as conexões livres."""
+        while True:
+            try:
+                smtp = self.livres.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                smtp.quit()
+            except Exception:
+                self.descartar(smtp)
+
+
+class LimiteTaxa:
+    """Espaça as chamadas a `aguardar` para no máximo `por_segundo` por segundo."""
+
+    def __init__(self, por_segundo=None):
+        self.intervalo = 1 / por_segundo if por_segundo else 0
+        self.proximo = 0.0
+        self.trava = threading.Lock()
+
+    def aguardar(self):
+        if not self.intervalo:
+            return
+        with self.trava:
+            agora = time.monotonic()
+            horario = max(agora, self.proximo)
+            self.proximo = horario + self.intervalo
+        if horario > agora:
+            time.sleep(horario - agora)
+
+
+class EntregadorEmails:
+    """Envia mensagens em paralelo pelas conexões de um `PoolSMTP`."""
+
+    def __init__(self, pool, mensagens_por_segundo=None, tentativas=3):
+        self.pool = pool
+        self.limite = LimiteTaxa(mensagens_por_segundo)
+        self.tentativas = tentativas
+        self.resumo = {}
+
+    def enviar_mensagem(self, mensagem):
+        """Envia uma mensagem, reconectando se a conexão cair; retorna o resultado."""
+        erro = None
+        for tentativa in range(1, self.tentativas + 1):
+            self.limite.aguardar()
+            try:
+                with self.pool.conexao() as smtp:
+                    smtp.send_message(mensagem)
+                return {"destinatarios": mensagem["To"], "ok": True, "erro": None, "tentativas": tentativa}
+            except Exception as e:
+                erro = e
+                if not conexao_perdida(e):
+                    break
+                logger.warning(f"Conexão SMTP perdida ({type(e).__name__}); reenviando")
+        return {"destinatarios": mensagem["To"], "ok": False,
+                "erro": f"{type(erro).__name__}: {erro}", "tentativas": tentativa}
+
+    def enviar(self, mensagens):
+        """Envia todas as mensagens; resultados na ordem de entrada."""
+        inicio = time.perf_counter()
+        conexoes_antes = self.pool.conexoes_criadas
+        with ThreadPoolExecutor(max_workers=self.pool.tamanho) as executor:
+            resultados = list(executor.map(self.enviar_mensagem, mensagens))
+        tempo = time.perf_counter() - inicio
+
+        enviados = sum(1 for r in resultados if r["ok"])
+        self.resumo = {
+            "enviados": enviados,
+            "falhas": len(resultados) - enviados,
+            "tempo_s": round(tempo, 3),
+            "mensagens_por_s": round(enviados / tempo, 1) if tempo > 0 else None,
+            "conexoes": self.pool.conexoes_criadas - conexoes_antes,
+        }
+        logger.info(f"Entrega: {enviados}/{len(resultados)} mensagens em {tempo:.2f}s "
+                    f"({self.resumo['mensagens_por_s']} msg/s, {self.resumo['conexoes']} conexão(ões))")
+        return resultados
+
+    def fechar(self):
+        self.pool.fechar()
+
+
+def montar_mensagem(remetente, destinatario, assunto, html, anexos=(), inline=()):
+    """Cria a mensagem MIME (HTML + anexos ``(nome, bytes, maintype, subtype)``).
+
+    `inline` recebe imagens ``(cid, bytes, maintype, subtype)`` referenciadas
+    no HTML como ``<img src="cid:...">`` (multipart/related).
+    """
+    mensagem = EmailMessage()
+    mensagem["From"] = remetente
+    mensagem["To"] = destinatario
+    mensagem["Subject"] = assunto
+    mensagem.set_content("Este relatório requer um cliente de email com suporte a HTML.")
+    mensagem.add_alternative(html, subtype="html")
+    parte_html = mensagem.get_payload()[1]
+    for cid, dados, maintype, subtype in inline:
+        parte_html.add_related(dados, maintype=maintype, subtype=subtype, cid=f"<{cid}>",
+                               disposition="inline")
+    for nome, dados, maintype, subtype in anexos:
+        mensagem.add_attachment(dados, maintype=maintype, subtype=subtype, filename=nome)
+    return mensagem
+
+
+def de_ambiente(usuario=None, senha=None):
+    """Cria o `EntregadorEmails` a partir das variáveis de ambiente SMTP_*."""
+    pool = PoolSMTP(
+        os.getenv('SMTP_HOST', 'smtp.gmail.com'),
+        int(os.getenv('SMTP_PORT', '465')),
+        usuario, senha,
+        usar_ssl=os.getenv('SMTP_SSL', '1') == '1',
+        starttls=os.getenv('SMTP_STARTTLS', '0') == '1',
+        tamanho=int(os.getenv('SMTP_CONEXOES', '4')),
+    )
+    return EntregadorEmails(pool, float(os.getenv('SMTP_TAXA', '0')) or None)
@@ -1,6 +1,8 @@
+import smtplib
+from email.message import EmailMessage
+
 import pandas as pd
 import matplotlib.pyplot as plt
-import yagmail
 
 # Lê vendas
 df = pd.read_csv("vendas.csv")
@@ -16,11 +18,15 @@ EMAIL = "seu_email@gmail.com"
 APP_PASSWORD = "sua_senha_app"
 DESTINATARIO = "destinatario@gmail.com"
 
-yag = yagmail.SMTP(EMAIL, APP_PASSWORD)
-yag.send(
-    to=DESTINATARIO,
-    subject="Relatório Automático",
-    contents="Segue o relatório em anexo.",
-    attachments="grafico_vendas.png"
-)
+mensagem = EmailMessage()
+mensagem["From"] = EMAIL
+mensagem["To"] = DESTINATARIO
+mensagem["Subject"] = "Relatório Automático"
+mensagem.set_content("Segue o relatório em anexo.")
+with open("grafico_vendas.png", "rb") as f:
+    mensagem.add_attachment(f.read(), maintype="image", subtype="png", filename="grafico_vendas.png")
+
+with smtplib.SMTP_SSL("smtp.gmail.com", 465) as smtp:
+    smtp.login(EMAIL, APP_PASSWORD)
+    smtp.send_message(mensagem)
 print("✅ E-mail enviado com sucesso!")
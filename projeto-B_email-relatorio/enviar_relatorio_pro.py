@@ -4,26 +4,45 @@ Autor: Seu Nome
 Data: 2025-01-07
 
 Funcionalidades:
-- Geração de múltiplos tipos de gráficos
-- Templates HTML profissionais para email
+- Geração de múltiplos tipos de gráficos (em paralelo, um processo por gráfico)
+- Cache de gráficos: dados e especificação inalterados reaproveitam as imagens
+- Templates HTML profissionais para email, com gráficos otimizados embutidos (CID)
+- Envio por conexões SMTP reaproveitadas, em paralelo e com limite de taxa
+- Caixa de saída persistente: falhas de envio são reenviadas sem refazer o relatório
+- Relatórios por segmento (região, gerente...) a partir de uma única leitura dos dados
 - Configuração segura via variáveis de ambiente
-- Agendamento automático de envios
+- Agendamento automático de envios (cron, sem execuções sobrepostas e com recuperação)
 - Logging detalhado e tratamento de erros
 """
 
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import yagmail
 import os
 from datetime import datetime, timedelta
 import logging
 import json
 from pathlib import Path
 from dotenv import load_dotenv
-import schedule
 import time
 import sys
+import re
+
+# Raiz do repositório no path para os módulos compartilhados (comum/); os módulos
+# do projeto importados abaixo dependem disso e não repetem a configuração
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from agendador import Agendador
+from cache_graficos import PASTA_CACHE, CacheGraficos
+from entrega import de_ambiente, montar_mensagem
+from estatisticas import estatisticas_por_grupo
+from graficos import ESTILO, GRAFICOS_PADRAO, PALETA, renderizar_graficos, renderizar_lote
+from imagens import LARGURA_PX, OtimizadorImagens, ajustar_resolucao
+from outbox import ARQUIVO_OUTBOX, Outbox
+
+from comum.cache_colunar import ler_csv
+from comum.esquema import aplicar_esquema, formatar_bytes, opcoes_leitura, resumo_memoria, validar_esquema
+from comum.logs import configurar_logging
+from comum.templates import carregar_template
+
+PASTA_TEMPLATES = Path(__file__).resolve().parent / "templates"
 
 class EmailReportSender:
     def __init__(self):
@@ -31,19 +50,36 @@ class EmailReportSender:
         self.setup_logging()
         load_dotenv()  # Carrega variáveis do arquivo .env
         self.validate_environment()
+        self.config = self.load_config()
+        self.esquema = self.config.get("schema")
+        self.outbox = self.open_outbox()
+        imagens = self.config.get("imagens", {})
+        self.otimizador = OtimizadorImagens(imagens.get("formato", "png"), imagens.get("cores", 256))
         
     def setup_logging(self):
-        """Configura sistema de logging."""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler('email_reports.log'),
-                logging.StreamHandler(sys.stdout)
-            ]
-        )
+        """Configura sistema de logging (fila com thread de escrita, ver comum.logs)."""
+        configurar_logging('email_reports.log')
         self.logger = logging.getLogger(__name__)
         
+    def load_config(self, config_file="config.json"):
+        """Carrega o config.json (esquema dos dados e gráficos), se existir."""
+        try:
+            if not Path(config_file).exists():
+                return {}
+            with open(config_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            self.logger.error(f"Erro ao carregar configurações: {e}")
+            raise
+            
+    def open_outbox(self):
+        """Abre a caixa de saída persistente (SQLite) conforme o config.json."""
+        config = self.config.get("outbox", {})
+        return Outbox(config.get("arquivo", ARQUIVO_OUTBOX),
+                      config.get("tentativas", 5),
+                      config.get("espera_inicial_s", 60),
+                      config.get("espera_maxima_s", 3600))
+            
     def validate_environment(self):
         """Valida se todas as variáveis de ambiente necessárias estão configuradas."""
         required_vars = ['EMAIL_SENDER', 'EMAIL_PASSWORD', 'EMAIL_RECIPIENTS']
@@ -57,24 +93,33 @@ class EmailReportSender:
             self.logger.info("EMAIL_RECIPIENTS=destinatario1@email.com,destinatario2@email.com")
             raise ValueError("Configuração de email incompleta")
             
-    def load_sales_data(self, file_path="vendas.csv"):
-        """Carrega e valida dados de vendas."""
+    def load_sales_data(self, file_path="vendas.csv", extra_columns=()):
+        """Carrega e valida dados de vendas (`extra_columns` são lidas como categóricas)."""
         try:
             if not Path(file_path).exists():
                 raise FileNotFoundError(f"Arquivo não encontrado: {file_path}")
                 
-            df = pd.read_csv(file_path)
+            esquema = self.esquema
+            if esquema and extra_columns:
+                esquema = dict(esquema, dtypes=dict(esquema.get("dtypes", {}),
+                                                    **{c: "category" for c in extra_columns}))
+                if esquema.get("usecols"):
+                    esquema["usecols"] = list(dict.fromkeys(list(esquema["usecols"]) + list(extra_columns)))
+                
+            df = ler_csv(file_path, cache=os.getenv('CACHE_COLUNAR', '1') != '0',
+                         **opcoes_leitura(esquema))
+            df = aplicar_esquema(df, esquema)
             
             # Validações básicas
             if df.empty:
                 raise ValueError("Arquivo de vendas está vazio")
                 
-            required_columns = ['Cliente', 'Vendas']
-            missing_cols = set(required_columns) - set(df.columns)
-            if missing_cols:
-                raise ValueError(f"Colunas ausentes: {missing_cols}")
+            errors = validar_esquema(df, esquema, ['Cliente', 'Vendas', *extra_columns])
+            if errors:
+                raise ValueError('; '.join(errors))
                 
             self.logger.info(f"Dados carregados: {len(df)} registros")
+            self.logger.info(f"Memória dos dados: {resumo_memoria(df, file_path)}")
             return df
             
         except Exception as e:
@@ -82,253 +127,172 @@ class EmailReportSender:
             raise
             
     def generate_charts(self, df):
-        """Gera múltiplos gráficos profissionais."""
-        charts_generated = []
-        
-        # Configuração do estilo
-        plt.style.use('seaborn-v0_8')
-        sns.set_palette("husl")
+        """Gera múltiplos gráficos profissionais (renderizados em paralelo)."""
+        config = self.config.get("graficos", {})
+        especificacoes = self.chart_specs()
         
         try:
-            # 1. Gráfico de barras - Vendas por Cliente
-            fig, ax = plt.subplots(figsize=(12, 6))
-            bars = ax.bar(df['Cliente'], df['Vendas'], color=sns.color_palette("viridis", len(df)))
-            ax.set_title('Vendas por Cliente', fontsize=16, fontweight='bold', pad=20)
-            ax.set_xlabel('Cliente', fontsize=12)
-            ax.set_ylabel('Vendas (R$)', fontsize=12)
-            
-            # Adiciona valores nas barras
-            for bar in bars:
-                height = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2., height + height*0.01,
-                       f'R$ {height:,.0f}', ha='center', va='bottom', fontweight='bold')
-            
-            plt.xticks(rotation=45, ha='right')
-            plt.tight_layout()
-            chart1 = 'grafico_vendas_barras.png'
-            plt.savefig(chart1, dpi=300, bbox_inches='tight')
-            plt.close()
-            charts_generated.append(chart1)
-            
-            # 2. Gráfico de pizza - Distribuição de vendas
-            fig, ax = plt.subplots(figsize=(10, 8))
-            colors = sns.color_palette("Set3", len(df))
-            wedges, texts, autotexts = ax.pie(df['Vendas'], labels=df['Cliente'], 
-                                            autopct='%1.1f%%', colors=colors, startangle=90)
-            
-            # Melhora a formatação
-            for autotext in autotexts:
-                autotext.set_color('white')
-                autotext.set_fontweight('bold')
-                autotext.set_fontsize(10)
+            inicio = time.perf_counter()
+            resultados = renderizar_graficos(df, especificacoes, config.get("workers"),
+                                             config.get("modulos", []), self.create_chart_cache())
+            
+            # Falhas são reportadas por gráfico; os demais seguem no relatório
+            charts_generated = []
+            for resultado in resultados:
+                if resultado["erro"]:
+                    self.logger.error(f"Erro ao gerar gráfico {resultado['arquivo']}: {resultado['erro']}")
+                else:
+                    charts_generated.append(resultado["arquivo"])
+            if not charts_generated:
+                raise RuntimeError("Nenhum gráfico foi gerado")
                 
-            ax.set_title('Distribuição de Vendas por Cliente', fontsize=16, fontweight='bold', pad=20)
-            chart2 = 'grafico_vendas_pizza.png'
-            plt.savefig(chart2, dpi=300, bbox_inches='tight')
-            plt.close()
-            charts_generated.append(chart2)
-            
-            # 3. Gráfico de linha com tendência (simulado)
-            fig, ax = plt.subplots(figsize=(12, 6))
-            # Simula dados temporais para demonstração
-            dates = pd.date_range(start='2024-01-01', periods=len(df), freq='M')
-            ax.plot(dates, df['Vendas'].values, marker='o', linewidth=3, markersize=8)
-            ax.set_title('Evolução das Vendas ao Longo do Tempo', fontsize=16, fontweight='bold', pad=20)
-            ax.set_xlabel('Período', fontsize=12)
-            ax.set_ylabel('Vendas (R$)', fontsize=12)
-            ax.grid(True, alpha=0.3)
-            
-            # Formatação do eixo Y
-            ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'R$ {x:,.0f}'))
-            plt.xticks(rotation=45)
-            plt.tight_layout()
-            chart3 = 'grafico_vendas_linha.png'
-            plt.savefig(chart3, dpi=300, bbox_inches='tight')
-            plt.close()
-            charts_generated.append(chart3)
-            
-            self.logger.info(f"Gráficos gerados: {len(charts_generated)}")
+            do_cache = sum(1 for r in resultados if r["cache"])
+            self.logger.info(f"Gráficos gerados: {len(charts_generated)}/{len(resultados)} "
+                             f"({do_cache} do cache) em {time.perf_counter() - inicio:.2f}s")
             return charts_generated
             
         except Exception as e:
             self.logger.error(f"Erro ao gerar gráficos: {e}")
             raise
             
+    def chart_specs(self):
+        """Gráficos padrão + extras, no tamanho em pixels de exibição no email."""
+        imagens = self.config.get("imagens", {})
+        especificacoes = GRAFICOS_PADRAO + self.config.get("graficos", {}).get("extras", [])
+        return [ajustar_resolucao(spec, imagens.get("largura_px", LARGURA_PX), imagens.get("formato", "png"))
+                for spec in especificacoes]
+        
+    def create_chart_cache(self):
+        """Cache de gráficos conforme a seção "graficos" do config.json (None se desativado)."""
+        config = self.config.get("graficos", {})
+        if not config.get("cache", True):
+            return None
+        return CacheGraficos(config.get("cache_dir", PASTA_CACHE),
+                             int(config.get("cache_max_mb", 100) * 1024 * 1024),
+                             {"estilo": ESTILO, "paleta": PALETA})
+        
     def calculate_statistics(self, df):
         """Calcula estatísticas detalhadas dos dados."""
-        stats = {
-            'total_vendas': float(df['Vendas'].sum()),
-            'media_vendas': float(df['Vendas'].mean()),
-            'maior_venda': float(df['Vendas'].max()),
-            'menor_venda': float(df['Vendas'].min()),
-            'cliente_top': df.loc[df['Vendas'].idxmax(), 'Cliente'],
-            'total_clientes': len(df),
-            'data_relatorio': datetime.now().strftime('%d/%m/%Y %H:%M'),
-            'vendas_acima_media': len(df[df['Vendas'] > df['Vendas'].mean()]),
-            'percentual_top_cliente': float((df['Vendas'].max() / df['Vendas'].sum()) * 100)
-        }
-        return stats
+        return estatisticas_por_grupo(df)[None]
+        
+    def create_html_template(self, stats, images=()):
+        """Cria o HTML do email a partir de templates/ (`images`: pares (cid, nome) embutidos)."""
+        return self.create_html_batch([(stats, images)])[0]
+        
+    def create_html_batch(self, reports):
+        """HTML de vários relatórios ``[(stats, images)]`` em uma chamada.
         
-    def create_html_template(self, stats):
-        """Cria template HTML profissional para o email."""
-        html_template = f"""
-        <!DOCTYPE html>
-        <html lang="pt-BR">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>Relatório de Vendas</title>
-            <style>
-                body {{
-                    font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-                    line-height: 1.6;
-                    color: #333;
-                    max-width: 800px;
-                    margin: 0 auto;
-                    padding: 20px;
-                    background-color: #f8f9fa;
-                }}
-                .header {{
-                    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                    color: white;
-                    padding: 30px;
-                    border-radius: 10px;
-                    text-align: center;
-                    margin-bottom: 30px;
-                }}
-                .stats-grid {{
-                    display: grid;
-                    grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-                    gap: 20px;
-                    margin: 30px 0;
-                }}
-                .stat-card {{
-                    background: white;
-                    padding: 20px;
-                    border-radius: 10px;
-                    box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-                    text-align: center;
-                    border-left: 4px solid #667eea;
-                }}
-                .stat-value {{
-                    font-size: 2em;
-                    font-weight: bold;
-                    color: #667eea;
-                    margin: 10px 0;
-                }}
-                .stat-label {{
-                    color: #666;
-                    font-size: 0.9em;
-                    text-transform: uppercase;
-                    letter-spacing: 1px;
-                }}
-                .charts-section {{
-                    background: white;
-                    padding: 30px;
-                    border-radius: 10px;
-                    box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-                    margin: 30px 0;
-                }}
-                .footer {{
-                    text-align: center;
-                    margin-top: 30px;
-                    padding: 20px;
-                    background: #667eea;
-                    color: white;
-                    border-radius: 10px;
-                }}
-                .highlight {{
-                    background: #e3f2fd;
-                    padding: 15px;
-                    border-radius: 5px;
-                    border-left: 4px solid #2196f3;
-                    margin: 20px 0;
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <h1>📊 Relatório de Vendas</h1>
-                <p>Gerado automaticamente em {stats['data_relatorio']}</p>
-            </div>
-            
-            <div class="stats-grid">
-                <div class="stat-card">
-                    <div class="stat-value">R$ {stats['total_vendas']:,.2f}</div>
-                    <div class="stat-label">Total de Vendas</div>
-                </div>
-                <div class="stat-card">
-                    <div class="stat-value">R$ {stats['media_vendas']:,.2f}</div>
-                    <div class="stat-label">Média por Cliente</div>
-                </div>
-                <div class="stat-card">
-                    <div class="stat-value">{stats['total_clientes']}</div>
-                    <div class="stat-label">Total de Clientes</div>
-                </div>
-                <div class="stat-card">
-                    <div class="stat-value">{stats['percentual_top_cliente']:.1f}%</div>
-                    <div class="stat-label">Share do Top Cliente</div>
-                </div>
-            </div>
-            
-            <div class="highlight">
-                <h3>🏆 Destaque do Período</h3>
-                <p><strong>{stats['cliente_top']}</strong> foi o cliente com maior volume de vendas: 
-                <strong>R$ {stats['maior_venda']:,.2f}</strong></p>
-                <p>{stats['vendas_acima_media']} de {stats['total_clientes']} clientes ficaram acima da média.</p>
-            </div>
-            
-            <div class="charts-section">
-                <h3>📈 Análises Visuais</h3>
-                <p>Os gráficos detalhados estão em anexo para análise mais aprofundada.</p>
-            </div>
-            
-            <div class="footer">
-                <p>Relatório gerado automaticamente pelo Sistema de Análise de Vendas</p>
-                <p>Para dúvidas ou sugestões, entre em contato conosco.</p>
-            </div>
-        </body>
-        </html>
+        Os templates são lidos e compilados uma vez por processo; o CSS e o
+        cabeçalho são texto fixo e só os blocos de estatísticas variam.
         """
-        return html_template
+        email = carregar_template(PASTA_TEMPLATES / "email_relatorio.html")
+        segmento = carregar_template(PASTA_TEMPLATES / "email_segmento.html")
+        grafico = carregar_template(PASTA_TEMPLATES / "email_grafico.html")
+        anexos = carregar_template(PASTA_TEMPLATES / "email_anexos.html").renderizar()
         
-    def send_email(self, charts, stats):
-        """Envia email com relatório e gráficos."""
+        contextos = []
+        for stats, images in reports:
+            graficos = grafico.renderizar_lote([{"cid": cid, "nome": nome} for cid, nome in images])
+            contextos.append(dict(stats,
+                                  segmento=segmento.renderizar(stats) if stats.get('segmento') else "",
+                                  graficos="".join(graficos) if images else anexos))
+        return email.renderizar_lote(contextos)
+        
+    def send_email(self, charts, stats, report_id=None):
+        """Grava uma mensagem por destinatário na caixa de saída e envia a fila.
+
+        Sem `report_id`, o envio é identificado como manual do dia.
+        """
+        report_id = report_id or f"manual-{datetime.now():%Y-%m-%d}"
         try:
-            # Configurações do email
-            sender_email = os.getenv('EMAIL_SENDER')
-            sender_password = os.getenv('EMAIL_PASSWORD')
-            recipients = os.getenv('EMAIL_RECIPIENTS').split(',')
-            
-            # Cria conteúdo HTML
-            html_content = self.create_html_template(stats)
-            
-            # Configura cliente de email
-            yag = yagmail.SMTP(sender_email, sender_password)
-            
-            # Prepara anexos
-            attachments = charts.copy()
-            
-            # Envia email
-            subject = f"📊 Relatório de Vendas - {stats['data_relatorio']}"
-            
-            yag.send(
-                to=recipients,
-                subject=subject,
-                contents=html_content,
-                attachments=attachments
-            )
-            
-            self.logger.info(f"Email enviado com sucesso para {len(recipients)} destinatário(s)")
-            return True
+            recipients = [r.strip() for r in os.getenv('EMAIL_RECIPIENTS').split(',') if r.strip()]
+            self.queue_report(charts, stats, recipients, report_id)
+            self.process_outbox()
+            return self.outbox.situacao(report_id).keys() == {'enviada'}
             
         except Exception as e:
             self.logger.error(f"Erro ao enviar email: {e}")
             return False
             
-    def generate_and_send_report(self):
-        """Processo completo de geração e envio do relatório."""
+    def queue_report(self, charts, stats, recipients, report_id, images=None, html_content=None):
+        """Grava na caixa de saída uma mensagem do relatório para cada destinatário.
+        
+        `images` (de `prepare_images`) e `html_content` podem vir prontos
+        quando vários relatórios são preparados em lote.
+        """
+        sender_email = os.getenv('EMAIL_SENDER')
+        inline = self.config.get("imagens", {}).get("inline", True)
+        
+        if images is None:
+            images = self.prepare_images(charts)
+        if html_content is None:
+            html_content = self.create_html_template(stats, self.inline_images(images))
+        
+        titulo = f"Relatório de Vendas ({stats['segmento']})" if stats.get('segmento') else "Relatório de Vendas"
+        subject = f"📊 {titulo} - {stats['data_relatorio']}"
+        if inline:
+            message = montar_mensagem(sender_email, recipients[0], subject, html_content,
+                                      inline=[(i["cid"], i["dados"], i["maintype"], i["subtype"]) for i in images])
+        else:
+            message = montar_mensagem(sender_email, recipients[0], subject, html_content,
+                                      [(i["nome"], i["dados"], i["maintype"], i["subtype"]) for i in images])
+        
+        # Antes: imagens renderizadas sem otimização, em base64 (4/3 do tamanho)
+        tamanho = len(message.as_bytes())
+        sem_otimizacao = tamanho + sum(i["bytes_originais"] - len(i["dados"]) for i in images) * 4 // 3
+        self.logger.info(f"Tamanho por mensagem ({report_id}): {formatar_bytes(sem_otimizacao)} "
+                         f"sem otimização → {formatar_bytes(tamanho)}")
+        
+        # A mensagem é codificada uma vez; por destinatário muda apenas o cabeçalho To.
+        # A chave (relatório + destinatário) evita duplicatas
+        for recipient in recipients:
+            del message["To"]
+            message["To"] = recipient
+            if not self.outbox.enfileirar(report_id, message):
+                self.logger.info(f"Relatório {report_id} para {recipient} já está na caixa de saída")
+            
+    def prepare_images(self, charts):
+        """Imagens otimizadas uma vez (o mesmo gráfico reaproveita bytes e Content-ID)."""
+        return [self.otimizador.preparar(chart) for chart in charts]
+        
+    def inline_images(self, images):
+        """Pares (cid, nome) para o HTML, ou nenhum se as imagens vão como anexo."""
+        if not self.config.get("imagens", {}).get("inline", True):
+            return ()
+        return [(image["cid"], image["nome"]) for image in images]
+        
+    def process_outbox(self):
+        """Envia as mensagens da caixa de saída cujo horário de tentativa chegou."""
+        try:
+            entregador = de_ambiente(os.getenv('EMAIL_SENDER'), os.getenv('EMAIL_PASSWORD'))
+            try:
+                contagem = self.outbox.drenar(entregador)
+            finally:
+                entregador.fechar()
+            
+            if any(contagem.values()):
+                self.logger.info(f"Caixa de saída: {contagem['enviadas']} enviada(s), "
+                                 f"{contagem['adiadas']} adiada(s), {contagem['falharam']} com falha definitiva")
+            self.outbox.limpar(self.config.get("outbox", {}).get("manter_dias", 30))
+            return contagem
+            
+        except Exception as e:
+            self.logger.error(f"Erro ao processar caixa de saída: {e}")
+            return None
+            
+    def generate_and_send_report(self, report_type="relatorio"):
+        """Processo completo de geração e envio do relatório (um por tipo e dia)."""
         try:
+            report_id = f"{report_type}-{datetime.now():%Y-%m-%d}"
+            
+            # Relatório já na caixa de saída: só reenvia o que estiver pendente
+            situacao = self.outbox.situacao(report_id)
+            if situacao and 'falhou' not in situacao:
+                self.process_outbox()
+                situacao = self.outbox.situacao(report_id)
+                self.logger.info(f"Relatório {report_id} já gerado; situação dos envios: {situacao}")
+                return situacao.keys() == {'enviada'}
+            
             self.logger.info("Iniciando geração de relatório automatizado")
             
             # Carrega dados
@@ -341,46 +305,147 @@ class EmailReportSender:
             stats = self.calculate_statistics(df)
             
             # Envia email
-            success = self.send_email(charts, stats)
+            success = self.send_email(charts, stats, report_id)
             
             if success:
                 self.logger.info("Relatório enviado com sucesso!")
                 return True
             else:
-                self.logger.error("Falha no envio do relatório")
+                self.logger.error("Falha no envio do relatório (pendências seguem na caixa de saída)")
                 return False
                 
         except Exception as e:
             self.logger.error(f"Erro no processo de relatório: {e}")
             return False
             
+    def generate_segment_reports(self, report_type="segmentos"):
+        """Um relatório por segmento (seção "segmentos" do config.json) com uma leitura dos dados.
+        
+        Os dados são lidos e agrupados uma vez, as estatísticas de todos os
+        segmentos saem de um único groupby, os gráficos de todos os segmentos
+        são desenhados no mesmo pool de processos e as mensagens seguem pela
+        mesma caixa de saída.
+        """
+        try:
+            config = self.config.get("segmentos", {})
+            column = config.get("coluna")
+            recipients = config.get("destinatarios", {})
+            if not column or not recipients:
+                raise ValueError('Configure "coluna" e "destinatarios" na seção "segmentos" do config.json')
+            report_prefix = f"{report_type}-{datetime.now():%Y-%m-%d}/"
+            
+            # Relatórios já na caixa de saída: só reenvia o que estiver pendente
+            situacao = self.outbox.situacao(report_prefix, prefixo=True)
+            if situacao and 'falhou' not in situacao:
+                self.process_outbox()
+                situacao = self.outbox.situacao(report_prefix, prefixo=True)
+                self.logger.info(f"Relatórios {report_prefix} já gerados; situação dos envios: {situacao}")
+                return situacao.keys() == {'enviada'}
+            
+            inicio = time.perf_counter()
+            df = self.load_sales_data(extra_columns=[column])
+            
+            # Estatísticas de todos os segmentos em uma passada
+            stats_by_segment = estatisticas_por_grupo(df, column)
+            segments = [s for s in stats_by_segment if recipients.get(str(s))]
+            sem_destinatario = len(stats_by_segment) - len(segments)
+            if sem_destinatario:
+                self.logger.warning(f"{sem_destinatario} segmento(s) sem destinatários serão ignorados")
+            if not segments:
+                raise ValueError(f"Nenhum segmento de '{column}' tem destinatários configurados")
+            
+            charts = self.generate_segment_charts(df, column, segments, config)
+            
+            for segment in segments:
+                if not charts[segment]:
+                    self.logger.error(f"Segmento {segment}: nenhum gráfico gerado, relatório não enviado")
+            segments = [segment for segment in segments if charts[segment]]
+            
+            # HTML de todos os segmentos em um lote
+            stats = {segment: dict(stats_by_segment[segment], segmento=segment) for segment in segments}
+            images = {segment: self.prepare_images(charts[segment]) for segment in segments}
+            htmls = self.create_html_batch([(stats[segment], self.inline_images(images[segment]))
+                                            for segment in segments])
+            
+            for segment, html_content in zip(segments, htmls):
+                segment_recipients = recipients[str(segment)]
+                if isinstance(segment_recipients, str):
+                    segment_recipients = [r.strip() for r in segment_recipients.split(',') if r.strip()]
+                self.queue_report(charts[segment], stats[segment], segment_recipients,
+                                  f"{report_prefix}{segment}", images[segment], html_content)
+            
+            self.logger.info(f"{len(segments)} relatório(s) por '{column}' preparados em "
+                             f"{time.perf_counter() - inicio:.2f}s")
+            self.process_outbox()
+            situacao = self.outbox.situacao(report_prefix, prefixo=True)
+            if situacao.keys() != {'enviada'}:
+                self.logger.error(f"Envio segmentado incompleto: {situacao}")
+                return False
+            self.logger.info("Relatórios por segmento enviados com sucesso!")
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"Erro no envio segmentado: {e}")
+            return False
+            
+    def generate_segment_charts(self, df, column, segments, config):
+        """Gráficos de todos os segmentos em um único pool; retorna {segmento: [arquivos]}."""
+        graficos = self.config.get("graficos", {})
+        especificacoes = self.chart_specs()
+        pasta = Path(config.get("pasta", "segmentos"))
+        
+        groups = dict(tuple(df.groupby(column, observed=True, sort=False)))
+        trabalhos, donos = [], []
+        for i, segment in enumerate(segments):
+            slug = re.sub(r'[^\w.-]+', '_', str(segment))
+            destino = pasta / f"{i:04d}_{slug}"
+            destino.mkdir(parents=True, exist_ok=True)
+            for spec in especificacoes:
+                spec = dict(spec, arquivo=str(destino / Path(spec["arquivo"]).name))
+                trabalhos.append((groups[segment], spec))
+                donos.append(segment)
+        
+        inicio = time.perf_counter()
+        resultados = renderizar_lote(trabalhos, graficos.get("workers"), graficos.get("modulos", []),
+                                     self.create_chart_cache())
+        
+        charts = {segment: [] for segment in segments}
+        for segment, resultado in zip(donos, resultados):
+            if resultado["erro"]:
+                self.logger.error(f"Erro ao gerar gráfico {resultado['arquivo']}: {resultado['erro']}")
+            else:
+                charts[segment].append(resultado["arquivo"])
+        do_cache = sum(1 for r in resultados if r["cache"])
+        self.logger.info(f"Gráficos dos segmentos: {len(resultados)} ({do_cache} do cache) "
+                         f"em {time.perf_counter() - inicio:.2f}s")
+        return charts
+            
     def schedule_reports(self):
-        """Agenda envios automáticos de relatórios."""
-        # Agenda para toda segunda-feira às 9h
-        schedule.every().monday.at("09:00").do(self.generate_and_send_report)
+        """Agenda envios automáticos de relatórios (expressões cron, ver agendador.py)."""
+        config = self.config.get("agendamento", {})
+        agendador = Agendador(config.get("estado", "agendamento.json"), config.get("workers", 2))
         
-        # Agenda para todo dia 1º do mês às 8h
-        schedule.every().day.at("08:00").do(self._check_monthly_report)
+        # Semanal: segunda-feira às 9h; mensal: dia 1º às 8h
+        agendador.adicionar("semanal", config.get("semanal", "0 9 * * 1"), self.generate_and_send_report)
+        agendador.adicionar("mensal", config.get("mensal", "0 8 1 * *"),
+                            lambda: self.generate_and_send_report("mensal"))
+        
+        # Reenvia mensagens pendentes da caixa de saída (sem recuperar execuções perdidas)
+        agendador.adicionar("outbox", config.get("outbox", "* * * * *"), self.process_outbox, recuperar=False)
         
         self.logger.info("Agendamentos configurados:")
-        self.logger.info("- Relatório semanal: Segunda-feira às 9h")
-        self.logger.info("- Relatório mensal: Todo dia 1º às 8h")
+        for nome, (expressao, _) in agendador.tarefas.items():
+            self.logger.info(f"- {nome}: '{expressao.texto}' (próxima: {agendador.estado[nome]['proxima']})")
         
         print("Sistema de relatórios automáticos iniciado...")
         print("Pressione Ctrl+C para parar")
         
         try:
-            while True:
-                schedule.run_pending()
-                time.sleep(60)  # Verifica a cada minuto
+            agendador.executar()
         except KeyboardInterrupt:
             self.logger.info("Sistema de agendamento interrompido pelo usuário")
-            
-    def _check_monthly_report(self):
-        """Verifica se é o primeiro dia do mês para envio mensal."""
-        if datetime.now().day == 1:
-            self.logger.info("Enviando relatório mensal")
-            self.generate_and_send_report()
+        finally:
+            agendador.parar()
 
 if __name__ == "__main__":
     # Cria instância do sistema
@@ -390,6 +455,10 @@ if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] == "--schedule":
         # Modo agendamento
         email_system.schedule_reports()
+    elif len(sys.argv) > 1 and sys.argv[1] == "--segmentos":
+        # Um relatório por segmento
+        if not email_system.generate_segment_reports():
+            sys.exit(1)
     else:
         # Envio único
         success = email_system.generate_and_send_report()
@@ -0,0 +1,49 @@
+"""
+Estatísticas do email calculadas por grupo em uma única passada.
+
+`estatisticas_por_grupo` obtém todas as métricas do email (soma, média,
+máximo, mínimo, contagem, cliente do maior valor e vendas acima da média)
+com `comum.estatisticas.calcular` e as formata para o template. O
+relatório global é o caso sem grupos, então o envio segmentado (um
+relatório por região, gerente...) custa uma passada sobre os dados, não
+uma por segmento.
+"""
+
+from datetime import datetime
+
+from comum.estatisticas import calcular
+
+
+def contexto_email(resultado, clientes, data_relatorio):
+    """Estatísticas no formato do template do email.
+
+    Segmentos sem vendas válidas (tudo nulo) saem com cliente "-" e valores
+    zerados; com soma zero, o percentual do top cliente é 0.
+    """
+    sem_dados = resultado.posicao_maximo is None
+    maximo = 0.0 if sem_dados else resultado.maximo
+    return {
+        'total_vendas': resultado.soma,
+        'media_vendas': resultado.media,
+        'maior_venda': maximo,
+        'menor_venda': 0.0 if sem_dados else resultado.minimo,
+        'cliente_top': '-' if sem_dados else clientes.iloc[resultado.posicao_maximo],
+        'total_clientes': resultado.contagem,
+        'data_relatorio': data_relatorio,
+        'vendas_acima_media': resultado.acima_media or 0,
+        'percentual_top_cliente': maximo / resultado.soma * 100 if resultado.soma else 0.0,
+    }
+
+
+def estatisticas_por_grupo(df, coluna=None):
+    """Estatísticas por valor de `coluna`: ``{segmento: stats}``.
+
+    Sem `coluna`, retorna ``{None: stats}`` para o DataFrame inteiro.
+    """
+    data_relatorio = datetime.now().strftime('%d/%m/%Y %H:%M')
+    if not coluna:
+        return {None: contexto_email(calcular(df['Vendas'], acima_media=True), df['Cliente'], data_relatorio)}
+    return {
+        segmento: contexto_email(resultado, df['Cliente'], data_relatorio)
+        for segmento, resultado in calcular(df['Vendas'], df[coluna], acima_media=True).items()
+    }
@@ -0,0 +1,249 @@
+"""
+Renderização dos gráficos do relatório em um pool de processos.
+
+Cada gráfico é descrito por uma especificação (dict) com ``tipo``,
+``arquivo`` e opções como ``x``, ``y``, ``titulo``, ``figsize`` e ``dpi``:
+
+    {"tipo": "barras", "arquivo": "grafico_regiao.png",
+     "x": "Regiao", "y": "Vendas", "titulo": "Vendas por Região"}
+
+Os tipos ficam em `TIPOS` e novos tipos podem ser registrados com
+``@tipo_grafico("nome")`` em um módulo listado em ``"modulos"`` na seção
+``"graficos"`` do config.json (o módulo é importado também nos processos).
+
+Antes de desenhar, os dados de cada gráfico passam pela redução do tipo
+(`comum.reducao`): barras e pizzas ficam com as ``top_n`` maiores
+categorias + "Outros" e linhas com no máximo ``pontos`` pontos (LTTB).
+Só os dados reduzidos são enviados aos processos e entram no cache.
+
+O matplotlib não é thread-safe, então cada gráfico é desenhado em um
+processo separado com o backend Agg. O tempo total fica próximo ao do
+gráfico mais lento; falhas são devolvidas por gráfico e a lista de
+resultados segue a ordem das especificações. Com um `CacheGraficos`, os
+gráficos cujos dados e especificação não mudaram são copiados do cache e
+o pool só é criado se algum precisar ser desenhado. `renderizar_lote`
+desenha gráficos de vários DataFrames (ex.: um por segmento) no mesmo pool.
+"""
+
+import importlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+
+import matplotlib
+import pandas as pd
+
+from cache_graficos import hash_dados
+
+from comum.reducao import PONTOS_SERIE, TOP_N, lttb, reduzir_serie, top_n
+
+ESTILO = 'seaborn-v0_8'
+PALETA = 'husl'
+
+GRAFICOS_PADRAO = [
+    {"tipo": "barras", "arquivo": "grafico_vendas_barras.png", "figsize": [12, 6], "dpi": 300},
+    {"tipo": "pizza", "arquivo": "grafico_vendas_pizza.png", "figsize": [10, 8], "dpi": 300},
+    {"tipo": "linha", "arquivo": "grafico_vendas_linha.png", "figsize": [12, 6], "dpi": 300},
+]
+
+TOP_N_PIZZA = 8
+MARCADORES_ATE = 50
+
+TIPOS = {}
+REDUCOES = {}
+
+
+def tipo_grafico(nome, reducao=None):
+    """Registra uma função ``(df, spec, fig, ax)`` como tipo de gráfico.
+
+    `reducao` é uma função opcional ``(df, spec) -> df`` aplicada antes do
+    envio ao processo que desenha.
+    """
+    def registrar(funcao):
+        TIPOS[nome] = funcao
+        REDUCOES[nome] = reducao
+        return funcao
+    return registrar
+
+
+def reduzir_categorias(df, spec, n=TOP_N):
+    """Top-N categorias de `x` por soma de `y`, o restante em "Outros"."""
+    return top_n(df, spec.get("x", "Cliente"), spec.get("y", "Vendas"), spec.get("top_n", n))
+
+
+def reduzir_pizza(df, spec):
+    return reduzir_categorias(df, spec, TOP_N_PIZZA)
+
+
+def reduzir_linha(df, spec):
+    """LTTB até `pontos`; sem `x`, usa a posição da linha (mantida no índice)."""
+    pontos = spec.get("pontos", PONTOS_SERIE)
+    if spec.get("x"):
+        return reduzir_serie(df, spec["x"], spec.get("y", "Vendas"), pontos)
+    df = df.reset_index(drop=True)
+    return df.iloc[lttb(df.index, df[spec.get("y", "Vendas")], pontos)]
+
+
+@tipo_grafico("barras", reducao=reduzir_categorias)
+def grafico_barras(df, spec, fig, ax):
+    import seaborn as sns
+
+    x, y = spec.get("x", "Cliente"), spec.get("y", "Vendas")
+    bars = ax.bar(df[x], df[y], color=sns.color_palette("viridis", len(df)))
+    ax.set_title(spec.get("titulo", 'Vendas por Cliente'), fontsize=16, fontweight='bold', pad=20)
+    ax.set_xlabel(x, fontsize=12)
+    ax.set_ylabel('Vendas (R$)' if y == 'Vendas' else y, fontsize=12)
+
+    # Adiciona valores nas barras
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height + height*0.01,
+                f'R$ {height:,.0f}', ha='center', va='bottom', fontweight='bold')
+
+    for rotulo in ax.get_xticklabels():
+        rotulo.set_rotation(45)
+        rotulo.set_ha('right')
+    fig.tight_layout()
+
+
+@tipo_grafico("pizza", reducao=reduzir_pizza)
+def grafico_pizza(df, spec, fig, ax):
+    import seaborn as sns
+
+    x, y = spec.get("x", "Cliente"), spec.get("y", "Vendas")
+    colors = sns.color_palette("Set3", len(df))
+    wedges, texts, autotexts = ax.pie(df[y], labels=df[x],
+                                      autopct='%1.1f%%', colors=colors, startangle=90)
+
+    # Melhora a formatação
+    for autotext in autotexts:
+        autotext.set_color('white')
+        autotext.set_fontweight('bold')
+        autotext.set_fontsize(10)
+
+    ax.set_title(spec.get("titulo", 'Distribuição de Vendas por Cliente'),
+                 fontsize=16, fontweight='bold', pad=20)
+
+
+@tipo_grafico("linha", reducao=reduzir_linha)
+def grafico_linha(df, spec, fig, ax):
+    from matplotlib.ticker import FuncFormatter
+
+    y = spec.get("y", "Vendas")
+    rotulo_x = 'Período'
+    if spec.get("x"):
+        datas = df[spec["x"]]
+    elif df.index.equals(pd.RangeIndex(len(df))):
+        # Simula dados temporais para demonstração
+        datas = pd.date_range(start='2024-01-01', periods=len(df), freq='M')
+    else:
+        # Série reduzida: o índice guarda a posição original de cada ponto
+        datas, rotulo_x = df.index, 'Registro'
+    marcador = 'o' if len(df) <= MARCADORES_ATE else None
+    ax.plot(datas, df[y].values, marker=marcador, linewidth=3, markersize=8)
+    ax.set_title(spec.get("titulo", 'Evolução das Vendas ao Longo do Tempo'),
+                 fontsize=16, fontweight='bold', pad=20)
+    ax.set_xlabel(rotulo_x, fontsize=12)
+    ax.set_ylabel('Vendas (R$)' if y == 'Vendas' else y, fontsize=12)
+    ax.grid(True, alpha=0.3)
+
+    # Formatação do eixo Y
+    ax.yaxis.set_major_formatter(FuncFormatter(lambda x, p: f'R$ {x:,.0f}'))
+    for rotulo in ax.get_xticklabels():
+        rotulo.set_rotation(45)
+    fig.tight_layout()
+
+
+def _iniciar_processo(modulos):
+    """Prepara um processo do pool: backend Agg, estilo e tipos extras."""
+    matplotlib.use('Agg', force=True)
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    plt.style.use(ESTILO)
+    sns.set_palette(PALETA)
+    for modulo in modulos:
+        importlib.import_module(modulo)
+
+
+def renderizar(df, spec):
+    """Desenha e salva um gráfico; retorna {arquivo, erro, tempo_s}."""
+    import matplotlib.pyplot as plt
+
+    inicio = time.perf_counter()
+    erro = None
+    try:
+        fig, ax = plt.subplots(figsize=tuple(spec.get("figsize", (12, 6))))
+        try:
+            TIPOS[spec["tipo"]](df, spec, fig, ax)
+            fig.savefig(spec["arquivo"], dpi=spec.get("dpi", 300), bbox_inches='tight')
+        finally:
+            plt.close(fig)
+    except Exception as e:
+        erro = f"{type(e).__name__}: {e}"
+    return {"arquivo": spec["arquivo"], "erro": erro, "tempo_s": round(time.perf_counter() - inicio, 3)}
+
+
+def validar_especificacoes(especificacoes):
+    """Verifica tipos e nomes de arquivo, levantando ValueError se inválidos."""
+    arquivos = [spec.get("arquivo") for spec in especificacoes]
+    for spec in especificacoes:
+        if spec.get("tipo") not in TIPOS:
+            raise ValueError(f"Tipo de gráfico desconhecido: {spec.get('tipo')!r}")
+        if not spec.get("arquivo"):
+            raise ValueError(f"Gráfico {spec['tipo']} sem 'arquivo'")
+    if len(set(arquivos)) != len(arquivos):
+        raise ValueError("Dois gráficos com o mesmo arquivo de saída")
+
+
+def preparar_dados(df, spec):
+    """Dados que o gráfico realmente desenha (após a redução do tipo)."""
+    reducao = REDUCOES.get(spec["tipo"])
+    return reducao(df, spec) if reducao else df
+
+
+def renderizar_graficos(df, especificacoes, workers=None, modulos=(), cache=None):
+    """Renderiza os gráficos em paralelo; resultados na ordem de `especificacoes`."""
+    return renderizar_lote([(df, spec) for spec in especificacoes], workers, modulos, cache)
+
+
+def renderizar_lote(trabalhos, workers=None, modulos=(), cache=None):
+    """Renderiza pares ``(df, spec)`` em um único pool; resultados na ordem de entrada.
+
+    Usado no envio segmentado: os gráficos de todos os segmentos dividem os
+    mesmos processos em vez de criar um pool por segmento.
+    """
+    for modulo in modulos:
+        importlib.import_module(modulo)
+    especificacoes = [spec for _, spec in trabalhos]
+    validar_especificacoes(especificacoes)
+    dados = [preparar_dados(df, spec) for df, spec in trabalhos]
+
+    resultados = [None] * len(especificacoes)
+    chaves = {}
+    if cache is not None:
+        for i, spec in enumerate(especificacoes):
+            chaves[i] = cache.chave(hash_dados(dados[i]), spec, TIPOS[spec["tipo"]])
+            if cache.obter(chaves[i], spec["arquivo"]):
+                resultados[i] = {"arquivo": spec["arquivo"], "erro": None, "tempo_s": 0.0, "cache": True}
+
+    pendentes = [i for i, resultado in enumerate(resultados) if resultado is None]
+    if pendentes:
+        workers = min(len(pendentes), workers or os.cpu_count())
+        with ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_processo,
+                                 initargs=(list(modulos),)) as executor:
+            futuros = {i: executor.submit(renderizar, dados[i], especificacoes[i]) for i in pendentes}
+            for i, futuro in futuros.items():
+                try:
+                    resultados[i] = dict(futuro.result(), cache=False)
+                except Exception as e:
+                    # Processo do pool encerrado de forma anormal
+                    resultados[i] = {"arquivo": especificacoes[i]["arquivo"], "cache": False,
+                                     "erro": f"{type(e).__name__}: {e}", "tempo_s": None}
+                if cache is not None and not resultados[i]["erro"]:
+                    cache.guardar(chaves[i], resultados[i]["arquivo"])
+        if cache is not None:
+            # Uma varredura do diretório por lote, não uma por imagem gravada
+            cache.limitar()
+    return resultados
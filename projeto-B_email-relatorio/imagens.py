@@ -0,0 +1,88 @@
+"""
+Otimização das imagens enviadas no email.
+
+Os gráficos são renderizados no tamanho em que serão vistos (`largura_px`,
+ver `ajustar_resolucao`) e, antes de entrar na mensagem, passam por:
+
+- ``png``: quantização para uma paleta de até `cores` cores (gráficos têm
+  poucas cores distintas) e compressão máxima;
+- ``webp``: WebP sem perdas (menor, mas nem todo cliente de email exibe);
+- ``svg``: vetorial, gerado diretamente pelo matplotlib e enviado como está.
+
+Cada imagem é otimizada uma única vez por conteúdo: o mesmo gráfico em
+várias mensagens (ou segmentos) reaproveita os bytes e o Content-ID, que é
+derivado do hash da imagem.
+"""
+
+import hashlib
+import io
+import threading
+from pathlib import Path
+
+from PIL import Image
+
+FORMATOS = ("png", "webp", "svg")
+LARGURA_PX = 1200
+CORES = 256
+
+
+def ajustar_resolucao(spec, largura_px=LARGURA_PX, formato="png"):
+    """Especificação com dpi para `largura_px` pixels de largura (e extensão do formato)."""
+    spec = dict(spec, dpi=largura_px / spec.get("figsize", (12, 6))[0])
+    if formato == "svg":
+        spec["arquivo"] = str(Path(spec["arquivo"]).with_suffix(".svg"))
+    return spec
+
+
+def otimizar(dados, formato="png", cores=CORES):
+    """Recomprime uma imagem PNG; retorna (bytes, subtype MIME)."""
+    if formato == "svg" or dados.lstrip().startswith((b"<?xml", b"<svg")):
+        return dados, "svg+xml"
+    imagem = Image.open(io.BytesIO(dados))
+    if imagem.mode in ("RGBA", "LA", "P"):
+        # Sem transparência: compõe sobre fundo branco
+        fundo = Image.new("RGB", imagem.size, "white")
+        fundo.paste(imagem.convert("RGBA"), mask=imagem.convert("RGBA").getchannel("A"))
+        imagem = fundo
+    else:
+        imagem = imagem.convert("RGB")
+
+    saida = io.BytesIO()
+    if formato == "webp":
+        imagem.save(saida, "WEBP", lossless=True, method=4)
+        subtype = "webp"
+    else:
+        imagem.quantize(colors=cores, method=Image.Quantize.MEDIANCUT).save(saida, "PNG", optimize=True)
+        subtype = "png"
+    otimizada = saida.getvalue()
+    # Nunca aumenta a imagem
+    if len(otimizada) >= len(dados) and subtype == "png":
+        return dados, "png"
+    return otimizada, subtype
+
+
+class OtimizadorImagens:
+    """Otimiza imagens de arquivos com cache por conteúdo (cada imagem é codificada uma vez)."""
+
+    def __init__(self, formato="png", cores=CORES):
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato de imagem desconhecido: {formato!r} (use {', '.join(FORMATOS)})")
+        self.formato = formato
+        self.cores = cores
+        self.cache = {}
+        self.trava = threading.Lock()
+
+    def preparar(self, arquivo):
+        """Imagem pronta para o email: {cid, nome, dados, maintype, subtype, bytes_originais}."""
+        original = Path(arquivo).read_bytes()
+        digest = hashlib.sha256(original).hexdigest()
+        with self.trava:
+            pronta = self.cache.get(digest)
+        if pronta is None:
+            dados, subtype = otimizar(original, self.formato, self.cores)
+            pronta = {"cid": f"{digest[:24]}@relatorio", "dados": dados, "maintype": "image",
+                      "subtype": subtype, "bytes_originais": len(original)}
+            with self.trava:
+                self.cache[digest] = pronta
+        extensao = ".svg" if pronta["subtype"] == "svg+xml" else f".{pronta['subtype']}"
+        return dict(pronta, nome=Path(arquivo).with_suffix(extensao).name)
@@ -0,0 +1,174 @@
+"""
+Caixa de saída persistente (SQLite) para os emails do relatório.
+
+As mensagens são gravadas já renderizadas (MIME completo) antes do envio.
+Se o envio falhar, apenas a mensagem é reenviada depois, com espera
+exponencial (`espera_inicial` × 2^(tentativas-1), limitada a
+`espera_maxima`), sem reler os dados nem redesenhar os gráficos. Após
+`tentativas` falhas a mensagem fica como ``falhou``.
+
+Cada mensagem tem uma chave de idempotência (relatório + destinatário):
+enfileirar de novo a mesma chave não cria outra mensagem, e o Message-ID é
+derivado da chave. Mensagens em envio ficam reservadas por `RESERVA_S`
+segundos; se o processo cair no meio do envio, voltam à fila após esse
+prazo. O banco sobrevive a reinícios do processo.
+
+Situações: ``pendente`` → ``enviando`` → ``enviada`` | ``pendente`` (nova
+tentativa) | ``falhou``.
+"""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from email import policy
+from email.parser import BytesParser
+
+logger = logging.getLogger(__name__)
+
+ARQUIVO_OUTBOX = "outbox.db"
+TENTATIVAS = 5
+ESPERA_INICIAL_S = 60
+ESPERA_MAXIMA_S = 3600
+RESERVA_S = 600
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS mensagens (
+    chave TEXT PRIMARY KEY,
+    relatorio TEXT NOT NULL,
+    destinatario TEXT NOT NULL,
+    mime BLOB NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pendente',
+    tentativas INTEGER NOT NULL DEFAULT 0,
+    proxima_tentativa REAL NOT NULL,
+    ultimo_erro TEXT,
+    criada_em REAL NOT NULL,
+    enviada_em REAL
+);
+CREATE INDEX IF NOT EXISTS mensagens_fila ON mensagens (status, proxima_tentativa);
+"""
+
+
+class Outbox:
+    """Fila persistente de mensagens MIME com novas tentativas e idempotência."""
+
+    def __init__(self, arquivo=ARQUIVO_OUTBOX, tentativas=TENTATIVAS,
+                 espera_inicial=ESPERA_INICIAL_S, espera_maxima=ESPERA_MAXIMA_S):
+        self.arquivo = arquivo
+        self.tentativas = tentativas
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+        # Usada pelas threads do agendador: uma conexão protegida por trava
+        self.trava = threading.RLock()
+        self.db = sqlite3.connect(arquivo, timeout=30, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(ESQUEMA)
+
+    @staticmethod
+    def chave(relatorio, destinatario):
+        return hashlib.sha256(f"{relatorio}|{destinatario.strip().lower()}".encode('utf-8')).hexdigest()[:32]
+
+    def espera(self, tentativas):
+        """Segundos até a próxima tentativa após `tentativas` falhas."""
+        return min(self.espera_inicial * 2 ** (tentativas - 1), self.espera_maxima)
+
+    def enfileirar(self, relatorio, mensagem):
+        """Grava a mensagem; retorna False se a chave já estava na fila ou enviada.
+
+        Mensagens que esgotaram as tentativas (``falhou``) são substituídas e
+        voltam para a fila.
+        """
+        destinatario = str(mensagem["To"])
+        chave = self.chave(relatorio, destinatario)
+        del mensagem["Message-ID"]
+        mensagem["Message-ID"] = f"<{chave}@relatorio-vendas>"
+        agora = time.time()
+        with self.trava:
+            cursor = self.db.execute(
+                "INSERT INTO mensagens (chave, relatorio, destinatario, mime, proxima_tentativa, criada_em) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (chave) DO UPDATE SET mime = excluded.mime, status = 'pendente', "
+                "tentativas = 0, proxima_tentativa = excluded.proxima_tentativa, ultimo_erro = NULL "
+                "WHERE status = 'falhou'",
+                (chave, relatorio, destinatario, mensagem.as_bytes(), agora, agora))
+        return cursor.rowcount > 0
+
+    def reservar(self, limite):
+        """Marca como ``enviando`` até `limite` mensagens vencidas e as retorna."""
+        agora = time.time()
+        with self.trava:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                linhas = self.db.execute(
+                    "SELECT chave, mime, tentativas FROM mensagens "
+                    "WHERE status IN ('pendente', 'enviando') AND proxima_tentativa <= ? "
+                    "ORDER BY proxima_tentativa LIMIT ?", (agora, limite)).fetchall()
+                self.db.executemany(
+                    "UPDATE mensagens SET status = 'enviando', proxima_tentativa = ? WHERE chave = ?",
+                    [(agora + RESERVA_S, chave) for chave, _, _ in linhas])
+                self.db.execute("COMMIT")
+            except Exception:
+                self.db.execute("ROLLBACK")
+                raise
+        return linhas
+
+    def drenar(self, entregador, limite=500):
+        """Envia as mensagens vencidas pelo `EntregadorEmails`; retorna contagens."""
+        reservadas = self.reservar(limite)
+        contagem = {"enviadas": 0, "adiadas": 0, "falharam": 0}
+        if not reservadas:
+            return contagem
+
+        parser = BytesParser(policy=policy.default)
+        mensagens = [parser.parsebytes(mime) for _, mime, _ in reservadas]
+        resultados = entregador.enviar(mensagens)
+
+        agora = time.time()
+        with self.trava:
+            self.db.execute("BEGIN")
+            for (chave, _, tentativas), resultado in zip(reservadas, resultados):
+                if resultado["ok"]:
+                    self.db.execute("UPDATE mensagens SET status = 'enviada', enviada_em = ?, "
+                                    "ultimo_erro = NULL WHERE chave = ?", (agora, chave))
+                    contagem["enviadas"] += 1
+                    continue
+                tentativas += 1
+                if tentativas >= self.tentativas:
+                    status, proxima = 'falhou', agora
+                    contagem["falharam"] += 1
+                    logger.error(f"Email para {resultado['destinatarios']} desistido após "
+                                 f"{tentativas} tentativas: {resultado['erro']}")
+                else:
+                    status, proxima = 'pendente', agora + self.espera(tentativas)
+                    contagem["adiadas"] += 1
+                    logger.warning(f"Email para {resultado['destinatarios']} falhou ({resultado['erro']}); "
+                                   f"nova tentativa em {self.espera(tentativas):.0f}s")
+                self.db.execute("UPDATE mensagens SET status = ?, tentativas = ?, proxima_tentativa = ?, "
+                                "ultimo_erro = ? WHERE chave = ?",
+                                (status, tentativas, proxima, resultado["erro"], chave))
+            self.db.execute("COMMIT")
+        return contagem
+
+    def situacao(self, relatorio=None, prefixo=False):
+        """Quantidade de mensagens por situação (de um relatório, dos que começam
+        com `relatorio` se `prefixo`, ou de todos)."""
+        if not relatorio:
+            filtro, parametros = "", ()
+        elif prefixo:
+            filtro, parametros = "WHERE substr(relatorio, 1, ?) = ?", (len(relatorio), relatorio)
+        else:
+            filtro, parametros = "WHERE relatorio = ?", (relatorio,)
+        with self.trava:
+            return dict(self.db.execute(
+                f"SELECT status, COUNT(*) FROM mensagens {filtro} GROUP BY status", parametros).fetchall())
+
+    def limpar(self, dias):
+        """Remove mensagens enviadas há mais de `dias` dias; retorna quantas."""
+        limite = time.time() - dias * 86400
+        with self.trava:
+            return self.db.execute("DELETE FROM mensagens WHERE status = 'enviada' AND enviada_em < ?",
+                                   (limite,)).rowcount
+
+    def fechar(self):
+        self.db.close()
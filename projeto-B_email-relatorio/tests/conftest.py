@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# Módulos do projeto B e a raiz do repositório (comum/) no path, como nos scripts
+PROJETO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJETO.parent))
+sys.path.insert(0, str(PROJETO))
@@ -0,0 +1,117 @@
+"""Testes do `Agendador` com o relógio simulado (`RelogioTeste`)."""
+
+import json
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from agendador import Agendador, ExpressaoCron, RelogioTeste
+
+# Segunda-feira
+INICIO = datetime(2025, 1, 6, 8, 0)
+
+
+@pytest.mark.parametrize("cron, depois, esperado", [
+    ("0 9 * * 1", datetime(2025, 1, 6, 8, 0), datetime(2025, 1, 6, 9, 0)),
+    ("0 9 * * 1", datetime(2025, 1, 6, 9, 0), datetime(2025, 1, 13, 9, 0)),
+    ("0 8 1 * *", datetime(2025, 1, 15, 10, 30), datetime(2025, 2, 1, 8, 0)),
+    ("*/15 8-18/2 * * *", datetime(2025, 1, 6, 9, 50), datetime(2025, 1, 6, 10, 0)),
+    ("0 9 * * 0", datetime(2025, 1, 6, 8, 0), datetime(2025, 1, 12, 9, 0)),
+    ("0 9 * * 7", datetime(2025, 1, 6, 8, 0), datetime(2025, 1, 12, 9, 0)),
+    # Dia do mês e dia da semana restritos: basta um coincidir (dia 13 ou sexta)
+    ("0 0 13 * 5", datetime(2025, 1, 6, 8, 0), datetime(2025, 1, 10, 0, 0)),
+    ("0 0 13 * 5", datetime(2025, 1, 11, 0, 0), datetime(2025, 1, 13, 0, 0)),
+    ("0 12 29 2 *", datetime(2025, 1, 1, 0, 0), datetime(2028, 2, 29, 12, 0)),
+])
+def test_proximo_horario(cron, depois, esperado):
+    assert ExpressaoCron(cron).proxima(depois) == esperado
+
+
+@pytest.mark.parametrize("cron", ["0 9 * *", "60 * * * *", "0 9 * * 8", "*/0 * * * *", "0 0 31 2 *"])
+def test_expressao_invalida(cron):
+    with pytest.raises(ValueError):
+        ExpressaoCron(cron).proxima(INICIO)
+
+
+def criar(arquivo, inicio, nome, cron, recuperar=True):
+    """Agendador com relógio simulado e uma tarefa que conta as execuções."""
+    agendador = Agendador(arquivo, workers=1, relogio=RelogioTeste(inicio))
+    execucoes = []
+    agendador.adicionar(nome, cron, lambda: execucoes.append(nome), recuperar=recuperar)
+    return agendador, execucoes
+
+
+def executar_ate(agendador, ate, passo=timedelta(days=1)):
+    """Avança a agenda em passos, esperando as tarefas disparadas terminarem a cada passo.
+
+    Com o relógio simulado o próximo vencimento chega na hora; sem a espera,
+    a ocorrência seguinte seria pulada por encontrar a anterior ainda no pool.
+    """
+    limite = agendador.relogio.agora()
+    while limite < ate:
+        limite = min(limite + passo, ate)
+        agendador.executar(ate=limite)
+        while agendador.em_execucao:
+            time.sleep(0.001)
+
+
+def estado(arquivo, nome):
+    return json.loads(arquivo.read_text(encoding='utf-8'))[nome]
+
+
+def test_executa_nos_horarios_da_agenda(tmp_path):
+    arquivo = tmp_path / "agenda.json"
+    agendador, execucoes = criar(arquivo, INICIO, "semanal", "0 9 * * 1")
+    executar_ate(agendador, datetime(2025, 1, 20, 8, 0))
+    agendador.parar()
+
+    assert len(execucoes) == 2
+    salvo = estado(arquivo, "semanal")
+    assert salvo["ultima_execucao"] == "2025-01-13T09:00:00"
+    assert salvo["proxima"] == "2025-01-20T09:00:00"
+    assert salvo["sucesso"] is True
+
+
+def test_execucao_perdida_roda_uma_vez_ao_reiniciar(tmp_path):
+    arquivo = tmp_path / "agenda.json"
+    agendador, _ = criar(arquivo, INICIO, "semanal", "0 9 * * 1")
+    agendador.parar()
+
+    # Processo parado por mais de duas semanas: 06/01, 13/01 e 20/01 às 9h foram perdidas
+    reinicio = datetime(2025, 1, 22, 12, 0)
+    agendador, execucoes = criar(arquivo, reinicio, "semanal", "0 9 * * 1")
+    agendador.executar(ate=datetime(2025, 1, 27, 8, 0))
+    agendador.parar()
+
+    assert len(execucoes) == 1
+    salvo = estado(arquivo, "semanal")
+    assert salvo["ultima_execucao"] == reinicio.isoformat()
+    assert salvo["proxima"] == "2025-01-27T09:00:00"
+
+
+def test_sem_recuperacao_aguarda_o_proximo_horario(tmp_path):
+    arquivo = tmp_path / "agenda.json"
+    agendador, _ = criar(arquivo, INICIO, "outbox", "*/5 * * * *", recuperar=False)
+    agendador.parar()
+
+    agendador, execucoes = criar(arquivo, datetime(2025, 1, 6, 9, 2), "outbox", "*/5 * * * *",
+                                 recuperar=False)
+    assert estado(arquivo, "outbox")["proxima"] == "2025-01-06T09:05:00"
+    executar_ate(agendador, datetime(2025, 1, 6, 9, 4))
+    assert execucoes == []
+    executar_ate(agendador, datetime(2025, 1, 6, 9, 10), passo=timedelta(minutes=1))
+    agendador.parar()
+    assert len(execucoes) == 2
+
+
+def test_cron_alterado_nao_recupera(tmp_path):
+    arquivo = tmp_path / "agenda.json"
+    agendador, _ = criar(arquivo, INICIO, "semanal", "0 9 * * 1")
+    agendador.parar()
+
+    agendador, execucoes = criar(arquivo, datetime(2025, 1, 8, 12, 0), "semanal", "0 9 * * 3")
+    agendador.executar(ate=datetime(2025, 1, 8, 12, 0))
+    agendador.parar()
+    assert execucoes == []
+    assert estado(arquivo, "semanal")["proxima"] == "2025-01-15T09:00:00"
@@ -0,0 +1,102 @@
+"""Testes de `PoolSMTP` e `EntregadorEmails` contra um servidor aiosmtpd local."""
+
+import socket
+import threading
+
+import pytest
+
+aiosmtpd = pytest.importorskip("aiosmtpd.controller")
+
+from entrega import EntregadorEmails, PoolSMTP, montar_mensagem
+
+
+class Servidor:
+    """Handler que guarda os destinatários recebidos e recusa com 421 as tentativas em `recusar`."""
+
+    def __init__(self, recusar=()):
+        self.recusar = set(recusar)
+        self.tentativas = 0
+        self.recebidas = []
+        self.trava = threading.Lock()
+
+    async def handle_DATA(self, server, session, envelope):
+        with self.trava:
+            self.tentativas += 1
+            if self.tentativas in self.recusar:
+                return '421 Servico indisponivel, encerrando a conexao'
+            self.recebidas.extend(envelope.rcpt_tos)
+        return '250 OK'
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def servidor(request):
+    handler = Servidor(**getattr(request, "param", {}))
+    controller = aiosmtpd.Controller(handler, hostname="127.0.0.1", port=porta_livre())
+    controller.start()
+    yield handler, controller.port
+    controller.stop()
+
+
+def mensagens(quantidade):
+    return [montar_mensagem("relatorios@empresa.com", f"cliente{i}@empresa.com",
+                            f"Relatório {i}", "<p>ok</p>",
+                            anexos=[("grafico.png", b"\x89PNG" + bytes(64), "image", "png")])
+            for i in range(quantidade)]
+
+
+def test_entrega_todas_as_mensagens_reaproveitando_conexoes(servidor):
+    handler, porta = servidor
+    entregador = EntregadorEmails(PoolSMTP("127.0.0.1", porta, usar_ssl=False, tamanho=2))
+    try:
+        resultados = entregador.enviar(mensagens(20))
+    finally:
+        entregador.fechar()
+
+    assert all(r["ok"] for r in resultados)
+    assert [r["destinatarios"] for r in resultados] == [f"cliente{i}@empresa.com" for i in range(20)]
+    assert sorted(handler.recebidas) == sorted(f"cliente{i}@empresa.com" for i in range(20))
+    assert entregador.resumo["enviados"] == 20
+    assert 1 <= entregador.resumo["conexoes"] <= 2
+
+
+def test_pool_reutiliza_a_conexao_entre_envios(servidor):
+    _, porta = servidor
+    pool = PoolSMTP("127.0.0.1", porta, usar_ssl=False, tamanho=1)
+    entregador = EntregadorEmails(pool)
+    try:
+        entregador.enviar(mensagens(3))
+        entregador.enviar(mensagens(3))
+    finally:
+        entregador.fechar()
+    assert pool.conexoes_criadas == 1
+
+
+@pytest.mark.parametrize("servidor", [{"recusar": {2}}], indirect=True)
+def test_reenvia_em_conexao_nova_apos_421(servidor):
+    handler, porta = servidor
+    pool = PoolSMTP("127.0.0.1", porta, usar_ssl=False, tamanho=1)
+    entregador = EntregadorEmails(pool)
+    try:
+        resultados = entregador.enviar(mensagens(3))
+    finally:
+        entregador.fechar()
+
+    assert all(r["ok"] for r in resultados)
+    assert [r["tentativas"] for r in resultados] == [1, 2, 1]
+    assert len(handler.recebidas) == 3
+    assert pool.conexoes_criadas == 2
+
+
+def test_desiste_apos_as_tentativas():
+    # Porta sem servidor: conexão recusada em todas as tentativas
+    entregador = EntregadorEmails(PoolSMTP("127.0.0.1", porta_livre(), usar_ssl=False,
+                                           tamanho=1, timeout=2), tentativas=2)
+    resultado = entregador.enviar_mensagem(mensagens(1)[0])
+    assert not resultado["ok"]
+    assert resultado["tentativas"] == 2
@@ -0,0 +1,89 @@
+"""Testes da `Outbox` usada ao mesmo tempo por várias threads (como pelo agendador)."""
+
+import threading
+from collections import Counter
+
+from entrega import montar_mensagem
+from outbox import Outbox
+
+
+class EntregadorRegistro:
+    """Entregador que só registra os Message-IDs recebidos (a interface de `EntregadorEmails`)."""
+
+    def __init__(self, falhar=()):
+        self.falhar = set(falhar)
+        self.enviados = Counter()
+        self.trava = threading.Lock()
+
+    def enviar(self, mensagens):
+        resultados = []
+        for mensagem in mensagens:
+            ok = mensagem["To"] not in self.falhar
+            if ok:
+                with self.trava:
+                    self.enviados[mensagem["Message-ID"]] += 1
+            resultados.append({"destinatarios": mensagem["To"], "ok": ok,
+                               "erro": None if ok else "SMTPDataError: recusada"})
+        return resultados
+
+
+def mensagem(destinatario):
+    return montar_mensagem("relatorios@empresa.com", destinatario, "Relatório", "<p>ok</p>")
+
+
+def test_enfileirar_e_drenar_em_paralelo(tmp_path):
+    outbox = Outbox(tmp_path / "outbox.db")
+    entregador = EntregadorRegistro()
+    produtores, por_produtor = 4, 50
+    enfileirando = threading.Event()
+    erros = []
+
+    def produzir(p):
+        try:
+            for i in range(por_produtor):
+                # Cada mensagem é enfileirada duas vezes: a segunda não pode duplicar o envio
+                for _ in range(2):
+                    outbox.enfileirar("relatorio-1", mensagem(f"cliente{p}-{i}@empresa.com"))
+        except Exception as e:
+            erros.append(e)
+
+    def consumir():
+        try:
+            while enfileirando.is_set() or outbox.situacao("relatorio-1").get("pendente"):
+                outbox.drenar(entregador, limite=7)
+        except Exception as e:
+            erros.append(e)
+
+    enfileirando.set()
+    threads = [threading.Thread(target=produzir, args=(p,)) for p in range(produtores)]
+    consumidores = [threading.Thread(target=consumir) for _ in range(3)]
+    for thread in threads + consumidores:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    enfileirando.clear()
+    for thread in consumidores:
+        thread.join()
+    outbox.fechar()
+
+    total = produtores * por_produtor
+    assert erros == []
+    assert len(entregador.enviados) == total
+    assert set(entregador.enviados.values()) == {1}
+    assert Outbox(tmp_path / "outbox.db").situacao("relatorio-1") == {"enviada": total}
+
+
+def test_falha_reagenda_sem_bloquear_as_demais(tmp_path):
+    outbox = Outbox(tmp_path / "outbox.db", tentativas=2, espera_inicial=0)
+    entregador = EntregadorRegistro(falhar={"recusado@empresa.com"})
+    for destinatario in ("a@empresa.com", "recusado@empresa.com", "b@empresa.com"):
+        outbox.enfileirar("relatorio-1", mensagem(destinatario))
+
+    assert outbox.drenar(entregador) == {"enviadas": 2, "adiadas": 1, "falharam": 0}
+    assert outbox.drenar(entregador) == {"enviadas": 0, "adiadas": 0, "falharam": 1}
+    assert outbox.situacao("relatorio-1") == {"enviada": 2, "falhou": 1}
+    # Reenfileirar uma mensagem que falhou a devolve à fila; as enviadas não são duplicadas
+    assert outbox.enfileirar("relatorio-1", mensagem("recusado@empresa.com"))
+    assert not outbox.enfileirar("relatorio-1", mensagem("a@empresa.com"))
+    assert outbox.situacao("relatorio-1") == {"enviada": 2, "pendente": 1}
+    outbox.fechar()
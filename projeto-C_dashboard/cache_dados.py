@@ -0,0 +1,169 @@
+"""
+Cache de dados do dashboard compartilhado por todas as sessões.
+
+O Streamlit reexecuta `dashboard_pro.py` a cada interação, mas módulos
+importados (como este) vivem o processo inteiro. `CacheDados` guarda os
+DataFrames já carregados e preparados, e todas as sessões recebem o mesmo
+conjunto de dados: a memória não cresce com o número de usuários e a
+reexecução não relê o CSV.
+
+- Invalidação: uma entrada é recarregada quando o mtime ou o tamanho do
+  arquivo mudam, ou quando tem mais de `ttl_s` segundos.
+- Somente leitura: os arrays das colunas são marcados como não graváveis
+  e cada sessão recebe uma cópia rasa; alterar valores levanta
+  ``ValueError`` e novas colunas ficam só na cópia da sessão. Colunas de
+  texto são guardadas como categóricas (o pandas não opera sobre arrays
+  de objetos não graváveis, e assim ocupam menos memória).
+- Limite de memória: acima de `limite_mb`, as entradas usadas há mais
+  tempo são descartadas (LRU); a mais recente é sempre mantida.
+- Várias sessões pedindo o mesmo arquivo ao mesmo tempo disparam uma
+  única leitura.
+- Anexos: estruturas derivadas dos dados (ex.: o cubo de agregados) são
+  construídas uma vez por carregamento com `anexo` e descartadas junto.
+"""
+
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+LIMITE_MB = 512
+TTL_S = 600
+
+logger = logging.getLogger(__name__)
+
+
+def somente_leitura(df):
+    """DataFrame com os mesmos dados em arrays não graváveis (sem copiar valores numéricos)."""
+    colunas = {}
+    for nome in df.columns:
+        serie = df[nome]
+        if not isinstance(serie.dtype, np.dtype) or serie.dtype.kind == 'O':
+            if not isinstance(serie.dtype, pd.CategoricalDtype):
+                serie = serie.astype('category')
+            codigos = serie.cat.codes.to_numpy()
+            codigos.flags.writeable = False
+            colunas[nome] = pd.Categorical.from_codes(codigos, dtype=serie.dtype)
+        else:
+            valores = serie.to_numpy()
+            valores.flags.writeable = False
+            colunas[nome] = valores
+    return pd.DataFrame(colunas, index=df.index, copy=False)
+
+
+def assinatura(caminho):
+    """(mtime_ns, tamanho) do arquivo: muda quando ele é reescrito."""
+    info = os.stat(caminho)
+    return info.st_mtime_ns, info.st_size
+
+
+class CacheDados:
+    """DataFrames por arquivo, compartilhados entre sessões, com TTL e limite LRU."""
+
+    def __init__(self, limite_mb=LIMITE_MB, ttl_s=TTL_S):
+        self.limite_bytes = int(limite_mb * 1024 * 1024)
+        self.ttl_s = ttl_s
+        self.entradas = OrderedDict()
+        self.trava = threading.Lock()
+        self.carregando = {}
+        self.versoes = itertools.count(1)
+        self.estatisticas = {"acertos": 0, "carregamentos": 0, "descartes": 0}
+
+    def configurar(self, limite_mb=LIMITE_MB, ttl_s=TTL_S):
+        with self.trava:
+            self.limite_bytes = int(limite_mb * 1024 * 1024)
+            self.ttl_s = ttl_s
+            self._aplicar_limite()
+
+    def _valida(self, entrada, marca):
+        return entrada["assinatura"] == marca and time.monotonic() - entrada["carregado_em"] < self.ttl_s
+
+    def obter(self, caminho, carregar, chave=None):
+        """DataFrame de `caminho` (somente leitura), chamando `carregar()` se necessário.
+
+        `chave` distingue variações do mesmo arquivo (ex.: esquemas diferentes).
+        Exceções de `carregar` são propagadas e nada é guardado.
+        """
+        chave = (os.path.abspath(caminho), chave)
+        marca = assinatura(caminho)
+        with self.trava:
+            entrada = self.entradas.get(chave)
+            if entrada and self._valida(entrada, marca):
+                self.entradas.move_to_end(chave)
+                self.estatisticas["acertos"] += 1
+                return entrada["df"].copy(deep=False)
+            # Uma leitura por chave: as demais sessões esperam por ela
+            trava_chave = self.carregando.setdefault(chave, threading.Lock())
+
+        with trava_chave:
+            with self.trava:
+                entrada = self.entradas.get(chave)
+                if entrada and self._valida(entrada, marca):
+                    self.entradas.move_to_end(chave)
+                    self.estatisticas["acertos"] += 1
+                    return entrada["df"].copy(deep=False)
+
+            inicio = time.perf_counter()
+            df = somente_leitura(carregar())
+            tamanho = int(df.memory_usage(index=True, deep=True).sum())
+            # Copiado para as cópias rasas: identifica o carregamento em `anexo`
+            df.attrs["cache_versao"] = next(self.versoes)
+            with self.trava:
+                self.entradas[chave] = {"df": df, "assinatura": marca, "bytes": tamanho,
+                                        "carregado_em": time.monotonic(), "anexos": {},
+                                        "trava_anexos": threading.Lock()}
+                self.entradas.move_to_end(chave)
+                self.estatisticas["carregamentos"] += 1
+                self._aplicar_limite()
+            logger.info(f"Cache de dados: {caminho} carregado em {time.perf_counter() - inicio:.2f}s "
+                        f"({tamanho / 1024 / 1024:.1f} MB, {len(self.entradas)} conjunto(s) em cache)")
+            return df.copy(deep=False)
+
+    def anexo(self, df, nome, construir):
+        """Objeto derivado de `df` (ex.: cubo), construído uma vez por carregamento.
+
+        `df` deve ter vindo de `obter`; se a entrada já foi descartada ou
+        recarregada, retorna None e o chamador usa os dados linha a linha.
+        """
+        versao = df.attrs.get("cache_versao")
+        with self.trava:
+            entrada = next((e for e in self.entradas.values()
+                            if versao is not None and e["df"].attrs.get("cache_versao") == versao), None)
+            if entrada is None:
+                return None
+            if nome in entrada["anexos"]:
+                return entrada["anexos"][nome]
+
+        with entrada["trava_anexos"]:
+            if nome not in entrada["anexos"]:
+                inicio = time.perf_counter()
+                objeto = construir(entrada["df"])
+                with self.trava:
+                    entrada["anexos"][nome] = objeto
+                    entrada["bytes"] += getattr(objeto, "nbytes", 0)
+                    self._aplicar_limite()
+                logger.info(f"Cache de dados: {nome} construído em {time.perf_counter() - inicio:.2f}s")
+            return entrada["anexos"][nome]
+
+    def _aplicar_limite(self):
+        """Descarta as entradas menos usadas até caber no limite (chamar com a trava)."""
+        while len(self.entradas) > 1 and self.bytes_em_uso() > self.limite_bytes:
+            chave, _ = self.entradas.popitem(last=False)
+            self.estatisticas["descartes"] += 1
+            logger.info(f"Cache de dados: {chave[0]} descartado (limite de {self.limite_bytes / 1024 / 1024:.0f} MB)")
+
+    def bytes_em_uso(self):
+        return sum(entrada["bytes"] for entrada in self.entradas.values())
+
+    def limpar(self):
+        with self.trava:
+            self.entradas.clear()
+
+
+# Instância do processo: compartilhada por todas as sessões do Streamlit
+CACHE = CacheDados()
@@ -0,0 +1,144 @@
+"""
+Cubo de agregados para os filtros do dashboard.
+
+Os filtros da sidebar (regiões, categorias e valor mínimo) e três
+visualizações (cards de métricas, análise regional e tendência) só
+precisam de agregados por Regiao × Categoria × período. `CuboVendas` é
+construído uma vez por carregamento dos dados (ver `cache_dados`) e
+responde a essas consultas sem percorrer as linhas:
+
+- as vendas ficam ordenadas por célula (região, categoria, período) e,
+  dentro da célula, por valor; com somas acumuladas, o total, a contagem,
+  o mínimo e o máximo acima de qualquer valor mínimo saem de uma busca
+  binária por célula;
+- o período é a própria data da venda ou, com mais de `max_periodos`
+  datas distintas, semana/mês/trimestre/ano.
+
+O custo de uma consulta depende do número de células (no máximo
+regiões × categorias × `max_periodos`), não do número de linhas. Linhas
+sem região, categoria ou valor ficam fora do cubo, como nos filtros.
+"""
+
+
+import numpy as np
+import pandas as pd
+
+from comum.estatisticas import Estatisticas
+
+MAX_PERIODOS = 1000
+FREQUENCIAS = ('W', 'M', 'Q', 'Y')
+
+
+def _periodos(datas, max_periodos):
+    """Código do período de cada linha e datas de início dos períodos."""
+    codigos, rotulos = pd.factorize(datas, sort=True)
+    for frequencia in FREQUENCIAS:
+        if len(rotulos) <= max_periodos:
+            break
+        codigos, rotulos = pd.factorize(datas.dt.to_period(frequencia).dt.start_time, sort=True)
+    return codigos, pd.DatetimeIndex(rotulos)
+
+
+def _primeiro_maior_igual(valores, inicio, fim, alvo):
+    """Para cada segmento ordenado [inicio, fim), o primeiro índice com valor >= alvo.
+
+    Busca binária vetorizada sobre todos os segmentos de uma vez.
+    """
+    baixo, alto = inicio.copy(), fim.copy()
+    while True:
+        ativos = baixo < alto
+        if not ativos.any():
+            return baixo
+        meio = (baixo + alto) // 2
+        menor = ativos & (valores[np.minimum(meio, len(valores) - 1)] < alvo)
+        baixo = np.where(menor, meio + 1, baixo)
+        alto = np.where(ativos & ~menor, meio, alto)
+
+
+class CuboVendas:
+    """Agregados de Vendas por Regiao × Categoria × período, com índice ordenado por valor."""
+
+    def __init__(self, df, max_periodos=MAX_PERIODOS):
+        regiao = df['Regiao'].astype('category')
+        categoria = df['Categoria'].astype('category')
+        self.regioes = list(regiao.cat.categories)
+        self.categorias = list(categoria.cat.categories)
+        periodos, self.datas = _periodos(df['Data_Venda'], max_periodos)
+        vendas = df['Vendas'].to_numpy(dtype=np.float64)
+
+        validas = ((regiao.cat.codes.to_numpy() >= 0) & (categoria.cat.codes.to_numpy() >= 0)
+                   & (periodos >= 0) & ~np.isnan(vendas))
+        linhas = np.flatnonzero(validas)
+        n_periodos = len(self.datas)
+        self.formato = (len(self.regioes), len(self.categorias), n_periodos)
+        celula = np.ravel_multi_index(
+            (regiao.cat.codes.to_numpy()[validas], categoria.cat.codes.to_numpy()[validas], periodos[validas]),
+            self.formato)
+
+        # Ordem estável: empates de valor mantêm a ordem original das linhas
+        ordem = np.lexsort((vendas[validas], celula))
+        self.posicoes = linhas[ordem]
+        self.vendas = vendas[validas][ordem]
+        self.acumulado = np.concatenate(([0.0], np.cumsum(self.vendas)))
+        limites = np.searchsorted(celula[ordem], np.arange(np.prod(self.formato) + 1))
+        self.inicio, self.fim = limites[:-1], limites[1:]
+        # Primeira linha com o maior valor de cada célula (não depende do valor mínimo)
+        maximos = self.vendas[np.maximum(self.fim - 1, 0)] if len(self.vendas) else np.zeros(len(self.fim))
+        self.inicio_maximo = _primeiro_maior_igual(self.vendas, self.inicio, self.fim, maximos)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.posicoes, self.vendas, self.acumulado,
+                                      self.inicio, self.fim, self.inicio_maximo))
+
+    def _selecao(self, regioes, categorias):
+        """Índices (planos) das células das regiões e categorias escolhidas, todos os períodos."""
+        r = [i for i, nome in enumerate(self.regioes) if regioes is None or nome in regioes]
+        c = [i for i, nome in enumerate(self.categorias) if categorias is None or nome in categorias]
+        grade = np.zeros(self.formato[:2], dtype=bool)
+        grade[np.ix_(r, c)] = True
+        return np.repeat(grade.ravel(), self.formato[2])
+
+    def _celulas(self, regioes, categorias, valor_minimo):
+        """(contagem, soma, corte) por célula, zerados fora da seleção."""
+        corte = self.inicio if valor_minimo is None else _primeiro_maior_igual(
+            self.vendas, self.inicio, self.fim, valor_minimo)
+        selecao = self._selecao(regioes, categorias)
+        contagem = np.where(selecao, self.fim - corte, 0)
+        soma = np.where(selecao, self.acumulado[self.fim] - self.acumulado[corte], 0.0)
+        return contagem, soma, corte
+
+    def resumo(self, regioes=None, categorias=None, valor_minimo=None):
+        """Estatísticas das linhas filtradas (posicao_maximo = posição no DataFrame original)."""
+        contagem, soma, corte = self._celulas(regioes, categorias, valor_minimo)
+        total = int(contagem.sum())
+        if not total:
+            return Estatisticas()
+        com_dados = np.flatnonzero(contagem)
+        minimo = self.vendas[corte[com_dados]].min()
+        maximos = self.vendas[self.fim[com_dados] - 1]
+        maximo = maximos.max()
+        # Empate entre células: a linha que aparece primeiro nos dados
+        posicao = self.posicoes[self.inicio_maximo[com_dados[maximos == maximo]]].min()
+        return Estatisticas(total, float(soma.sum()), float(minimo), float(maximo), int(posicao))
+
+    def por_regiao(self, regioes=None, categorias=None, valor_minimo=None):
+        """Total, média e contagem por região (mesmas colunas da análise regional)."""
+        contagem, soma, _ = self._celulas(regioes, categorias, valor_minimo)
+        contagem = contagem.reshape(self.formato).sum(axis=(1, 2))
+        soma = soma.reshape(self.formato).sum(axis=(1, 2))
+        com_dados = contagem > 0
+        return pd.DataFrame({
+            'Regiao': np.array(self.regioes, dtype=object)[com_dados],
+            'Total': soma[com_dados],
+            'Media': soma[com_dados] / contagem[com_dados],
+            'Clientes': contagem[com_dados]
+        })
+
+    def serie(self, regioes=None, categorias=None, valor_minimo=None):
+        """Total de vendas por período (colunas Data_Venda e Vendas), só períodos com vendas."""
+        contagem, soma, _ = self._celulas(regioes, categorias, valor_minimo)
+        contagem = contagem.reshape(self.formato).sum(axis=(0, 1))
+        soma = soma.reshape(self.formato).sum(axis=(0, 1))
+        com_dados = contagem > 0
+        return pd.DataFrame({'Data_Venda': self.datas[com_dados], 'Vendas': soma[com_dados]})
@@ -9,6 +9,11 @@ Funcionalidades:
 - Filtros dinâmicos
 - Exportação de relatórios
 - Métricas em tempo real
+- Dados em cache compartilhado entre sessões (ver cache_dados.py)
+- Métricas, análise regional e tendência respondidas por um cubo de agregados (ver cubo.py)
+- Filtros avaliados com bitmaps por valor e vendas ordenadas (ver indices.py)
+- Tabela de dados paginada no servidor (ver tabela.py)
+- Figuras com WebGL, orçamento de pontos e limite de tamanho (ver figuras.py)
 """
 
 import streamlit as st
@@ -20,7 +25,38 @@ import numpy as np
 from datetime import datetime, timedelta
 import json
 import base64
+import logging
+import sys
 from io import BytesIO
+from pathlib import Path
+
+# Raiz do repositório no path para os módulos compartilhados (comum/); os módulos
+# do projeto importados abaixo dependem disso e não repetem a configuração
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from cache_dados import CACHE, LIMITE_MB, TTL_S
+from cubo import MAX_PERIODOS, CuboVendas
+from figuras import ConstrutorFiguras, agregar_dispersao
+from indices import IndiceFiltros, filtrar_linhas
+from tabela import TAMANHO_PADRAO, TAMANHOS_PAGINA, ordem_coluna, pagina, total_paginas
+
+from comum.cache_colunar import ler_csv
+from comum.estatisticas import calcular
+from comum.esquema import aplicar_esquema, carregar_esquema, opcoes_leitura, validar_esquema
+from comum.logs import configurar_logging
+from comum.reducao import PONTOS_SERIE, TOP_N, reduzir_serie, top_n
+from comum.templates import carregar_template
+
+PASTA_TEMPLATES = Path(__file__).resolve().parent / "templates"
+# Colunas copiadas das linhas filtradas por cada figura que não sai do cubo
+COLUNAS_VENDAS = ['Cliente', 'Categoria', 'Vendas']
+COLUNAS_PERFORMANCE = ['Cliente', 'Meta', 'Vendas', 'Status', 'Performance']
+# Semanas distintas da Data_Venda simulada (repetidas em ciclo nas linhas seguintes)
+SEMANAS_SIMULADAS = 520
+
+
+class DadosInvalidos(ValueError):
+    """CSV lido, mas fora do esquema (colunas obrigatórias ou tipos)."""
 
 # Configuração da página
 st.set_page_config(
@@ -33,71 +69,99 @@ st.set_page_config(
 class SalesDashboard:
     def __init__(self):
         """Inicializa o dashboard de vendas."""
+        # O Streamlit reexecuta o script a cada interação; a configuração é feita uma vez
+        configurar_logging('dashboard.log', console=False)
+        self.logger = logging.getLogger(__name__)
+        self.esquema = carregar_esquema()
+        self.config = self.load_config()
+        cache = self.config.get("cache_dados", {})
+        CACHE.configurar(cache.get("limite_mb", LIMITE_MB), cache.get("ttl_s", TTL_S))
+        self.figuras = ConstrutorFiguras(**self.config.get("figuras", {}))
         self.load_custom_css()
         
     def load_custom_css(self):
-        """Carrega CSS customizado para melhorar a aparência."""
-        st.markdown("""
-        <style>
-        .main-header {
-            background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
-            padding: 2rem;
-            border-radius: 10px;
-            color: white;
-            text-align: center;
-            margin-bottom: 2rem;
-        }
-        .metric-card {
-            background: white;
-            padding: 1.5rem;
-            border-radius: 10px;
-            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-            border-left: 4px solid #667eea;
-        }
-        .sidebar .sidebar-content {
-            background: linear-gradient(180deg, #f8f9fa 0%, #e9ecef 100%);
-        }
-        </style>
-        """, unsafe_allow_html=True)
+        """Carrega CSS customizado para melhorar a aparência (template compilado uma vez)."""
+        st.markdown(carregar_template(PASTA_TEMPLATES / "estilo.html").renderizar(), unsafe_allow_html=True)
         
-    def load_data(self, file_path="vendas.csv"):
-        """Carrega dados de vendas com cache."""
+    def load_config(self, config_file="config.json"):
+        """Carrega configurações do arquivo JSON (vazio se não existir)."""
         try:
-            df = pd.read_csv(file_path)
-            
-            # Adiciona dados simulados para demonstração mais rica
-            if len(df) < 10:
-                # Expande dataset para demonstração
-                additional_data = {
-                    'Cliente': ['Eduardo', 'Fernanda', 'Gabriel', 'Helena', 'Igor', 'Julia'],
-                    'Vendas': [2200, 890, 1650, 3100, 750, 1980]
-                }
-                df_additional = pd.DataFrame(additional_data)
-                df = pd.concat([df, df_additional], ignore_index=True)
-            
-            # Adiciona colunas simuladas para análise mais rica
-            np.random.seed(42)
-            df['Regiao'] = np.random.choice(['Norte', 'Sul', 'Leste', 'Oeste'], len(df))
-            df['Categoria'] = np.random.choice(['Premium', 'Standard', 'Basic'], len(df))
-            df['Data_Venda'] = pd.date_range(start='2024-01-01', periods=len(df), freq='W')
-            df['Meta'] = df['Vendas'] * np.random.uniform(0.8, 1.2, len(df))
-            
-            return df
+            with open(config_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
             
+    def load_data(self, file_path="vendas.csv"):
+        """Carrega dados de vendas com cache (compartilhado entre sessões, somente leitura)."""
+        try:
+            return CACHE.obter(file_path, lambda: self.read_data(file_path),
+                               chave=json.dumps(self.esquema, sort_keys=True))
         except FileNotFoundError:
+            self.logger.error(f"Arquivo não encontrado: {file_path}")
             st.error("Arquivo vendas.csv não encontrado!")
             return pd.DataFrame()
+        except DadosInvalidos as e:
+            self.logger.error(str(e))
+            st.error(str(e))
+            return pd.DataFrame()
         except Exception as e:
+            self.logger.error(f"Erro ao carregar dados: {e}")
             st.error(f"Erro ao carregar dados: {e}")
             return pd.DataFrame()
             
-    def create_metrics_cards(self, df, filtered_df):
-        """Cria cards de métricas principais."""
+    def read_data(self, file_path):
+        """Lê o CSV e adiciona as colunas simuladas (chamado apenas quando o cache expira)."""
+        df = ler_csv(file_path, **opcoes_leitura(self.esquema))
+        df = aplicar_esquema(df, self.esquema)
+        errors = validar_esquema(df, self.esquema, ['Cliente', 'Vendas'])
+        if errors:
+            raise DadosInvalidos(f"Dados inválidos: {'; '.join(errors)}")
+        self.logger.info(f"Dados carregados: {len(df)} registros de {file_path}")
+        
+        # Adiciona dados simulados para demonstração mais rica
+        if len(df) < 10:
+            # Expande dataset para demonstração
+            additional_data = {
+                'Cliente': ['Eduardo', 'Fernanda', 'Gabriel', 'Helena', 'Igor', 'Julia'],
+                'Vendas': [2200, 890, 1650, 3100, 750, 1980]
+            }
+            df_additional = pd.DataFrame(additional_data)
+            df = pd.concat([df, df_additional], ignore_index=True)
+        
+        # Adiciona colunas simuladas para análise mais rica
+        np.random.seed(42)
+        df['Regiao'] = np.random.choice(['Norte', 'Sul', 'Leste', 'Oeste'], len(df))
+        df['Categoria'] = np.random.choice(['Premium', 'Standard', 'Basic'], len(df))
+        # Semanas em ciclo: um período por linha sairia do intervalo de datas do pandas (~12 mil linhas)
+        semanas = pd.date_range(start='2024-01-01', periods=min(len(df), SEMANAS_SIMULADAS), freq='W')
+        df['Data_Venda'] = semanas[np.arange(len(df)) % len(semanas)]
+        df['Meta'] = df['Vendas'] * np.random.uniform(0.8, 1.2, len(df))
+        
+        # Colunas derivadas calculadas aqui: o DataFrame em cache é compartilhado e somente leitura
+        self.add_performance(df)
+        return df
+        
+    def add_performance(self, df):
+        """Adiciona Performance (% da meta) e Status ao DataFrame."""
+        df['Performance'] = (df['Vendas'] / df['Meta']) * 100
+        df['Status'] = pd.Categorical.from_codes(
+            np.select([df['Performance'] >= 100, df['Performance'] >= 80], [0, 1], 2),
+            ['🟢 Acima da Meta', '🟡 Próximo da Meta', '🔴 Abaixo da Meta']
+        )
+            
+    def create_metrics_cards(self, df, mascara, cubo=None, filtros=()):
+        """Cria cards de métricas principais (do cubo de agregados, se disponível)."""
         col1, col2, col3, col4 = st.columns(4)
+        if cubo is not None:
+            # posicao_maximo do cubo refere-se ao DataFrame completo
+            resumo, geral, linhas = cubo.resumo(*filtros), cubo.resumo(), df
+        else:
+            linhas = df[mascara]
+            resumo, geral = calcular(linhas['Vendas']), calcular(df['Vendas'])
         
         with col1:
-            total_vendas = filtered_df['Vendas'].sum()
-            delta_vendas = total_vendas - df['Vendas'].sum() if len(filtered_df) != len(df) else None
+            total_vendas = resumo.soma
+            delta_vendas = total_vendas - geral.soma if resumo.contagem != len(df) else None
             st.metric(
                 label="💰 Total de Vendas",
                 value=f"R$ {total_vendas:,.2f}",
@@ -105,23 +169,23 @@ class SalesDashboard:
             )
             
         with col2:
-            media_vendas = filtered_df['Vendas'].mean()
+            media_vendas = resumo.media
             st.metric(
                 label="📊 Média por Cliente",
                 value=f"R$ {media_vendas:,.2f}"
             )
             
         with col3:
-            total_clientes = len(filtered_df)
+            total_clientes = resumo.contagem
             st.metric(
                 label="👥 Total de Clientes",
                 value=total_clientes
             )
             
         with col4:
-            if not filtered_df.empty:
-                top_cliente = filtered_df.loc[filtered_df['Vendas'].idxmax(), 'Cliente']
-                top_valor = filtered_df['Vendas'].max()
+            if resumo.contagem:
+                top_cliente = linhas['Cliente'].iloc[resumo.posicao_maximo]
+                top_valor = resumo.maximo
                 st.metric(
                     label="🏆 Top Cliente",
                     value=f"{top_cliente}",
@@ -130,8 +194,10 @@ class SalesDashboard:
                 
     def create_sales_chart(self, df):
         """Cria gráfico principal de vendas."""
+        # Top clientes + "Outros": o número de barras não cresce com a base
+        dados = top_n(df, 'Cliente', 'Vendas', TOP_N, subgrupo='Categoria')
         fig = px.bar(
-            df, 
+            dados, 
             x='Cliente', 
             y='Vendas',
             color='Categoria',
@@ -148,15 +214,17 @@ class SalesDashboard:
             height=500
         )
         
-        # Adiciona valores nas barras
-        fig.update_traces(texttemplate='R$ %{y:,.0f}', textposition='outside')
+        # Adiciona valores nas barras (só enquanto há poucas barras)
+        if self.figuras.com_rotulos(len(dados)):
+            fig.update_traces(texttemplate='R$ %{y:,.0f}', textposition='outside')
         
         return fig
         
-    def create_regional_analysis(self, df):
-        """Cria análise por região."""
-        regional_data = df.groupby('Regiao')['Vendas'].agg(['sum', 'mean', 'count']).reset_index()
-        regional_data.columns = ['Regiao', 'Total', 'Media', 'Clientes']
+    def create_regional_analysis(self, df, regional_data=None):
+        """Cria análise por região (`regional_data` pronto vem do cubo de agregados)."""
+        if regional_data is None:
+            regional_data = df.groupby('Regiao', observed=True)['Vendas'].agg(['sum', 'mean', 'count']).reset_index()
+            regional_data.columns = ['Regiao', 'Total', 'Media', 'Clientes']
         
         fig = make_subplots(
             rows=1, cols=2,
@@ -181,29 +249,33 @@ class SalesDashboard:
         fig.update_layout(height=400, showlegend=False)
         return fig
         
-    def create_trend_analysis(self, df):
-        """Cria análise de tendência temporal."""
+    def create_trend_analysis(self, df, trend_data=None):
+        """Cria análise de tendência temporal (`trend_data` pronto vem do cubo de agregados)."""
         # Agrupa por data
-        trend_data = df.groupby('Data_Venda')['Vendas'].sum().reset_index()
+        if trend_data is None:
+            trend_data = df.groupby('Data_Venda')['Vendas'].sum().reset_index()
+        
+        # Pontos exibidos: no máximo PONTOS_SERIE, preservando picos e vales (LTTB)
+        pontos = reduzir_serie(trend_data, 'Data_Venda', 'Vendas', PONTOS_SERIE)
         
         fig = go.Figure()
         
         # Linha de vendas
         fig.add_trace(go.Scatter(
-            x=trend_data['Data_Venda'],
-            y=trend_data['Vendas'],
-            mode='lines+markers',
+            x=pontos['Data_Venda'],
+            y=pontos['Vendas'],
+            mode='lines+markers' if len(pontos) == len(trend_data) else 'lines',
             name='Vendas Reais',
             line=dict(color='#667eea', width=3),
             marker=dict(size=8)
         ))
         
-        # Linha de tendência
+        # Linha de tendência (ajustada sobre a série completa)
         z = np.polyfit(range(len(trend_data)), trend_data['Vendas'], 1)
         p = np.poly1d(z)
         fig.add_trace(go.Scatter(
-            x=trend_data['Data_Venda'],
-            y=p(range(len(trend_data))),
+            x=pontos['Data_Venda'],
+            y=p(pontos.index),
             mode='lines',
             name='Tendência',
             line=dict(color='red', width=2, dash='dash')
@@ -219,47 +291,107 @@ class SalesDashboard:
         return fig
         
     def create_performance_analysis(self, df):
-        """Cria análise de performance vs meta."""
-        df['Performance'] = (df['Vendas'] / df['Meta']) * 100
-        df['Status'] = df['Performance'].apply(
-            lambda x: '🟢 Acima da Meta' if x >= 100 else 
-                     '🟡 Próximo da Meta' if x >= 80 else '🔴 Abaixo da Meta'
-        )
+        """Cria análise de performance vs meta (Performance e Status vêm de `add_performance`)."""
+        max_val = max(df['Meta'].max(), df['Vendas'].max())
         
-        fig = px.scatter(
-            df, 
-            x='Meta', 
-            y='Vendas',
-            color='Status',
-            size='Performance',
-            hover_data=['Cliente', 'Performance'],
-            title="Performance vs Meta por Cliente"
-        )
+        def montar(orcamento):
+            # Acima do orçamento, cada ponto é a média de uma célula da grade Meta x Vendas
+            pontos = agregar_dispersao(df, 'Meta', 'Vendas', 'Status', orcamento,
+                                       medias=['Performance'], rotulo='Cliente')
+            fig = px.scatter(
+                pontos, 
+                x='Meta', 
+                y='Vendas',
+                color='Status',
+                size='Performance',
+                hover_data=['Cliente', 'Performance'],
+                title="Performance vs Meta por Cliente",
+                render_mode=self.figuras.modo(len(pontos))
+            )
+            
+            # Adiciona linha de referência (meta = vendas)
+            fig.add_trace(go.Scatter(
+                x=[0, max_val],
+                y=[0, max_val],
+                mode='lines',
+                name='Linha de Meta',
+                line=dict(color='gray', dash='dash')
+            ))
+            
+            fig.update_layout(height=500)
+            return fig
         
-        # Adiciona linha de referência (meta = vendas)
-        max_val = max(df['Meta'].max(), df['Vendas'].max())
-        fig.add_trace(go.Scatter(
-            x=[0, max_val],
-            y=[0, max_val],
-            mode='lines',
-            name='Linha de Meta',
-            line=dict(color='gray', dash='dash')
-        ))
+        return self.figuras.limitar(montar, "Performance vs Meta")
         
-        fig.update_layout(height=500)
-        return fig
+    def create_filtered_charts(self, df, mascara, filtros):
+        """Figuras que percorrem as linhas filtradas (vendas por cliente e performance).
+
+        Montadas só quando os dados ou os filtros mudam, copiando das linhas
+        aprovadas apenas as colunas de cada figura; nas demais interações
+        (página da tabela, ordenação, botões) vêm do session_state.
+        """
+        estado = st.session_state
+        assinatura = (df.attrs.get("cache_versao"), filtros)
+        if estado.get("graficos_assinatura") != assinatura:
+            estado["graficos"] = (self.create_sales_chart(df.loc[mascara, COLUNAS_VENDAS]),
+                                  self.create_performance_analysis(df.loc[mascara, COLUNAS_PERFORMANCE]))
+            estado["graficos_assinatura"] = assinatura
+        return estado["graficos"]
+        
+    def create_data_table(self, df, mascara, total_linhas, filtros):
+        """Tabela paginada: só a página atual vai para o navegador (estado em session_state)."""
+        estado = st.session_state
+        col1, col2, col3, col4 = st.columns([3, 2, 1, 1])
+        
+        with col1:
+            colunas = st.multiselect("Colunas:", options=list(df.columns), default=list(df.columns),
+                                     key="tabela_colunas")
+        with col2:
+            ordenacao = st.selectbox("Ordenar por:", ["(ordem original)"] + list(df.columns),
+                                     key="tabela_ordenacao")
+        with col3:
+            decrescente = st.checkbox("Decrescente", key="tabela_decrescente")
+        with col4:
+            tamanho = st.selectbox("Linhas por página:", TAMANHOS_PAGINA,
+                                   index=TAMANHOS_PAGINA.index(TAMANHO_PADRAO), key="tabela_tamanho")
+        
+        # Volta à primeira página quando filtros, ordenação ou tamanho da página mudam
+        paginas = total_paginas(total_linhas, tamanho)
+        assinatura = (filtros, ordenacao, decrescente, tamanho)
+        if estado.get("tabela_assinatura") != assinatura:
+            estado["tabela_assinatura"] = assinatura
+            estado["tabela_pagina"] = 1
+        estado["tabela_pagina"] = min(estado.get("tabela_pagina", 1), paginas)
+        numero = st.number_input(f"Página (de {paginas:,}):", min_value=1, max_value=paginas, step=1,
+                                 key="tabela_pagina")
+        
+        # Permutação de ordenação calculada uma vez por coluna/direção e guardada com os dados
+        ordem = None
+        if ordenacao in df.columns:
+            crescente = not decrescente
+            ordem = CACHE.anexo(df, f"ordem:{ordenacao}:{crescente}",
+                                lambda dados: ordem_coluna(dados, ordenacao, crescente))
+            if ordem is None:
+                ordem = ordem_coluna(df, ordenacao, crescente)
+        
+        dados = pagina(df, mascara, numero, tamanho, colunas, ordem, total_linhas)
+        st.dataframe(dados, use_container_width=True)
+        inicio = (numero - 1) * tamanho
+        st.caption(f"Linhas {inicio + 1 if len(dados) else 0:,}–{inicio + len(dados):,} de {total_linhas:,}")
         
     def export_report(self, df):
         """Gera relatório para download."""
-        # Cria resumo estatístico
+        # Cria resumo estatístico (uma passada para o total e uma por região)
+        resumo = calcular(df['Vendas'])
+        por_regiao = calcular(df['Vendas'], df['Regiao'])
         summary = {
             'Data do Relatório': datetime.now().strftime('%d/%m/%Y %H:%M'),
-            'Total de Vendas': f"R$ {df['Vendas'].sum():,.2f}",
-            'Média de Vendas': f"R$ {df['Vendas'].mean():,.2f}",
+            'Total de Vendas': f"R$ {resumo.soma:,.2f}",
+            'Média de Vendas': f"R$ {resumo.media:,.2f}",
             'Total de Clientes': len(df),
-            'Maior Venda': f"R$ {df['Vendas'].max():,.2f}",
-            'Cliente Top': df.loc[df['Vendas'].idxmax(), 'Cliente'],
-            'Região com Mais Vendas': df.groupby('Regiao')['Vendas'].sum().idxmax()
+            'Maior Venda': f"R$ {resumo.maximo:,.2f}",
+            'Cliente Top': df['Cliente'].iloc[resumo.posicao_maximo],
+            'Região com Mais Vendas': max(por_regiao, key=lambda regiao: por_regiao[regiao].soma)
         }
         
         # Converte para JSON
@@ -270,12 +402,7 @@ class SalesDashboard:
     def run_dashboard(self):
         """Executa o dashboard principal."""
         # Header
-        st.markdown("""
-        <div class="main-header">
-            <h1>📊 Dashboard de Vendas Profissional</h1>
-            <p>Análise completa e interativa dos dados de vendas</p>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(carregar_template(PASTA_TEMPLATES / "cabecalho.html").renderizar(), unsafe_allow_html=True)
         
         # Carrega dados
         df = self.load_data()
@@ -289,15 +416,15 @@ class SalesDashboard:
         # Filtro por região
         regioes_selecionadas = st.sidebar.multiselect(
             "Selecione as Regiões:",
-            options=df['Regiao'].unique(),
-            default=df['Regiao'].unique()
+            options=df['Regiao'].unique().tolist(),
+            default=df['Regiao'].unique().tolist()
         )
         
         # Filtro por categoria
         categorias_selecionadas = st.sidebar.multiselect(
             "Selecione as Categorias:",
-            options=df['Categoria'].unique(),
-            default=df['Categoria'].unique()
+            options=df['Categoria'].unique().tolist(),
+            default=df['Categoria'].unique().tolist()
         )
         
         # Filtro por valor mínimo
@@ -309,32 +436,43 @@ class SalesDashboard:
             step=100
         )
         
-        # Aplica filtros
-        filtered_df = df[
-            (df['Regiao'].isin(regioes_selecionadas)) &
-            (df['Categoria'].isin(categorias_selecionadas)) &
-            (df['Vendas'] >= valor_minimo)
-        ]
+        # Aplica filtros (índice construído uma vez por carregamento; sem ele, isin linha a linha)
+        escolhas = {'Regiao': regioes_selecionadas, 'Categoria': categorias_selecionadas}
+        indice = CACHE.anexo(df, "indice", IndiceFiltros)
+        if indice is not None:
+            mascara = indice.filtrar(escolhas, valor_minimo)
+        else:
+            mascara = filtrar_linhas(df, escolhas, valor_minimo)
+        # Sem materializar df[mascara]: cada consumidor lê só as linhas/colunas que usa
+        total_linhas = int(np.count_nonzero(mascara))
+        
+        # Cubo de agregados (construído uma vez por carregamento dos dados): métricas,
+        # análise regional e tendência não percorrem as linhas a cada interação
+        max_periodos = self.config.get("cubo", {}).get("max_periodos", MAX_PERIODOS)
+        cubo = CACHE.anexo(df, "cubo", lambda dados: CuboVendas(dados, max_periodos))
+        filtros = (regioes_selecionadas, categorias_selecionadas, valor_minimo)
         
         # Métricas principais
         st.subheader("📈 Métricas Principais")
-        self.create_metrics_cards(df, filtered_df)
+        self.create_metrics_cards(df, mascara, cubo, filtros)
+        if total_linhas:
+            fig1, fig4 = self.create_filtered_charts(df, mascara, filtros)
         
         # Gráficos principais
         col1, col2 = st.columns(2)
         
         with col1:
             st.subheader("📊 Vendas por Cliente")
-            if not filtered_df.empty:
-                fig1 = self.create_sales_chart(filtered_df)
+            if total_linhas:
                 st.plotly_chart(fig1, use_container_width=True)
             else:
                 st.warning("Nenhum dado encontrado com os filtros aplicados")
                 
         with col2:
             st.subheader("🗺️ Análise Regional")
-            if not filtered_df.empty:
-                fig2 = self.create_regional_analysis(filtered_df)
+            if total_linhas:
+                fig2 = (self.create_regional_analysis(None, cubo.por_regiao(*filtros)) if cubo
+                        else self.create_regional_analysis(df[mascara]))
                 st.plotly_chart(fig2, use_container_width=True)
         
         # Análises avançadas
@@ -343,22 +481,22 @@ class SalesDashboard:
         tab1, tab2, tab3 = st.tabs(["Tendência Temporal", "Performance vs Meta", "Dados Detalhados"])
         
         with tab1:
-            if not filtered_df.empty:
-                fig3 = self.create_trend_analysis(filtered_df)
+            if total_linhas:
+                fig3 = (self.create_trend_analysis(None, cubo.serie(*filtros)) if cubo
+                        else self.create_trend_analysis(df[mascara]))
                 st.plotly_chart(fig3, use_container_width=True)
                 
         with tab2:
-            if not filtered_df.empty:
-                fig4 = self.create_performance_analysis(filtered_df)
+            if total_linhas:
                 st.plotly_chart(fig4, use_container_width=True)
                 
         with tab3:
             st.subheader("Tabela de Dados")
-            st.dataframe(filtered_df, use_container_width=True)
+            self.create_data_table(df, mascara, total_linhas, filtros)
             
             # Botão de download
             if st.button("📥 Gerar Relatório"):
-                report_json = self.export_report(filtered_df)
+                report_json = self.export_report(df[mascara])
                 st.download_button(
                     label="Download Relatório JSON",
                     data=report_json,
@@ -369,10 +507,8 @@ class SalesDashboard:
         # Footer
         st.markdown("---")
         st.markdown(
-            "<div style='text-align: center; color: #666;'>"
-            "Dashboard desenvolvido com Streamlit | "
-            f"Última atualização: {datetime.now().strftime('%d/%m/%Y %H:%M')}"
-            "</div>",
+            carregar_template(PASTA_TEMPLATES / "rodape.html").renderizar(
+                {"atualizacao": datetime.now().strftime('%d/%m/%Y %H:%M')}),
             unsafe_allow_html=True
         )
 
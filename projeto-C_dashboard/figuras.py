@@ -0,0 +1,137 @@
+"""
+Limites de renderização das figuras do dashboard.
+
+Com milhares de clientes, um marcador SVG (e um rótulo) por ponto trava
+o navegador, e o JSON da figura cresce com os dados. `ConstrutorFiguras`
+aplica a mesma política a todas as figuras:
+
+- acima de `limite_webgl` pontos, dispersões usam WebGL (``Scattergl``);
+- cada figura tem um orçamento de pontos: dispersões maiores são
+  agregadas por densidade (`agregar_dispersao`: médias por célula de uma
+  grade x × y, separada por grupo/cor) e barras já vêm reduzidas a top-N
+  (`comum.reducao.top_n`);
+- rótulos de texto por ponto só até `limite_rotulos` pontos;
+- `limitar` mede o JSON da figura e, acima de `limite_json_kb`, reconstrói
+  com um orçamento menor, então o tamanho enviado ao navegador não
+  depende do número de linhas.
+"""
+
+import logging
+import math
+
+import numpy as np
+import pandas as pd
+
+LIMITE_WEBGL = 1000
+ORCAMENTO_PONTOS = 5000
+ORCAMENTO_MINIMO = 100
+LIMITE_ROTULOS = 50
+LIMITE_JSON_KB = 1024
+# Quantas vezes a grade da agregação pode dobrar de resolução
+REFINAMENTOS = 3
+
+logger = logging.getLogger(__name__)
+
+
+def _normalizar(valores):
+    """Valores levados a [0, 1] (tudo 0 se constantes)."""
+    menor, maior = valores.min(), valores.max()
+    return (valores - menor) / (maior - menor) if maior > menor else np.zeros_like(valores)
+
+
+def _coordenadas(f, lado):
+    """Coluna (0..lado-1) de cada valor normalizado numa grade de `lado` colunas."""
+    return np.minimum((f * lado).astype(np.int32), lado - 1)
+
+
+def agregar_dispersao(df, x, y, grupo, orcamento=ORCAMENTO_PONTOS, medias=(), rotulo=None):
+    """Reduz uma dispersão a no máximo `orcamento` pontos.
+
+    Cada ponto é a média de x, y e das colunas em `medias` das linhas de
+    uma célula da grade (por valor de `grupo`); a coluna `Pontos` traz
+    quantas linhas ele representa. Com `rotulo`, pontos agregados recebem
+    "N clientes" no lugar do nome. Linhas com x, y ou grupo nulos ficam de fora.
+    """
+    grupos = df[grupo].astype('category')
+    categorias = grupos.cat.categories
+    codigos = grupos.cat.codes.to_numpy().astype(np.int32)
+    valores_x = df[x].to_numpy(dtype=np.float64)
+    valores_y = df[y].to_numpy(dtype=np.float64)
+    validas = ~np.isnan(valores_x) & ~np.isnan(valores_y) & (codigos >= 0)
+    if np.count_nonzero(validas) <= orcamento:
+        return df[validas].assign(Pontos=1)
+    linhas = None if validas.all() else np.flatnonzero(validas)
+    if linhas is not None:
+        codigos, valores_x, valores_y = codigos[linhas], valores_x[linhas], valores_y[linhas]
+
+    # Coordenadas na grade mais fina; as mais grossas saem por deslocamento de bits
+    base = max(int(math.sqrt(orcamento / len(categorias))), 1)
+    cx = _coordenadas(_normalizar(valores_x), base << REFINAMENTOS)
+    cy = _coordenadas(_normalizar(valores_y), base << REFINAMENTOS)
+
+    def celulas(nivel):
+        lado, passo = base << nivel, REFINAMENTOS - nivel
+        return (codigos * lado + (cx >> passo)) * lado + (cy >> passo)
+
+    # Dados concentrados (ex.: Vendas perto da Meta) ocupam poucas células:
+    # refina a grade enquanto as células ocupadas couberem no orçamento
+    lado, chave = base, celulas(0)
+    for nivel in range(1, REFINAMENTOS + 1):
+        fina = celulas(nivel)
+        if np.count_nonzero(np.bincount(fina)) > orcamento:
+            break
+        lado, chave = base << nivel, fina
+
+    total_celulas = len(categorias) * lado * lado
+    contagem = np.bincount(chave, minlength=total_celulas)
+    ocupadas = np.flatnonzero(contagem)
+    n = contagem[ocupadas]
+
+    def media(valores):
+        return np.bincount(chave, weights=valores, minlength=total_celulas)[ocupadas] / n
+
+    pontos = pd.DataFrame({x: media(valores_x), y: media(valores_y)})
+    for coluna in medias:
+        valores = df[coluna].to_numpy(dtype=np.float64)
+        pontos[coluna] = media(valores if linhas is None else valores[linhas])
+    pontos[grupo] = pd.Categorical.from_codes(ocupadas // (lado * lado), categorias)
+    pontos['Pontos'] = n
+    if rotulo:
+        # Uma linha qualquer de cada célula: só é exibida quando a célula tem uma linha
+        representante = np.empty(total_celulas, dtype=np.int64)
+        representante[chave] = np.arange(len(chave)) if linhas is None else linhas
+        nomes = df[rotulo].to_numpy()[representante[ocupadas]].astype(object)
+        pontos[rotulo] = np.where(n > 1, [f"{k:,} clientes" for k in n], nomes)
+    return pontos
+
+
+class ConstrutorFiguras:
+    """Política de WebGL, orçamento de pontos, rótulos e tamanho do JSON das figuras."""
+
+    def __init__(self, limite_webgl=LIMITE_WEBGL, orcamento_pontos=ORCAMENTO_PONTOS,
+                 limite_rotulos=LIMITE_ROTULOS, limite_json_kb=LIMITE_JSON_KB):
+        self.limite_webgl = limite_webgl
+        self.orcamento_pontos = orcamento_pontos
+        self.limite_rotulos = limite_rotulos
+        self.limite_bytes = int(limite_json_kb * 1024)
+
+    def modo(self, pontos):
+        """``render_mode`` do plotly express para `pontos` marcadores."""
+        return 'webgl' if pontos > self.limite_webgl else 'svg'
+
+    def com_rotulos(self, pontos):
+        return pontos <= self.limite_rotulos
+
+    def limitar(self, montar, nome="figura"):
+        """Figura de ``montar(orcamento)``, reconstruída com orçamento menor até o JSON caber no limite."""
+        orcamento = self.orcamento_pontos
+        while True:
+            fig = montar(orcamento)
+            tamanho = len(fig.to_json())
+            if tamanho <= self.limite_bytes or orcamento <= ORCAMENTO_MINIMO:
+                if tamanho > self.limite_bytes:
+                    logger.warning(f"{nome}: {tamanho / 1024:.0f} KB acima do limite mesmo com "
+                                   f"{orcamento} pontos")
+                return fig
+            orcamento = max(ORCAMENTO_MINIMO, int(orcamento * self.limite_bytes / tamanho * 0.9))
+            logger.info(f"{nome}: {tamanho / 1024:.0f} KB acima do limite; reduzindo para {orcamento} pontos")
@@ -0,0 +1,107 @@
+"""
+Índices dos filtros do dashboard (bitmaps por valor + vendas ordenadas).
+
+Filtrar com ``isin`` compara o valor de cada linha com a lista escolhida
+a cada interação. `IndiceFiltros` é construído uma vez por carregamento
+dos dados (ver `cache_dados.anexo`) e transforma os filtros em operações
+sobre bits:
+
+- cada coluna de baixa cardinalidade (Regiao, Categoria) vira códigos
+  categóricos e um bitmap compactado (``np.packbits``, 1 bit por linha)
+  por valor; escolher valores é um OR dos bitmaps e combinar colunas é
+  um AND, sobre n/8 bytes;
+- `Vendas` ganha uma permutação ordenada por valor: ``Vendas >= mínimo``
+  começa com uma busca binária, que dá o número de linhas aprovadas. Se
+  são poucas (ou quase todas), o bitmap é montado só com elas (ou com as
+  reprovadas); caso contrário, a comparação direta é mais barata que
+  espalhar metade das posições.
+
+Linhas com valor nulo nunca passam por um filtro, como no ``isin``.
+"""
+
+import numpy as np
+import pandas as pd
+
+COLUNAS = ('Regiao', 'Categoria')
+# Até 1/FRACAO_ESPARSA das linhas, o bitmap do valor mínimo vem da permutação ordenada
+FRACAO_ESPARSA = 16
+
+
+class IndiceFiltros:
+    """Bitmaps por valor das colunas de filtro e permutação ordenada de uma coluna numérica."""
+
+    def __init__(self, df, colunas=COLUNAS, coluna_valor='Vendas'):
+        self.n = len(df)
+        self.bitmaps = {}
+        self.sem_nulos = {}
+        for coluna in colunas:
+            serie = df[coluna].astype('category')
+            codigos = serie.cat.codes.to_numpy()
+            self.bitmaps[coluna] = {valor: np.packbits(codigos == i)
+                                    for i, valor in enumerate(serie.cat.categories)}
+            self.sem_nulos[coluna] = bool((codigos >= 0).all())
+
+        self.valores = df[coluna_valor].to_numpy(dtype=np.float64)
+        validos = np.flatnonzero(~np.isnan(self.valores))
+        self.ordem = validos[np.argsort(self.valores[validos], kind='stable')]
+        if self.n < 2 ** 31:
+            self.ordem = self.ordem.astype(np.int32)
+        self.ordenados = self.valores[self.ordem]
+
+    @property
+    def nbytes(self):
+        return (sum(b.nbytes for valores in self.bitmaps.values() for b in valores.values())
+                + self.valores.nbytes + self.ordem.nbytes + self.ordenados.nbytes)
+
+    def _bitmap_coluna(self, coluna, escolhidos):
+        """OR dos bitmaps dos valores escolhidos (None = coluna não restringe)."""
+        bitmaps = self.bitmaps[coluna]
+        escolhidos = [valor for valor in escolhidos if valor in bitmaps]
+        if len(escolhidos) == len(bitmaps) and self.sem_nulos[coluna]:
+            return None
+        resultado = np.zeros((self.n + 7) // 8, dtype=np.uint8)
+        for valor in escolhidos:
+            np.bitwise_or(resultado, bitmaps[valor], out=resultado)
+        return resultado
+
+    def _bitmap_minimo(self, minimo):
+        """Bitmap de ``valor >= minimo`` (None = todas as linhas passam)."""
+        corte = int(np.searchsorted(self.ordenados, minimo, side='left'))
+        aprovadas = len(self.ordenados) - corte
+        if aprovadas == self.n:
+            return None
+        if aprovadas <= self.n // FRACAO_ESPARSA:
+            marcas = np.zeros(self.n, dtype=bool)
+            marcas[self.ordem[corte:]] = True
+        elif len(self.ordenados) - aprovadas <= self.n // FRACAO_ESPARSA and len(self.ordenados) == self.n:
+            marcas = np.ones(self.n, dtype=bool)
+            marcas[self.ordem[:corte]] = False
+        else:
+            marcas = self.valores >= minimo
+        return np.packbits(marcas)
+
+    def filtrar(self, escolhas, minimo=None):
+        """Máscara booleana das linhas com os valores escolhidos em cada coluna e valor >= `minimo`.
+
+        `escolhas` é ``{coluna: valores escolhidos}``.
+        """
+        bitmaps = [self._bitmap_coluna(coluna, valores) for coluna, valores in escolhas.items()]
+        if minimo is not None:
+            bitmaps.append(self._bitmap_minimo(minimo))
+        bitmaps = [b for b in bitmaps if b is not None]
+        if not bitmaps:
+            return np.ones(self.n, dtype=bool)
+        resultado = bitmaps[0].copy()
+        for bitmap in bitmaps[1:]:
+            np.bitwise_and(resultado, bitmap, out=resultado)
+        return np.unpackbits(resultado, count=self.n).view(bool)
+
+
+def filtrar_linhas(df, escolhas, minimo=None, coluna_valor='Vendas'):
+    """Mesma máscara de `IndiceFiltros.filtrar`, com ``isin`` linha a linha (sem índice)."""
+    mascara = pd.Series(True, index=df.index)
+    for coluna, valores in escolhas.items():
+        mascara &= df[coluna].isin(valores)
+    if minimo is not None:
+        mascara &= df[coluna_valor] >= minimo
+    return mascara.to_numpy()
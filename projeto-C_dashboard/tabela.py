@@ -0,0 +1,80 @@
+"""
+Tabela paginada do dashboard: só a página visível sai do servidor.
+
+Enviar o DataFrame filtrado inteiro para ``st.dataframe`` serializa todas
+as linhas a cada interação. Aqui a tabela recebe a máscara dos filtros e
+monta apenas a janela da página atual:
+
+- `ordem_coluna` calcula uma vez (por coluna e direção) a permutação
+  estável que ordena as linhas; o dashboard a guarda com os dados em
+  cache (`cache_dados.anexo`);
+- `janela` percorre a permutação (ou a ordem original) em blocos e para
+  assim que tem as linhas da página, a partir do início ou, nas páginas
+  da segunda metade, do fim: nenhuma página lê mais que metade dos dados
+  e as das pontas leem só alguns blocos;
+- `pagina` devolve só as linhas e colunas visíveis (projeção), então o
+  tamanho do que vai para o navegador depende do tamanho da página, não
+  do número de linhas filtradas.
+"""
+
+import math
+
+import numpy as np
+
+TAMANHOS_PAGINA = (25, 50, 100, 500)
+TAMANHO_PADRAO = 50
+BLOCO = 1 << 16
+
+
+def ordem_coluna(df, coluna, crescente=True):
+    """Posições das linhas ordenadas por `coluna` (estável, nulos por último)."""
+    serie = df[coluna].reset_index(drop=True)
+    ordem = serie.sort_values(ascending=crescente, kind='stable', na_position='last').index.to_numpy()
+    return ordem.astype(np.int32) if len(ordem) < 2 ** 31 else ordem
+
+
+def _aprovadas(mascara, ordem, bloco_inicio):
+    if ordem is None:
+        return bloco_inicio + np.flatnonzero(mascara[bloco_inicio:bloco_inicio + BLOCO])
+    bloco = ordem[bloco_inicio:bloco_inicio + BLOCO]
+    return bloco[mascara[bloco]]
+
+
+def janela(mascara, inicio, fim, ordem=None, total=None):
+    """Posições das linhas aprovadas pela máscara, da `inicio`-ésima à `fim`-ésima, na ordem dada.
+
+    Com `total` (linhas aprovadas) e a janela na segunda metade, percorre a partir do fim.
+    """
+    if total is not None:
+        # Janela além da última linha aprovada: página vazia
+        if inicio >= total:
+            return np.empty(0, dtype=np.intp)
+        fim = min(fim, total)
+    blocos = range(0, len(mascara), BLOCO)
+    do_fim = total is not None and inicio > total // 2
+    if do_fim:
+        # Mesma busca sobre a sequência invertida
+        inicio, fim, blocos = max(total - fim, 0), total - inicio, reversed(blocos)
+    partes, vistas = [], 0
+    for bloco_inicio in blocos:
+        aprovadas = _aprovadas(mascara, ordem, bloco_inicio)
+        if do_fim:
+            aprovadas = aprovadas[::-1]
+        if vistas + len(aprovadas) > inicio:
+            partes.append(aprovadas[max(inicio - vistas, 0):fim - vistas])
+        vistas += len(aprovadas)
+        if vistas >= fim:
+            break
+    posicoes = np.concatenate(partes) if partes else np.empty(0, dtype=np.intp)
+    return posicoes[::-1] if do_fim else posicoes
+
+
+def total_paginas(total_linhas, tamanho):
+    return max(1, math.ceil(total_linhas / tamanho))
+
+
+def pagina(df, mascara, numero, tamanho, colunas=None, ordem=None, total=None):
+    """Linhas da página `numero` (a partir de 1) com as `colunas` escolhidas."""
+    posicoes = janela(mascara, (numero - 1) * tamanho, numero * tamanho, ordem, total)
+    # Linhas primeiro: projetar antes copiaria as colunas inteiras
+    return df.take(posicoes)[list(colunas or df.columns)]